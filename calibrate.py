@@ -175,7 +175,12 @@ class Calibrate(object):
         """
         if not start_voltages:
             print("Guess voltages via calibration of tubes.")
-            start_voltages = self.calibtubes.guessVoltages(xyY[2])
+            if self.calibtubes.primaries is not None:
+                voltages, feasible = self.calibtubes.guessVoltagesBatch(
+                        [xyY])
+                start_voltages = tuple(voltages[0].tolist())
+            else:
+                start_voltages = self.calibtubes.guessVoltages(xyY[2])
         self.calibtubes.setVoltages(start_voltages)
         self.calibtubes.printNote()
         self.set_manually_plot.start_voltages = start_voltages
@@ -234,6 +239,8 @@ class Calibrate(object):
         self.calibmonitor.startMeasurement()
         for ce in colortable.color_list:
             self._measureColorEntryMonitor(ce, n=each)
+        if self.calibtubes.primaries is not None:
+            self.guessStartVoltages(colortable.color_list)
         # TUBES
         self.calibtubes.startMeasurement()
         for ce in colortable.color_list:
@@ -249,9 +256,30 @@ class Calibrate(object):
                     ce.patch_stim_value, ce.voltages)
             ce.voltages = voltages_vision
         self.calibtubes.startMeasurement()
-        for ce in colortable.color_list:
-            self._measureColorEntryTubes(ce, n=each)
+        self._measureColorEntriesTubes(colortable.color_list, n=each)
+
 
+    def guessStartVoltages(self, color_list):
+        """
+        Sets the voltages of every color entry in *color_list*, which has
+        no voltages yet, to the voltages guessed for its monitor_xyY with
+        one call of CalibTubes.guessVoltagesBatch. Returns the list of
+        color entries, which the tubes can not produce.
+
+        """
+        entries = [ce for ce in color_list if not ce.voltages and
+                ce.monitor_xyY]
+        if not entries:
+            return []
+        voltages, feasible = self.calibtubes.guessVoltagesBatch(
+                [ce.monitor_xyY for ce in entries])
+        for ce, voltage in zip(entries, voltages.tolist()):
+            ce.voltages = tuple(voltage)
+        out_of_range = [ce for ce, ok in zip(entries, feasible) if not ok]
+        for ce in out_of_range:
+            print("WARNING: tubes can not produce %s, voltages are clipped."
+                    %ce.name)
+        return out_of_range
 
     def calibrateColorEntry(self, colorentry, n=5):
         """
@@ -296,21 +324,17 @@ class Calibrate(object):
                 math.sqrt(scipy.var([xyY[2] for xyY in xyY_list])))
 
     def _measureColorEntryTubes(self, colorentry, n=5):
-        vol_col_spec_list = self.calibtubes.measureVoltages(
-                [colorentry.voltages,],
-                imi=0.5, each=n)
-        colorentry.tubes_xyY = (
-                scipy.mean([vol_col_spec[1][0] for vol_col_spec in
-                    vol_col_spec_list]),
-                scipy.mean([vol_col_spec[1][1] for vol_col_spec in
-                    vol_col_spec_list]),
-                scipy.mean([vol_col_spec[1][2] for vol_col_spec in
-                    vol_col_spec_list]))
-        colorentry.tubes_xyY_sd = (
-                math.sqrt(scipy.var([vol_col_spec[1][0] for vol_col_spec in
-                    vol_col_spec_list])),
-                math.sqrt(scipy.var([vol_col_spec[1][1] for vol_col_spec in
-                    vol_col_spec_list])),
-                math.sqrt(scipy.var([vol_col_spec[1][2] for vol_col_spec in
-                    vol_col_spec_list])))
+        self._measureColorEntriesTubes([colorentry,], n=n)
+
+    def _measureColorEntriesTubes(self, color_list, n=5):
+        # measures all color entries in one batch in the order with the
+        # shortest ramps between the voltages; the results come back in
+        # the order of color_list
+        batch = self.calibtubes.measureVoltages(
+                [colorentry.voltages for colorentry in color_list],
+                imi=0.5, each=n, optimize_order=True, counterbalance=True)
+        for i, colorentry in enumerate(color_list):
+            xyY = batch.xyY[i*n:(i + 1)*n].astype(float)
+            colorentry.tubes_xyY = tuple(xyY.mean(axis=0).tolist())
+            colorentry.tubes_xyY_sd = tuple(xyY.std(axis=0).tolist())
 
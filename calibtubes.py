@@ -21,17 +21,26 @@ color with the i1 Pro photometer.
 
 """
 
-from ctypes import c_float
+import os
 import time
 from exceptions import ValueError
 
 import numpy as np
-from scipy.optimize import curve_fit
 
 import pickle
 
 from tubes import Tubes
-from eyeone.constants import TRISTIMULUS_SIZE, SPECTRUM_SIZE, eNoError
+import ordering
+import tubemodel
+from measurement import MeasurementBatch, subtractBaseline
+from convert import xyY2XYZ, XYZ2xyY
+import colorimetry
+from colorlut import ColorLookupTable
+from journal import CalibrationJournal
+from drift import DriftModel, fitGainOffset
+from warmup import WarmUpMonitor
+from simeyeone import SimulatedEyeOne
+from eyeone.constants import eNoError
 import printing
 
 class CalibTubes(Tubes):
@@ -164,15 +173,25 @@ class CalibTubes(Tubes):
 
     """
 
-    def __init__(self, eyeone):
+    def __init__(self, eyeone, dummy=False, simulate=False):
         """
         Parameters:
             eyeone: eyeone.eyeone.EyeOne instance
                 needed for measuring the tubes
 
+            dummy: *False* or True
+                If dummy=True no wasco runtime libraries will be loaded.
+
+            simulate: *False* or True
+                If simulate=True the tubes are simulated with a virtual
+                clock, so that all waiting (imi) takes no time. A
+                simeyeone.SimulatedEyeOne measures the simulated tubes.
+
         """
-        Tubes.__init__(self)
+        Tubes.__init__(self, dummy=dummy, simulate=simulate)
         self.eyeone = eyeone
+        if simulate and isinstance(eyeone, SimulatedEyeOne):
+            eyeone.attachDevTubes(self.devtub)
         self.is_calibrated = False
         self.red_p1 = None
         self.red_p2 = None
@@ -183,6 +202,47 @@ class CalibTubes(Tubes):
         self.blue_p1 = None
         self.blue_p2 = None
         self.blue_p3 = None
+        # tubemodel.MonotoneSpline of red, green, and blue, if they were
+        # calibrated with model="spline" (then the parameters are None)
+        self.splines = None
+        # luminance function of the "all" sweep (not saved)
+        self.all_p1 = None
+        self.all_p2 = None
+        self.all_p3 = None
+        # XYZ per cd/m^2 of red, green, and blue (one row per channel)
+        self.primaries = None
+        # tubemodel.ColorModel from voltages to XYZ
+        self.color_model = None
+        # colorlut.ColorLookupTable of the color model
+        self.color_lut = None
+        # time of the last calibration (seconds since the epoch)
+        self.calibration_time = None
+        # drift.DriftModel of the checks since the calibration
+        self.drift_model = None
+        # operating hours of the tubes, if known (for the drift model)
+        self.operating_hours = None
+        # operating hours of the tubes at the last calibration
+        self.calibration_hours = None
+        # store.MeasurementStore, which gets all measurements, if not None
+        self.store = None
+
+        # settling of the light after the voltages changed
+        self.settling = "fixed" # "fixed" waits imi, "adaptive" measures
+        self.settle_interval = 0.0 # extra seconds between adaptive readings
+        self.settle_tolerance = 0.005 # relative difference of Y
+        self.settle_absolute = 0.01 # smallest difference of Y in cd/m^2
+        self.settle_timeout = 2.0 # max seconds of adaptive settling
+        self.settling_times = list() # settling times since the calibration
+
+        # light of all tubes at their off level (unattended calibration)
+        self.baseline_xyY = None
+        self.baseline_spectrum = None
+
+        # "device" reads xyY from the i1 Pro, "spectrum" computes it from
+        # the spectrum with the observer and skips the tristimulus readout
+        self.tristimulus = "device"
+        self.observer = "1931" # "1931" (2 degree) or "1964" (10 degree)
+        self.spectrum_scale = colorimetry.K_M # spectrum to cd/m^2
 
     def startMeasurement(self):
         """
@@ -193,10 +253,11 @@ class CalibTubes(Tubes):
         print("\nPlease put i1 Pro in measurement position for TUBES"
                 + " and press key to start measurement.")
         while(self.eyeone.I1_KeyPressed() != eNoError):
-            time.sleep(0.01)
+            self.wait(0.01)
         print("Starting measurement...")
 
-    def measureVoltages(self, voltages, imi=0.5, each=1):
+    def measureVoltages(self, voltages, imi=0.5, each=1,
+            optimize_order=False, counterbalance=False):
         """
         Measures color of tubes for given voltages.
 
@@ -207,21 +268,40 @@ class CalibTubes(Tubes):
                 inter measurement interval in seconds
             each: *1* or any positive integer
                 number of measurements per voltage
-
-        Returns list of triples (voltages, yxY, spectrum). All elements of
-        the triples are tuples as well. For example: [( (vol_r1, vol_g1,
-        vol_b1), (x1, y1, Y1), (l_1, l_2, l_3, ..., l_36) ), ...]
+            optimize_order: *False* or True
+                if True, the voltages are measured in the order, which
+                keeps the ramps between them short (see
+                ordering.orderVoltages)
+            counterbalance: *False* or True
+                if True (and optimize_order is True), the repeated
+                measurements of each voltage are approached equally often
+                from both directions
+
+        Returns a measurement.MeasurementBatch with the arrays voltages,
+        xyY, spectra, and timestamps. Like the list of triples (voltages,
+        yxY, spectrum) returned before, indexing the batch gives triples of
+        tuples. For example: batch[0] == ( (vol_r1, vol_g1, vol_b1), (x1,
+        y1, Y1), (l_1, l_2, l_3, ..., l_36) )
+
+        The batch is always in the order of *voltages*, the file with the
+        measurements is in the order of measurement.
 
         """
         self.printNote()
         if not self.eyeone.is_calibrated:
             self.eyeone.calibrate()
 
-        vol_col_spec_list = list()
-        tri_stim = (c_float * TRISTIMULUS_SIZE)() # memory where i1 Pro
-                                                  # saves tristim.
-        spectrum = (c_float * SPECTRUM_SIZE)()    # memory where i1 Pro
-                                                  # saves spectrum.
+        samples = [voltage for voltage in voltages for i in range(each)]
+        if optimize_order:
+            order = ordering.orderVoltages(samples,
+                    start=self.currentVoltages(),
+                    counterbalance=counterbalance)
+        else:
+            order = range(len(samples))
+
+        batch = MeasurementBatch(len(samples))
+        tri_stim = batch.tri_stim # memory where i1 Pro saves tristim.
+        spectrum = batch.spectrum # memory where i1 Pro saves spectrum.
         #start measurement
         filename = ('calibdata/measurements/measure_tubes_' +
                     time.strftime("%Y%m%d_%H%M") + '.txt')
@@ -229,36 +309,34 @@ class CalibTubes(Tubes):
         # with open(filename, 'w') as calibfile:
         #     calibfile.write("volR, volG, volB, x, y, Y," +
         #             ", ".join(["l" + str(x) for x in range(1,37)]) + "\n")
-        with printing.TubesDataFile(prefix="calibdata/measurements/measure_tubes_") as calib_file:
+        # the measurements are written by a background thread, so that the
+        # next ramp starts right after the spectrum is read out
+        with printing.BackgroundTubesDataFile(prefix="calibdata/measurements/measure_tubes_") as calib_file:
             print("Starting measurement...")
-            for voltage in voltages:
-                for i in range(each):
-                    self.setVoltages(voltage)
-                    print(voltage)
-                    time.sleep(imi) # to give the i1 Pro time to adapt
-                                    # and to reduce carry-over effects
-                    if(self.eyeone.I1_TriggerMeasurement() != eNoError):
-                        print("Measurement failed for voltage %s ."
-                                %str(voltage))
-                    if(self.eyeone.I1_GetTriStimulus(tri_stim, 0) != eNoError):
-                        print("Failed to get tristim for voltage %s ."
-                                %str(voltage))
-                    if(self.eyeone.I1_GetSpectrum(spectrum, 0) != eNoError):
-                        print("Failed to get spectrum for voltage %s ."
-                                %str(voltage))
-                    #write data #TODO output.py
-                    # calibfile.write(", ".join([str(x) for x in voltage]) +
-                    #         ", " + ", ".join([str(x) for x in tri_stim]) +
-                    #         ", " + ", ".join([str(x) for x in spectrum]) +
-                    #         "\n")
-                    # calibfile.flush()
-                    calib_file.write_data_txt(xyY=tri_stim, voltage=voltage, spec_list=spectrum)
-                    #store data in lists
-                    vol_col_spec_list.append( (voltage, tri_stim, spectrum) )
-        return vol_col_spec_list
-
-
-    def calibrate(self, imi=0.5, n=50, each=1):
+            for index in order:
+                voltage = samples[index]
+                settling = self.measureSample(voltage, imi, tri_stim,
+                        spectrum)
+                #write data #TODO output.py
+                # calibfile.write(", ".join([str(x) for x in voltage]) +
+                #         ", " + ", ".join([str(x) for x in tri_stim]) +
+                #         ", " + ", ".join([str(x) for x in spectrum]) +
+                #         "\n")
+                # calibfile.flush()
+                calib_file.write_data_txt(xyY=tri_stim, voltage=voltage, spec_list=spectrum)
+                #store data in batch
+                batch.record(voltage, self.time(), settling)
+        batch.restoreOrder(order)
+        if self.store is not None:
+            run = self.store.startRun("measureVoltages", imi=imi, each=each)
+            self.store.appendBatch(batch, run=run)
+        return batch
+
+
+    def calibrate(self, imi=0.5, n=50, each=1, adaptive=False,
+            target_error=0.1, journal=None, unattended=False,
+            n_baseline=5, stop_tolerance=None, robust=False,
+            model="exponential", warm_up=False):
         """
         Calibrates tubes with i1 Pro. i1 Pro should be connected to the
         computer. The calibration takes around 2 ?? minutes.
@@ -274,91 +352,196 @@ class CalibTubes(Tubes):
             each: *1* or any positive integer
                 number of measurements per color
 
+            adaptive: *False* or True
+                if True, the voltages are chosen with
+                measureOneColorChannelAdaptive and n is the maximal number
+                of voltages per tube
+
+            target_error: *0.1* or any positive float
+                with adaptive=True, the measurement of a tube stops, when
+                the predicted luminance has a standard deviation below
+                target_error (in cd/m^2) for all voltages
+
+            journal: *None* or str
+                name of a journal file (see journal.CalibrationJournal).
+                Every sample is written to the journal as soon as it is
+                measured. If the file exists, the calibration resumes after
+                the last sample in the journal: complete tubes are not
+                measured again and an interrupted tube continues with its
+                next voltage.
+
+            unattended: *False* or True
+                if True, the calibration runs without any prompt. While a
+                tube is measured, the other tubes are set to
+                self.devtub.off_level. Before and after the tubes, all
+                tubes are measured n_baseline times at their off level and
+                the mean of this baseline is subtracted from all
+                measurements before the fit. The baseline is stored in
+                self.baseline_xyY and self.baseline_spectrum.
+
+            n_baseline: *5* or any positive integer
+                number of measurements of the baseline before and after
+                the tubes with unattended=True
+
+            stop_tolerance: *None* or any positive float
+                if given (and adaptive=False), the voltages of a tube are
+                measured from coarse to fine and the measurement of the
+                tube stops, as soon as the predicted luminances are stable
+                within stop_tolerance (in cd/m^2), see
+                tubemodel.IncrementalFit
+
+            robust: *False* or True
+                if True, every tube is fitted with a robust loss right
+                after its measurement and the rejected voltages (outliers
+                and failed measurements) are measured again once (see
+                remeasureOutliers). The final fit leaves out measurements,
+                which are still rejected.
+
+            model: *"exponential"* or "spline"
+                "exponential" fits the luminance function of
+                tubemodel.luminance to every tube, "spline" interpolates
+                the measurements with a tubemodel.MonotoneSpline. If the
+                fit of the luminance function fails, the splines are used
+                instead, so that the calibration always gives a model.
+
+            warm_up: *False* or True
+                if True, waitForWarmUp measures the tubes until they are
+                warm instead of relying on the note that the tubes have to
+                be on for four hours
+
         """
         # TODO generate logfile for every calibration
         # TODO check what happens, if fitting of the curves failed!
         #      it should give a reasonable error message and stores the
         #      data in a way, that it is easy to refit.
-        self.printNote()
+        if model not in ("exponential", "spline"):
+            raise ValueError("model must be 'exponential' or 'spline' and"
+                    + " not %s" %str(model))
+        if not warm_up:
+            self.printNote()
+
+        # the drift, the baseline, the lookup table, and the settling times
+        # of the last calibration do not apply to this one
+        self.drift_model = None
+        self.settling_times = list()
+        self.color_lut = None
+        self.baseline_xyY = None
+        self.baseline_spectrum = None
 
         if not self.eyeone.is_calibrated:
             self.eyeone.calibrate()
 
+        if warm_up:
+            self.waitForWarmUp(imi=imi)
+
+        if journal is not None:
+            journal = CalibrationJournal(journal, n=n, each=each,
+                    adaptive=adaptive, stop_tolerance=stop_tolerance,
+                    unattended=unattended, n_baseline=n_baseline,
+                    robust=robust)
+
+        if unattended:
+            other = self.devtub.off_level
+            baseline_before = self.measureBaseline(imi=imi,
+                    each=n_baseline, journal=journal, name="baseline_before")
+        else:
+            other = 0xFFF
+
         # Measurement
-        self.setVoltages( (0xFFF, 0xFFF, 0xFFF) )
-        print("\nPlease put i1 Pro in measurement position and "
-        + "press key to start measurement.")
-        print("\nTurn off blue and green tubes!"
-        + "\nPress key to start measurement of RED tubes.")
-        while(self.eyeone.I1_KeyPressed() != eNoError):
-            time.sleep(0.01)
-        print("Starting measurement...")
-        measure_red = self.measureOneColorChannel(imi=imi, color="red",
-                n=n, each=each)
+        self.setVoltages( (0xFFF, other, other) )
+        if not unattended:
+            print("\nPlease put i1 Pro in measurement position and "
+            + "press key to start measurement.")
+        self._startChannel("\nTurn off blue and green tubes!"
+        + "\nPress key to start measurement of RED tubes.", "red", journal,
+                unattended)
+        measure_red = self._measureChannel(color="red", imi=imi,
+                n=n, each=each, adaptive=adaptive, target_error=target_error,
+                journal=journal, other=other, stop_tolerance=stop_tolerance,
+                robust=robust)
         voltages_r = measure_red[0]
         xyY_r = measure_red[1]
         spectra_r = measure_red[2]
-
-        self.setVoltages( (0xFFF, 0xFFF, 0xFFF) )
-        print("\nTurn off red and blue tubes!"
-        + "\nPress key to start measurement of GREEN tubes.")
-        while(self.eyeone.I1_KeyPressed() != eNoError):
-            time.sleep(0.01)
-        print("Starting measurement...")
-        measure_green = self.measureOneColorChannel(imi=imi, color="green",
-                n=n, each=each)
+        timestamps_r = measure_red[3]
+
+        self.setVoltages( (other, 0xFFF, other) )
+        self._startChannel("\nTurn off red and blue tubes!"
+        + "\nPress key to start measurement of GREEN tubes.", "green",
+                journal, unattended)
+        measure_green = self._measureChannel(color="green", imi=imi,
+                n=n, each=each, adaptive=adaptive, target_error=target_error,
+                journal=journal, other=other, stop_tolerance=stop_tolerance,
+                robust=robust)
         voltages_g = measure_green[0]
         xyY_g = measure_green[1]
         spectra_g = measure_green[2]
-
-        self.setVoltages( (0xFFF, 0xFFF, 0xFFF) )
-        print("\nTurn off red and green tubes!"
-        + "\nPress key to start measurement of BLUE tubes.")
-        while(self.eyeone.I1_KeyPressed() != eNoError):
-            time.sleep(0.01)
-        print("Starting measurement...")
-        measure_blue = self.measureOneColorChannel(imi=imi, color="blue",
-                n=n, each=each)
+        timestamps_g = measure_green[3]
+
+        self.setVoltages( (other, other, 0xFFF) )
+        self._startChannel("\nTurn off red and green tubes!"
+        + "\nPress key to start measurement of BLUE tubes.", "blue",
+                journal, unattended)
+        measure_blue = self._measureChannel(color="blue", imi=imi,
+                n=n, each=each, adaptive=adaptive, target_error=target_error,
+                journal=journal, other=other, stop_tolerance=stop_tolerance,
+                robust=robust)
         voltages_b = measure_blue[0]
         xyY_b = measure_blue[1]
         spectra_b = measure_blue[2]
+        timestamps_b = measure_blue[3]
 
         self.setVoltages( (0xFFF, 0xFFF, 0xFFF) )
-        print("\nTurn ON red, green and blue tubes!"
-        + "\nPress key to start measurement of ALL tubes.")
-        while(self.eyeone.I1_KeyPressed() != eNoError):
-            time.sleep(0.01)
-        print("Starting measurement...")
-        measure_all = self.measureOneColorChannel(imi=imi, color="all",
-                n=n, each=each)
+        self._startChannel("\nTurn ON red, green and blue tubes!"
+        + "\nPress key to start measurement of ALL tubes.", "all",
+                journal, unattended)
+        measure_all = self._measureChannel(color="all", imi=imi,
+                n=n, each=each, adaptive=adaptive, target_error=target_error,
+                journal=journal, other=other, stop_tolerance=stop_tolerance,
+                robust=robust)
         voltages_all = measure_all[0]
         xyY_all = measure_all[1]
         spectra_all = measure_all[2]
+        timestamps_all = measure_all[3]
 
+        if unattended:
+            baseline_after = self.measureBaseline(imi=imi,
+                    each=n_baseline, journal=journal, name="baseline_after")
         print("Measurement finished.")
         self.setVoltages( (0x400, 0x400, 0x400) ) # to signal that the
                                             # measurement is over
 
         # write data to hard drive
         # TODO output.py
+        if self.store is not None:
+            run = self.store.startRun("calibrate", imi=imi, n=n, each=each,
+                    adaptive=adaptive, unattended=unattended)
+            for color, voltages, xyY, spectra, timestamps in (
+                    ("red", voltages_r, xyY_r, spectra_r, timestamps_r),
+                    ("green", voltages_g, xyY_g, spectra_g, timestamps_g),
+                    ("blue", voltages_b, xyY_b, spectra_b, timestamps_b),
+                    ("all", voltages_all, xyY_all, spectra_all,
+                        timestamps_all)):
+                self.store.append(voltages, xyY, spectra, timestamps,
+                        channel=color, run=run)
+            if unattended:
+                self.store.appendBatch(baseline_before,
+                        channel="baseline_before", run=run)
+                self.store.appendBatch(baseline_after,
+                        channel="baseline_after", run=run)
 
         with printing.TubesDataFile(prefix="calibdata/measurements/calibration_tubes_raw_") as calib_file:
-            #with open('calibdata/measurements/calibration_tubes_raw_' +
-            #time.strftime("%Y%m%d_%H%M") +  '.txt', 'w') as calibFile:
-            #calibFile.write("voltage, xyY, spectra\n") # TODO not just with 3 values but with 3 + 3 + 36
-            for j in range(4):
-                voltages = (voltages_r, voltages_g, voltages_b,
-                        voltages_all)[j]
-                xyY = (xyY_r, xyY_g, xyY_b, xyY_all)[j]
-                spectra = (spectra_r, spectra_g, spectra_b, spectra_all)[j]
-                for i in range(len(voltages)):
-                    # calibFile.write(", ".join([str(x) for x in voltages[i]]) +
-                    #                 ", " + ", ".join([str(x) for x in
-                    #                     xyY[i]]) +
-                    #                 ", " + ", ".join([str(x) for x in
-                    #                     spectra[i]]) +
-                    #                 "\n")
-                    calib_file.write_data_txt_loop(xyY=xyY, voltage=voltages, spec_list=spectra)
+            for voltages, xyY, spectra in (
+                    (voltages_r, xyY_r, spectra_r),
+                    (voltages_g, xyY_g, spectra_g),
+                    (voltages_b, xyY_b, spectra_b),
+                    (voltages_all, xyY_all, spectra_all)):
+                calib_file.write_data_array(xyY=xyY, voltage=voltages,
+                        spec_list=spectra)
+            if unattended:
+                for baseline in (baseline_before, baseline_after):
+                    calib_file.write_data_array(xyY=baseline.xyY,
+                            voltage=baseline.voltages,
+                            spec_list=baseline.spectra)
         with open('calibdata/measurements/calibration_tubes_raw_' +
                 time.strftime("%Y%m%d_%H%M") +  '.pkl', 'w') as f:
             pickle.dump(voltages_r, f)
@@ -373,35 +556,65 @@ class CalibTubes(Tubes):
             pickle.dump(spectra_g, f)
             pickle.dump(spectra_b, f)
             pickle.dump(spectra_all, f)
-
-        try:
-            # fit a luminance function -- non-linear regression model based
-            # on Pinheiro & Bates (2000)
-
-            def func(x, a, b, c):
-                x = np.array(x)
-                return a + (b - a)*np.exp(-np.exp(c)*x)
-
-            # red channel
-            Y_r = [x[2] for x in xyY_r]
-            v_r = [x[0] for x in voltages_r]
-            popt_r, pcov_r = curve_fit(func, v_r, Y_r, p0=[67.8, -6.7, -9.0])
-
-            # green channel
-            Y_g = [x[2] for x in xyY_g]
-            v_g = [x[1] for x in voltages_g]
-            popt_g, pcov_g = curve_fit(func, v_g, Y_g, p0=[138.7, -16.4, -8.9])
-
-            # blue channel
-            Y_b = [x[2] for x in xyY_b]
-            v_b = [x[2] for x in voltages_b]
-            popt_b, pcov_b = curve_fit(func, v_b, Y_b, p0=[58.2, -2.7, -9.8])
-
-            print("Parameters estimated.")
-        except:
-            print("FAILED to estimate parameters for tubes.\n" +
-                  "Look at calibration_tubes_raw_XX.txt for the data.")
-            return
+            if unattended:
+                pickle.dump(baseline_before.xyY, f)
+                pickle.dump(baseline_after.xyY, f)
+                pickle.dump(baseline_before.spectra, f)
+                pickle.dump(baseline_after.spectra, f)
+
+        if unattended:
+            # light adds up in XYZ, so the baseline is averaged in XYZ
+            # (without failed measurements)
+            baseline_XYZ = xyY2XYZ(np.vstack((baseline_before.xyY,
+                baseline_after.xyY)))
+            self.baseline_xyY = tuple(XYZ2xyY(
+                np.nanmean(baseline_XYZ, axis=0)).tolist())
+            self.baseline_spectrum = np.nanmean(np.vstack((
+                baseline_before.spectra, baseline_after.spectra)), axis=0)
+            print("Subtracting baseline xyY = %s" %str(self.baseline_xyY))
+            xyY_r, spectra_r = subtractBaseline(xyY_r, spectra_r,
+                    self.baseline_xyY, self.baseline_spectrum)
+            xyY_g, spectra_g = subtractBaseline(xyY_g, spectra_g,
+                    self.baseline_xyY, self.baseline_spectrum)
+            xyY_b, spectra_b = subtractBaseline(xyY_b, spectra_b,
+                    self.baseline_xyY, self.baseline_spectrum)
+            xyY_all, spectra_all = subtractBaseline(xyY_all, spectra_all,
+                    self.baseline_xyY, self.baseline_spectrum)
+
+        Y_r = xyY_r[:, 2]
+        v_r = [x[0] for x in voltages_r]
+        Y_g = xyY_g[:, 2]
+        v_g = [x[1] for x in voltages_g]
+        Y_b = xyY_b[:, 2]
+        v_b = [x[2] for x in voltages_b]
+        Y_all = xyY_all[:, 2]
+        v_all = [x[0] for x in voltages_all]
+        data = {"red": (v_r, Y_r), "green": (v_g, Y_g),
+                "blue": (v_b, Y_b), "all": (v_all, Y_all)}
+
+        fits = None
+        if model == "exponential":
+            try:
+                # fit a luminance function -- non-linear regression model
+                # based on Pinheiro & Bates (2000)
+                fits = self._fitLuminanceFunctions(data, robust)
+                print("Parameters estimated.")
+            except:
+                print("FAILED to estimate parameters for tubes, using"
+                        + " monotone splines instead.\n"
+                        + "Look at calibration_tubes_raw_XX.txt for the"
+                        + " data.")
+        if fits is None:
+            self.splines = [tubemodel.MonotoneSpline(*data[color]) for color
+                    in ("red", "green", "blue")]
+            popt_r = popt_g = popt_b = popt_all = (None, None, None)
+            print("Monotone splines interpolated.")
+        else:
+            self.splines = None
+            popt_r = fits["red"][0]
+            popt_g = fits["green"][0]
+            popt_b = fits["blue"][0]
+            popt_all = fits["all"][0]
 
         # save all created objects to calibration_tubes.txt
         with open('calibdata/measurements/calibration_tubes_tubes' +
@@ -409,23 +622,50 @@ class CalibTubes(Tubes):
             calibFile.write('voltages R:' + str(v_r) + '\n')
             calibFile.write('voltages G:' + str(v_g) + '\n')
             calibFile.write('voltages B:' + str(v_b) + '\n')
-            calibFile.write('Y R:' + str(Y_r) + '\n')
-            calibFile.write('Y G:' + str(Y_g) + '\n')
-            calibFile.write('Y B:' + str(Y_b) + '\n')
-            calibFile.write('parameters R:' + str(popt_r) + '\n')
-            calibFile.write('parameters G:' + str(popt_g) + '\n')
-            calibFile.write('parameters B:' + str(popt_b) + '\n')
-
-        # save the estimated parameters to CalibTubes object
-        self.red_p1 = float(popt_r[0])
-        self.red_p2 = float(popt_r[1])
-        self.red_p3 = float(popt_r[2])
-        self.green_p1 = float(popt_g[0])
-        self.green_p2 = float(popt_g[1])
-        self.green_p3 = float(popt_g[2])
-        self.blue_p1 = float(popt_b[0])
-        self.blue_p2 = float(popt_b[1])
-        self.blue_p3 = float(popt_b[2])
+            calibFile.write('Y R:' + str(Y_r.tolist()) + '\n')
+            calibFile.write('Y G:' + str(Y_g.tolist()) + '\n')
+            calibFile.write('Y B:' + str(Y_b.tolist()) + '\n')
+            if self.splines is None:
+                calibFile.write('parameters R:' + str(popt_r) + '\n')
+                calibFile.write('parameters G:' + str(popt_g) + '\n')
+                calibFile.write('parameters B:' + str(popt_b) + '\n')
+            else:
+                for name, spline in zip("RGB", self.splines):
+                    calibFile.write('knots %s:' %name
+                            + str(spline.knots_x.tolist()) + ' '
+                            + str(spline.knots_y.tolist()) + '\n')
+            calibFile.write('voltages all:' + str(v_all) + '\n')
+            calibFile.write('Y all:' + str(Y_all.tolist()) + '\n')
+            calibFile.write('parameters all:' + str(popt_all) + '\n')
+
+        # save the estimated parameters to CalibTubes object (None with
+        # splines)
+        (self.red_p1, self.red_p2, self.red_p3) = _parameters(popt_r)
+        (self.green_p1, self.green_p2, self.green_p3) = _parameters(popt_g)
+        (self.blue_p1, self.blue_p2, self.blue_p3) = _parameters(popt_b)
+        (self.all_p1, self.all_p2, self.all_p3) = _parameters(popt_all)
+        self.primaries = np.vstack((tubemodel.primariesFromSweep(xyY_r),
+            tubemodel.primariesFromSweep(xyY_g),
+            tubemodel.primariesFromSweep(xyY_b)))
+
+        # colorimetric model of all channels, the interaction of the
+        # channels is fitted to the all sweep
+        self.color_model = tubemodel.ColorModel.fromSweeps(
+                {"red": (v_r, xyY_r), "green": (v_g, xyY_g),
+                 "blue": (v_b, xyY_b)},
+                parameters=self.channelModels())
+        rms_Y, rms_xy = self.color_model.validate(voltages_all, xyY_all)
+        print("Additive color model on the all sweep: RMS error of Y %.3f"
+                %rms_Y + " cd/m^2, of xy %.4f" %rms_xy)
+        try:
+            self.color_model.fitInteraction(voltages_all, xyY_all)
+            rms_Y, rms_xy = self.color_model.validate(voltages_all, xyY_all)
+            print("Color model with interaction: RMS error of Y %.3f"
+                    %rms_Y + " cd/m^2, of xy %.4f" %rms_xy)
+        except (ValueError, np.linalg.LinAlgError):
+            print("FAILED to fit the interaction of the channels.")
+        if self.baseline_xyY is not None:
+            self.color_model.baseline_XYZ = xyY2XYZ(self.baseline_xyY)
 
         print("red_p1" + str(self.red_p1))
         print("red_p2" + str(self.red_p2))
@@ -438,24 +678,182 @@ class CalibTubes(Tubes):
         print("blue_p3" + str(self.blue_p3))
 
         # finished calibration :)
+        self.calibration_time = self.time()
+        self.calibration_hours = self.operating_hours
         self.is_calibrated = True
         print("Calibration of tubes finished.")
 
+    def _fitLuminanceFunctions(self, data, robust=False):
+        # fits of the luminance function for the channels in data
+        if robust:
+            fits = dict()
+            for color in ("red", "green", "blue", "all"):
+                popt, pcov, inliers = tubemodel.fitChannelRobust(
+                        *data[color])
+                print("%i of %i measurements of %s rejected."
+                        %(np.sum(~inliers), len(inliers), color))
+                fits[color] = (popt, pcov)
+            return fits
+        # all channels in one least-squares problem
+        return tubemodel.fitChannels(data)
+
+    def channelModels(self, corrected=True):
+        """
+        Returns the models of the luminance of red, green, and blue
+        (tubemodel.MonotoneSpline or tubemodel.LuminanceFunction) from
+        calibrate or loadParameter.
+
+        If there is a self.drift_model and *corrected* is True, the models
+        are corrected for the drift at the moment (see
+        drift.DriftModel.correct).
+
+        """
+        if self.splines is not None:
+            models = self.splines
+        else:
+            models = tubemodel.channelModels(
+                    [(self.red_p1, self.red_p2, self.red_p3),
+                     (self.green_p1, self.green_p2, self.green_p3),
+                     (self.blue_p1, self.blue_p2, self.blue_p3)])
+        if corrected and self.drift_model is not None:
+            models = self.drift_model.correct(models, self.time(),
+                    self.operating_hours)
+        return models
+
+    def currentColorModel(self):
+        """
+        Returns self.color_model with the channel models corrected for the
+        drift at the moment, or self.color_model, if there is no
+        self.drift_model.
+
+        """
+        if self.drift_model is None or self.color_model is None:
+            return self.color_model
+        model = self.color_model
+        corrected = tubemodel.ColorModel(self.channelModels(),
+                model.coefficients, low=model.low, high=model.high,
+                interaction=model.interaction)
+        corrected.baseline_XYZ = model.baseline_XYZ
+        return corrected
+
+    def checkDrift(self, imi=1.0, each=3, voltages=(0xFFF, 0x900),
+            filename=None):
+        """
+        Measures every channel at *voltages* (the other channels at
+        self.devtub.off_level) *each* times, estimates gain and offset of
+        the luminance of every channel relative to the calibration (see
+        drift.fitGainOffset), and adds them as check to self.drift_model.
+        Returns gain and offset (arrays of 3 floats).
+
+        If the calibration subtracted a baseline (unattended=True), all
+        channels are measured at their off level, too, and this baseline
+        is subtracted like in calibrate. Otherwise the channel models
+        contain the stray light and nothing is subtracted.
+
+        From now on the voltages are predicted with the models corrected
+        for the drift (see channelModels). The check takes less than a
+        minute. If self.operating_hours is kept up to date, the drift is
+        predicted from the operating hours since the calibration, too.
+
+        Parameters:
+            imi: *1.0* or positive float
+                inter measurement interval in seconds; the voltages jump
+                from channel to channel, so the light needs longer to
+                settle than in the sweeps of calibrate
+
+            filename: *None* or str
+                if given, self.drift_model is saved to this file (see
+                drift.DriftModel.save)
+
+        """
+        if not self.is_calibrated:
+            raise ValueError("calibrate the tubes before checking the drift")
+        if not self.eyeone.is_calibrated:
+            self.eyeone.calibrate()
+        off = self.devtub.off_level
+        subtract = self.baseline_xyY is not None
+        batch = MeasurementBatch(each*(int(subtract) + 3*len(voltages)))
+        baseline_Y = 0.0
+        if subtract:
+            for i in range(each):
+                self._takeSample("baseline", (off, off, off), imi, batch)
+            baseline_Y = np.nanmean(batch.xyY[:, 2])
+        models = self.channelModels(corrected=False)
+        gain = np.ones(3)
+        offset = np.zeros(3)
+        for i, color in enumerate(("red", "green", "blue")):
+            start = len(batch)
+            for voltage in voltages:
+                for j in range(each):
+                    self._takeSample(color, self.channelVoltages(color,
+                        voltage, other=off), imi, batch)
+            measured = batch.xyY[start:, 2] - baseline_Y
+            predicted = models[i].luminance(batch.voltages[start:, i])
+            gain[i], offset[i] = fitGainOffset(predicted, measured)
+        if self.drift_model is None:
+            self.drift_model = DriftModel(self.calibration_time,
+                    self.calibration_hours)
+        self.drift_model.addCheck(self.time(), gain, offset,
+                self.operating_hours)
+        print("Drift since the calibration: gain %s, offset %s"
+                %(str(gain.tolist()), str(offset.tolist())))
+        if filename is not None:
+            self.drift_model.save(filename)
+        return (gain, offset)
+
+    def loadDrift(self, filename):
+        """
+        Loads self.drift_model saved by checkDrift.
+
+        Raises ValueError, if the drift was checked for another calibration
+        than the current one.
+
+        """
+        drift = DriftModel.load(filename)
+        if (self.calibration_time is None or
+                abs(drift.calibration_time - self.calibration_time) > 1.0):
+            raise ValueError("drift in %s belongs to the calibration at %s"
+                    %(filename, time.ctime(drift.calibration_time)) +
+                    " and not to the current calibration")
+        self.drift_model = drift
+
     def voltageSteps(self, step, i, n=None):
         return (0xFFF - step * i)
 
     def measureOneColorChannel(self, color, imi=0.5, n=50, each=1,
-            insertfunction=voltageSteps):
+            insertfunction=voltageSteps, optimize_order=False,
+            counterbalance=False, journal=None, other=0xFFF,
+            stop_tolerance=None, timestamps=False):
         """
-        Measures one color of the tubes (red, green, or blue) from lowest
-        to highest luminance.
+        Measures one color of the tubes (red, green, or blue) from highest
+        to lowest luminance.
 
             * color -- string one of "red", "green", "blue", "all"
             * imi -- inter measurement interval in seconds
             * n -- number of steps >= 2
             * each -- number of measurements per color
-
-        Returns triple of lists (voltages, rgb, spectra).
+            * optimize_order -- if True, the voltages given by
+              insertfunction are measured in the order, which keeps the
+              ramps between them short
+            * counterbalance -- if True (and optimize_order is True), the
+              voltages are measured going down and up again, the
+              measurements of each voltage are split between both ways
+            * journal -- *None* or journal.CalibrationJournal, every
+              sample is written to it and samples in it are not measured
+              again
+            * other -- voltage of the other channels
+            * stop_tolerance -- *None* or float, if given, the voltages are
+              measured from coarse to fine (see ordering.coarseToFine) and
+              the measurement stops, as soon as the predictions of a
+              tubemodel.IncrementalFit are stable within stop_tolerance
+              (in cd/m^2)
+            * timestamps -- if True, the time of each measurement (array
+              of seconds since the epoch) is returned as fourth element
+
+        Returns triple (voltages, rgb, spectra) in the order given by
+        insertfunction. voltages is a list of triples, rgb (xyY) and
+        spectra are arrays with one row per measurement. If the
+        measurement stopped early, only the measured voltages are returned.
 
         This function immediately starts measuring. There is no prompt to
         start measurement.
@@ -472,18 +870,18 @@ class CalibTubes(Tubes):
         if color == "red":
             for i in range(n):
                 for j in range(each):
-                    voltages.append( ((insertfunction(self, step, i,n)), 0xFFF, 0xFFF) )
+                    voltages.append( ((insertfunction(self, step, i,n)), other, other) )
 
         elif color == "green":
             for i in range(n):
                 for j in range(each):
-                    voltages.append( (0xFFF, (insertfunction(self, step,
-                        i,n)), 0xFFF) )
+                    voltages.append( (other, (insertfunction(self, step,
+                        i,n)), other) )
 
         elif color == "blue":
             for i in range(n):
                 for j in range(each):
-                    voltages.append( (0xFFF, 0xFFF, (insertfunction(self,
+                    voltages.append( (other, other, (insertfunction(self,
                         step, i,n))))
 
         elif color == "all":
@@ -497,30 +895,424 @@ class CalibTubes(Tubes):
             raise ValueError("color in measureOneColorChannel must be one"
             + "of 'red', 'green', 'blue' and not %s" %str(color))
 
-        tri_stim = (c_float * TRISTIMULUS_SIZE)() # memory where i1 Pro
-                                                  # saves tristim.
-        spectrum = (c_float * SPECTRUM_SIZE)()    # memory where i1 Pro
-                                                  # saves spectrum.
-        rgb_list = list()
-        spectra_list = list()
-
-        for voltage in voltages:
-            self.setVoltages(voltage)
-            print(voltage)
-            time.sleep(imi) # to give the i1 Pro time to adapt and to
-                            # reduce carry-over effects
-            if(self.eyeone.I1_TriggerMeasurement() != eNoError):
+        batch = MeasurementBatch(len(voltages))
+
+        fit = None
+        if stop_tolerance is not None:
+            if optimize_order:
+                raise ValueError("optimize_order and stop_tolerance can not"
+                        + " be combined")
+            # every beginning of this order spans all voltages
+            order = [i*each + j for i in ordering.coarseToFine(n)
+                    for j in range(each)]
+            fit = tubemodel.IncrementalFit(tolerance=stop_tolerance)
+            channel = ("red", "green", "blue", "all").index(color) % 3
+        elif optimize_order:
+            order = ordering.orderVoltages(voltages,
+                    start=self.currentVoltages(),
+                    counterbalance=counterbalance)
+        else:
+            order = range(len(voltages))
+
+        for k, index in enumerate(order):
+            self._takeSample(color, voltages[index], imi, batch, journal)
+            if fit is None:
+                continue
+            fit.update(voltages[index][channel], batch.xyY[k, 2])
+            if (k + 1) % each == 0 and fit.isStable():
+                order = order[:k + 1]
+                print("Predictions are stable after %i measurements."
+                        %(k + 1))
+                break
+        # ranks of the measured voltages in the order of insertfunction
+        batch.restoreOrder(np.argsort(np.argsort(order)))
+        voltages = [voltages[i] for i in sorted(order)]
+        if journal is not None:
+            journal.complete(color)
+
+        if timestamps:
+            return (voltages, batch.xyY, batch.spectra, batch.timestamps)
+        return (voltages, batch.xyY, batch.spectra)
+
+    def _startChannel(self, message, color, journal, unattended=False):
+        if journal is not None and journal.isComplete(color):
+            print("\nMeasurement of %s tubes is complete in the journal."
+                    %color.upper())
+            return
+        if unattended:
+            print("\nMeasurement of %s tubes." %color.upper())
+        else:
+            print(message)
+            while(self.eyeone.I1_KeyPressed() != eNoError):
+                self.wait(0.01)
+        if journal is not None and journal.count(color) > 0:
+            print("Resuming after %i measurements in the journal..."
+                    %journal.count(color))
+        else:
+            print("Starting measurement...")
+
+    def _measureChannel(self, color, imi, n, each, adaptive, target_error,
+            journal, other, stop_tolerance=None, robust=False):
+        # returns (voltages, xyY, spectra, timestamps)
+        if adaptive:
+            measurement = self.measureOneColorChannelAdaptive(color,
+                    imi=imi, n=n, each=each, target_error=target_error,
+                    journal=journal, other=other, timestamps=True)
+        else:
+            measurement = self.measureOneColorChannel(color, imi=imi, n=n,
+                    each=each, journal=journal, other=other,
+                    stop_tolerance=stop_tolerance, timestamps=True)
+        if robust:
+            measurement = self.remeasureOutliers(color, measurement,
+                    imi=imi, journal=journal)
+        return measurement
+
+    def remeasureOutliers(self, color, measurement, imi=0.5, journal=None,
+            threshold=4.0):
+        """
+        Fits the luminance function of *color* robustly to *measurement*
+        (triple (voltages, xyY, spectra) or with timestamps as returned by
+        measureOneColorChannel) and measures every rejected voltage again
+        once. Failed measurements (nan) are always rejected.
+
+        Returns the measurement with the new samples in place of the
+        rejected ones. The new samples are written to the *journal* as
+        channel color + "_remeasured".
+
+        """
+        voltages, xyY, spectra = measurement[:3]
+        channel = ("red", "green", "blue", "all").index(color) % 3
+        x = [voltage[channel] for voltage in voltages]
+        try:
+            popt, pcov, inliers = tubemodel.fitChannelRobust(x, xyY[:, 2],
+                    threshold=threshold)
+        except (RuntimeError, ValueError):
+            print("Robust fit of %s failed, nothing is measured again."
+                    %color)
+            return measurement
+        rejected = np.flatnonzero(~inliers)
+        if len(rejected) == 0:
+            return measurement
+        print("Measuring %i rejected voltages of %s again..."
+                %(len(rejected), color))
+        batch = MeasurementBatch(len(rejected))
+        for index in rejected:
+            self._takeSample(color + "_remeasured", voltages[index], imi,
+                    batch, journal)
+        if journal is not None:
+            journal.complete(color + "_remeasured")
+        xyY = np.array(xyY)
+        spectra = np.array(spectra)
+        xyY[rejected] = batch.xyY
+        spectra[rejected] = batch.spectra
+        if len(measurement) > 3:
+            timestamps = np.array(measurement[3])
+            timestamps[rejected] = batch.timestamps
+            return (voltages, xyY, spectra, timestamps)
+        return (voltages, xyY, spectra)
+
+    def measureBaseline(self, imi=0.5, each=5, journal=None,
+            name="baseline"):
+        """
+        Sets all tubes to self.devtub.off_level and measures them *each*
+        times. Returns a measurement.MeasurementBatch.
+
+        The samples are written to the *journal* (None or
+        journal.CalibrationJournal) as channel *name*.
+
+        """
+        voltage = (self.devtub.off_level,)*3
+        batch = MeasurementBatch(each)
+        for i in range(each):
+            self._takeSample(name, voltage, imi, batch, journal)
+        if journal is not None:
+            journal.complete(name)
+        return batch
+
+    def waitForWarmUp(self, voltage=(0xFFF, 0xFFF, 0xFFF), interval=300.0,
+            imi=0.5, tolerance=0.005, xy_tolerance=0.001, timeout=6*3600.0,
+            callback=None):
+        """
+        Measures *voltage* every *interval* seconds until the tubes are
+        warm (see warmup.WarmUpMonitor) and returns the monitor. Its
+        attribute is_warm is False, if the tubes did not get warm within
+        *timeout* seconds.
+
+        Parameters:
+            voltage: *(0xFFF, 0xFFF, 0xFFF)* or triple
+                reference voltage
+
+            interval: *300.0* or positive float
+                seconds from one measurement to the next
+
+            tolerance, xy_tolerance, callback:
+                see warmup.WarmUpMonitor
+
+        """
+        if not self.eyeone.is_calibrated:
+            self.eyeone.calibrate()
+        monitor = WarmUpMonitor(tolerance=tolerance,
+                xy_tolerance=xy_tolerance, callback=callback)
+        batch = MeasurementBatch(1)
+        start = self.time()
+        print("Waiting until the tubes are warm.")
+        while True:
+            self.measureSample(voltage, imi, batch.tri_stim, batch.spectrum)
+            now = self.time()
+            if monitor.update(now, batch.tri_stim):
+                print("Tubes are warm after %.0f minutes." %((now -
+                    start)/60.0))
+                return monitor
+            if monitor.drift is not None:
+                print("Remaining drift: xy %.5f %.5f, Y %.2f %%"
+                        %(monitor.drift[0], monitor.drift[1],
+                            100*monitor.drift[2]))
+            if now - start + interval > timeout:
+                print("Tubes are NOT warm after %.0f minutes."
+                        %((now - start)/60.0))
+                return monitor
+            self.wait(max(interval - (self.time() - now), 0.0))
+
+    def _takeSample(self, color, voltage, imi, batch, journal=None):
+        # measures voltage and records it in batch or takes it from the
+        # journal, if it was measured there already
+        if journal is not None:
+            sample = journal.nextSample(color, voltage)
+            if sample is not None:
+                batch.add(voltage, sample["xyY"], sample["spectrum"],
+                        sample["timestamp"], sample.get("settling", np.nan))
+                return
+        settling = self.measureSample(voltage, imi, batch.tri_stim,
+                batch.spectrum)
+        index = batch.record(voltage, self.time(), settling)
+        if journal is not None:
+            journal.append(color, voltage, batch.xyY[index],
+                    batch.spectra[index], batch.timestamps[index], settling)
+
+    def channelVoltages(self, color, value, other=0xFFF):
+        """
+        Returns the voltages (r, g, b) to measure *color* ("red", "green",
+        "blue", or "all") with the voltage *value*. The other channels
+        are set to *other*.
+
+        """
+        if color == "red":
+            return (value, other, other)
+        elif color == "green":
+            return (other, value, other)
+        elif color == "blue":
+            return (other, other, value)
+        elif color == "all":
+            return (value, value, value)
+        else:
+            raise ValueError("color must be one of 'red', 'green', 'blue',"
+                    + " 'all' and not %s" %str(color))
+
+    def measureOneColorChannelAdaptive(self, color, imi=0.5, n=50, each=1,
+            n_start=6, target_error=0.1, n_candidates=128, journal=None,
+            other=0xFFF, timestamps=False):
+        """
+        Measures one color of the tubes (red, green, blue, or all) at
+        voltages, which are chosen while measuring (active learning).
+
+            * color -- string one of "red", "green", "blue", "all"
+            * imi -- inter measurement interval in seconds
+            * n -- maximal number of voltages >= n_start
+            * each -- number of measurements per voltage
+            * n_start -- number of evenly spaced voltages measured first
+              (>= 4)
+            * target_error -- stop, when the standard deviation of the
+              predicted luminance is below target_error (cd/m^2) for all
+              voltages
+            * n_candidates -- number of evenly spaced voltages between
+              0x400 and 0xFFF the voltages are chosen from
+            * journal -- *None* or journal.CalibrationJournal, every
+              sample is written to it and samples in it are not measured
+              again
+            * other -- voltage of the other channels
+            * timestamps -- if True, the time of each measurement is
+              returned as fourth element (see measureOneColorChannel)
+
+        After the first n_start voltages the luminance function is fitted
+        to all measurements and the next voltage is the one, where the
+        uncertainty of the fitted parameters (pcov) gives the largest
+        standard deviation of the predicted luminance. If the fit fails,
+        the voltage farthest away from all measured voltages is taken.
+        As the voltages jump between the measurements, use it with
+        self.settling = "adaptive".
+
+        Returns triple (voltages, rgb, spectra) like
+        measureOneColorChannel.
+
+        This function immediately starts measuring. There is no prompt to
+        start measurement.
+
+        """
+        if n_start < 4 or n < n_start:
+            raise ValueError("n_start must be at least 4 and n at least"
+                    + " n_start")
+        self.channelVoltages(color, 0xFFF) # check color
+        if not self.eyeone.is_calibrated:
+            self.eyeone.calibrate()
+
+        candidates = np.unique(np.linspace(0x400, 0xFFF,
+            n_candidates).round().astype(int))
+        measured = np.zeros(len(candidates), dtype=bool)
+        start = np.linspace(0, len(candidates) - 1, n_start).round()
+        next_indices = start.astype(int)[::-1].tolist()
+        p0 = None # starting values from the data
+
+        batch = MeasurementBatch(min(n, len(candidates))*each)
+        voltages = list()
+        channel = ("red", "green", "blue", "all").index(color) % 3
+
+        while True:
+            for index in next_indices:
+                measured[index] = True
+                voltage = self.channelVoltages(color,
+                        int(candidates[index]), other)
+                for j in range(each):
+                    self._takeSample(color, voltage, imi, batch, journal)
+                    voltages.append(voltage)
+            if np.sum(measured) >= n or np.all(measured):
+                break
+
+            try:
+                popt, pcov = tubemodel.fitChannel(
+                        batch.voltages[:, channel], batch.xyY[:, 2], p0)
+                sd = tubemodel.predictionSd(candidates, popt, pcov)
+                if not np.all(np.isfinite(sd)):
+                    raise RuntimeError("parameters are not identifiable")
+                p0 = popt
+            except (RuntimeError, ValueError):
+                sd = None
+            if sd is not None and np.max(sd) < target_error:
+                break
+
+            if sd is None:
+                score = np.min(np.abs(candidates[:, np.newaxis] -
+                    candidates[measured]), axis=1).astype(float)
+            else:
+                score = sd.copy()
+            score[measured] = -1.0
+            next_indices = [int(np.argmax(score))]
+
+        if journal is not None:
+            journal.complete(color)
+        if timestamps:
+            return (voltages, batch.xyY, batch.spectra, batch.timestamps)
+        return (voltages, batch.xyY, batch.spectra)
+
+    def measureSample(self, voltage, imi, tri_stim, spectrum):
+        """
+        Sets the tubes to *voltage*, waits until the light is stable, and
+        measures it. The results are written into the ctypes arrays
+        *tri_stim* and *spectrum*. If the measurement fails, they are set
+        to nan.
+
+        If self.settling is "fixed", it waits *imi* seconds before the
+        measurement. If self.settling is "adaptive", it measures every
+        self.settle_interval seconds and takes the first reading that
+        agrees with the reading before within self.settle_tolerance
+        (relative) or self.settle_absolute, but waits at most
+        self.settle_timeout seconds. The settling time is returned and
+        appended to self.settling_times.
+
+        """
+        self.setVoltages(voltage)
+        print(voltage)
+        if self.settling == "adaptive":
+            # settle leaves the accepted reading in tri_stim
+            settling, valid = self.settle(voltage, tri_stim, spectrum)
+        elif self.settling == "fixed":
+            self.wait(imi) # to give the i1 Pro time to adapt and to
+                           # reduce carry-over effects
+            valid = (self.eyeone.I1_TriggerMeasurement() == eNoError)
+            if not valid:
                 print("Measurement failed for voltage %s ." %str(voltage))
+            settling = imi
+            if valid:
+                valid = self.readTriStimulus(voltage, tri_stim, spectrum)
+        else:
+            raise ValueError("settling must be one of 'fixed' or"
+                    + " 'adaptive' and not %s" %str(self.settling))
+        if valid and self.tristimulus == "device":
+            if(self.eyeone.I1_GetSpectrum(spectrum, 0) != eNoError):
+                print("Failed to get spectrum for voltage %s ."
+                        %str(voltage))
+                valid = False
+        if not valid:
+            # do not keep the results of the last measurement
+            for i in range(len(tri_stim)):
+                tri_stim[i] = float("nan")
+            for i in range(len(spectrum)):
+                spectrum[i] = float("nan")
+        self.settling_times.append(settling)
+        return settling
+
+    def readTriStimulus(self, voltage, tri_stim, spectrum):
+        """
+        Reads xyY of the last measurement into *tri_stim* and returns True
+        on success.
+
+        If self.tristimulus is "device", xyY is read from the i1 Pro. If
+        it is "spectrum", only the spectrum is read into *spectrum* and
+        xyY is computed from it with self.observer and
+        self.spectrum_scale.
+
+        """
+        if self.tristimulus == "device":
             if(self.eyeone.I1_GetTriStimulus(tri_stim, 0) != eNoError):
                 print("Failed to get tristim for voltage %s ."
                         %str(voltage))
-            rgb_list.append(list(tri_stim))
+                return False
+            return True
+        elif self.tristimulus == "spectrum":
             if(self.eyeone.I1_GetSpectrum(spectrum, 0) != eNoError):
                 print("Failed to get spectrum for voltage %s ."
                         %str(voltage))
-            spectra_list.append(list(spectrum))
+                return False
+            xyY = colorimetry.spectrumToxyY(spectrum[:], self.observer,
+                    self.spectrum_scale)
+            for i in range(3):
+                tri_stim[i] = xyY[i]
+            return True
+        raise ValueError("tristimulus must be one of 'device' or"
+                + " 'spectrum' and not %s" %str(self.tristimulus))
+
+    def settle(self, voltage, tri_stim, spectrum):
+        """
+        Measures repeatedly until two consecutive readings of Y agree and
+        returns the settling time in seconds (until the accepted reading
+        was read out) and whether the last measurement succeeded. The last
+        reading is in *tri_stim* (see readTriStimulus), the spectrum of the
+        last measurement stays in the i1 Pro and can be read out
+        afterwards.
 
-        return (voltages, rgb_list, spectra_list)
+        """
+        start = self.devtub.clock()
+        last_Y = None
+        while True:
+            self.wait(self.settle_interval)
+            measured = (self.eyeone.I1_TriggerMeasurement() == eNoError)
+            if not measured:
+                print("Measurement failed for voltage %s ." %str(voltage))
+            else:
+                measured = self.readTriStimulus(voltage, tri_stim, spectrum)
+            elapsed = self.devtub.clock() - start
+            if not measured:
+                last_Y = None
+            else:
+                Y = tri_stim[2]
+                if last_Y is not None and abs(Y - last_Y) <= max(
+                        self.settle_tolerance*abs(last_Y),
+                        self.settle_absolute):
+                    return (elapsed, True)
+                last_Y = Y
+            if elapsed >= self.settle_timeout:
+                print("Light did not settle for voltage %s ."
+                        %str(voltage))
+                return (elapsed, last_Y is not None)
 
     def saveParameter(self, filename="./lastParameterTubes.pkl"):
         """
@@ -538,6 +1330,24 @@ class CalibTubes(Tubes):
             pickle.dump(self.blue_p1, f)
             pickle.dump(self.blue_p2, f)
             pickle.dump(self.blue_p3, f)
+            pickle.dump(self.primaries, f)
+            if self.color_model is None:
+                pickle.dump(None, f)
+            else:
+                pickle.dump(self.color_model.coefficients, f)
+            if self.splines is None:
+                pickle.dump(None, f)
+            else:
+                pickle.dump([(spline.knots_x, spline.knots_y) for spline in
+                    self.splines], f)
+            if self.color_model is None:
+                pickle.dump(None, f)
+            else:
+                pickle.dump(self.color_model.interaction, f)
+            pickle.dump(self.calibration_time, f)
+            pickle.dump(self.calibration_hours, f)
+            pickle.dump(self.baseline_xyY, f)
+            pickle.dump(self.baseline_spectrum, f)
 
     def loadParameter(self, filename="./lastParameterTubes.pkl"):
         """
@@ -555,6 +1365,41 @@ class CalibTubes(Tubes):
             self.blue_p1  = pickle.load(f)
             self.blue_p2  = pickle.load(f)
             self.blue_p3  = pickle.load(f)
+            self.primaries = None
+            coefficients = None
+            knots = None
+            interaction = None
+            # files without the time of the calibration are as old as
+            # their last modification
+            self.calibration_time = os.path.getmtime(filename)
+            self.calibration_hours = None
+            self.baseline_xyY = None
+            self.baseline_spectrum = None
+            try:
+                self.primaries = pickle.load(f)
+                coefficients = pickle.load(f)
+                knots = pickle.load(f)
+                interaction = pickle.load(f)
+                self.calibration_time = pickle.load(f)
+                self.calibration_hours = pickle.load(f)
+                self.baseline_xyY = pickle.load(f)
+                self.baseline_spectrum = pickle.load(f)
+            except (EOFError, KeyError, ValueError,
+                    pickle.UnpicklingError):
+                # saved before the primaries, the color model, the splines,
+                # the interaction, the time, the operating hours, or the
+                # baseline were saved (older files can end with bytes,
+                # which are no pickle)
+                pass
+        self.drift_model = None
+        self.color_lut = None # of the color model before
+        self.splines = None
+        if knots is not None:
+            self.splines = [tubemodel.MonotoneSpline(x, y) for x, y in knots]
+        self.color_model = None
+        if coefficients is not None:
+            self.color_model = tubemodel.ColorModel(self.channelModels(),
+                    coefficients, self.baseline_xyY, interaction=interaction)
         self.is_calibrated = True
 
 
@@ -575,22 +1420,78 @@ class CalibTubes(Tubes):
         Y is target luminance of monitor. The individual color for each
         channel is taken from an old calibration that looked good and
         assumes that the ratio of red, green, and blue is constant for
-        different intensities. This is of course very crude!
+        different intensities. This is of course very crude! Use
+        guessVoltagesBatch for target colors in xyY.
 
         """
         Y_r = 6.173447/(6.173447+22.92364+4.036948)*Y
         Y_g = 22.92364/(6.173447+22.92364+4.036948)*Y
         Y_b = 4.036948/(6.173447+22.92364+4.036948)*Y
 
-        def inv(y, a, b, c):
-            y = np.array(y)
-            return -np.log((y - a)/(b - a))/np.exp(c)
-
-        vol_r = inv(Y_r, self.red_p1, self.red_p2, self.red_p3)
-        vol_g = inv(Y_g, self.green_p1, self.green_p2, self.green_p3)
-        vol_b = inv(Y_b, self.blue_p1, self.blue_p2, self.blue_p3)
+        red, green, blue = self.channelModels()
+        vol_r = red.inverse(Y_r)
+        vol_g = green.inverse(Y_g)
+        vol_b = blue.inverse(Y_b)
 
-        voltages = ( int(vol_r), int(vol_g), int(vol_b) )
+        voltages = (int(round(vol_r)), int(round(vol_g)), int(round(vol_b)))
 
         return voltages
 
+    def guessVoltagesBatch(self, xyY):
+        """
+        Returns the voltages for the target colors *xyY* (array of shape
+        (N, 3)) as integer array of shape (N, 3) and a boolean array of
+        length N, which is False for targets out of the range of the
+        tubes (their voltages are clipped).
+
+        Uses self.color_lut (see buildLookupTable), if there is one, then
+        self.color_model (see tubemodel.ColorModel.inverse), and otherwise
+        the primaries of the tubes (see tubemodel.targetVoltages) from
+        calibrate or loadParameter. After checkDrift the voltages of the
+        lookup table are refined with the color model corrected for the
+        drift (see currentColorModel).
+
+        """
+        if self.color_lut is not None and self.drift_model is None:
+            return self.color_lut.inverse(xyY)
+        color_model = self.currentColorModel()
+        if self.color_lut is not None and color_model is not None:
+            start, distances = self.color_lut.lookup(xyY)
+            return color_model.inverse(xyY, start=start)
+        if color_model is not None:
+            return color_model.inverse(xyY)
+        if self.primaries is None:
+            raise ValueError("primaries of the tubes are unknown, calibrate"
+                    + " the tubes first")
+        return tubemodel.targetVoltages(xyY, self.channelModels(),
+                self.primaries, baseline_xyY=self.baseline_xyY)
+
+    def buildLookupTable(self, step=64, filename=None):
+        """
+        Builds self.color_lut from self.color_model on a grid with every
+        *step* voltages and saves it to *filename* (None or str), see
+        colorlut.ColorLookupTable.
+
+        """
+        if self.color_model is None:
+            raise ValueError("color model of the tubes is unknown,"
+                    + " calibrate the tubes first")
+        self.color_lut = ColorLookupTable.fromModel(self.color_model,
+                step=step)
+        if filename is not None:
+            self.color_lut.save(filename)
+
+    def loadLookupTable(self, filename):
+        """
+        Loads self.color_lut saved with buildLookupTable. The lookups are
+        refined with self.color_model, if there is one.
+
+        """
+        self.color_lut = ColorLookupTable.load(filename,
+                model=self.color_model)
+
+
+def _parameters(popt):
+    # parameters of a luminance function as floats (or None)
+    return tuple(None if p is None else float(p) for p in popt)
+
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./colorimetry.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) CMF_1931, CMF_1964
+#          (2) spectrumToXYZ
+#          (3) spectrumToxyY
+#          (4) spectrumScale
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module computes XYZ and xyY from the spectra measured with the i1 Pro
+(36 bands from 380 to 730 nm in steps of 10 nm). It contains the colour
+matching functions of the CIE 1931 2° and the CIE 1964 10° standard
+observer at these wavelengths.
+
+All functions work on a single spectrum or on an array with one spectrum
+per row.
+
+Example:
+
+>>> spectrum = np.zeros(36)
+>>> spectrum[WAVELENGTHS == 550] = 0.01 # W/(sr m^2 nm)
+>>> print("%.4f %.4f %.2f" % tuple(spectrumToxyY(spectrum)))
+0.3016 0.6923 67.96
+
+"""
+
+import numpy as np
+
+from convert import XYZ2xyY
+
+# wavelengths of the 36 bands of the i1 Pro in nm
+WAVELENGTHS = np.arange(380, 731, 10)
+
+# maximal luminous efficacy in lm/W
+K_M = 683.0
+
+# CIE 1931 2° colour matching functions x, y, z from 380 to 730 nm
+CMF_1931 = np.array([
+    [0.001368, 0.000039, 0.006450],
+    [0.004243, 0.000120, 0.020050],
+    [0.014310, 0.000396, 0.067850],
+    [0.043510, 0.001210, 0.207400],
+    [0.134380, 0.004000, 0.645600],
+    [0.283900, 0.011600, 1.385600],
+    [0.348280, 0.023000, 1.747060],
+    [0.336200, 0.038000, 1.772110],
+    [0.290800, 0.060000, 1.669200],
+    [0.195360, 0.090980, 1.287640],
+    [0.095640, 0.139020, 0.812950],
+    [0.032010, 0.208020, 0.465180],
+    [0.004900, 0.323000, 0.272000],
+    [0.009300, 0.503000, 0.158200],
+    [0.063270, 0.710000, 0.078250],
+    [0.165500, 0.862000, 0.042160],
+    [0.290400, 0.954000, 0.020300],
+    [0.433450, 0.994950, 0.008750],
+    [0.594500, 0.995000, 0.003900],
+    [0.762100, 0.952000, 0.002100],
+    [0.916300, 0.870000, 0.001650],
+    [1.026300, 0.757000, 0.001100],
+    [1.062200, 0.631000, 0.000800],
+    [1.002600, 0.503000, 0.000340],
+    [0.854450, 0.381000, 0.000190],
+    [0.642400, 0.265000, 0.000050],
+    [0.447900, 0.175000, 0.000020],
+    [0.283500, 0.107000, 0.000000],
+    [0.164900, 0.061000, 0.000000],
+    [0.087400, 0.032000, 0.000000],
+    [0.046770, 0.017000, 0.000000],
+    [0.022700, 0.008210, 0.000000],
+    [0.011359, 0.004102, 0.000000],
+    [0.005790, 0.002091, 0.000000],
+    [0.002899, 0.001047, 0.000000],
+    [0.001440, 0.000520, 0.000000]])
+
+# CIE 1964 10° colour matching functions x, y, z from 380 to 730 nm
+CMF_1964 = np.array([
+    [0.000160, 0.000017, 0.000705],
+    [0.002362, 0.000253, 0.010482],
+    [0.019110, 0.002004, 0.086011],
+    [0.084736, 0.008756, 0.389366],
+    [0.204492, 0.021391, 0.972542],
+    [0.314679, 0.038676, 1.553480],
+    [0.383734, 0.062077, 1.967280],
+    [0.370702, 0.089456, 1.994800],
+    [0.302273, 0.128201, 1.745370],
+    [0.195618, 0.185190, 1.317560],
+    [0.080507, 0.253589, 0.772125],
+    [0.016172, 0.339133, 0.415254],
+    [0.003816, 0.460777, 0.218502],
+    [0.037465, 0.606741, 0.112044],
+    [0.117749, 0.761757, 0.060709],
+    [0.236491, 0.875211, 0.030451],
+    [0.376772, 0.961988, 0.013676],
+    [0.529826, 0.991761, 0.003988],
+    [0.705224, 0.997340, 0.000000],
+    [0.878655, 0.955552, 0.000000],
+    [1.014160, 0.868934, 0.000000],
+    [1.118520, 0.777405, 0.000000],
+    [1.123990, 0.658341, 0.000000],
+    [1.030480, 0.527963, 0.000000],
+    [0.856297, 0.398057, 0.000000],
+    [0.647467, 0.283493, 0.000000],
+    [0.431567, 0.179828, 0.000000],
+    [0.268329, 0.107633, 0.000000],
+    [0.152568, 0.060281, 0.000000],
+    [0.081261, 0.031800, 0.000000],
+    [0.040851, 0.015905, 0.000000],
+    [0.019941, 0.007749, 0.000000],
+    [0.009577, 0.003718, 0.000000],
+    [0.004553, 0.001768, 0.000000],
+    [0.002175, 0.000846, 0.000000],
+    [0.001045, 0.000407, 0.000000]])
+
+OBSERVERS = {"1931": CMF_1931, "1964": CMF_1964}
+
+
+def _cmf(observer):
+    try:
+        return OBSERVERS[str(observer)]
+    except KeyError:
+        raise ValueError("observer must be one of '1931' or '1964' and not"
+                + " %s" %str(observer))
+
+
+def spectrumToXYZ(spectra, observer="1931", scale=K_M):
+    """
+    Returns XYZ of the spectra (array of shape (..., 36)).
+
+    Parameters:
+        spectra: array of shape (..., 36)
+            spectral radiance of the 36 bands from 380 to 730 nm
+
+        observer: *"1931"* or "1964"
+            CIE 1931 2° or CIE 1964 10° standard observer
+
+        scale: *683.0* or float
+            factor that converts the integrated spectrum to XYZ; 683 lm/W
+            gives cd/m^2 for spectra in W/(sr m^2 nm)
+
+    """
+    spectra = np.asarray(spectra, dtype=float)
+    return np.dot(spectra, _cmf(observer)) * (scale * 10.0)
+
+
+def spectrumToxyY(spectra, observer="1931", scale=K_M):
+    """
+    Returns xyY of the spectra (array of shape (..., 36)). The parameters
+    are the same as for spectrumToXYZ.
+
+    """
+    return XYZ2xyY(spectrumToXYZ(spectra, observer, scale))
+
+
+def spectrumScale(spectra, Y, observer="1931"):
+    """
+    Returns the factor *scale* for spectrumToXYZ, which fits the
+    luminances *Y* of the spectra best (least squares). Use it to check
+    the units of the spectra with measurements of the tristimulus values.
+
+    """
+    unscaled = spectrumToXYZ(spectra, observer, scale=1.0)[..., 1].ravel()
+    Y = np.asarray(Y, dtype=float).ravel()
+    return float(np.dot(unscaled, Y) / np.dot(unscaled, unscaled))
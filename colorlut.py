@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./colorlut.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) ColorLookupTable
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module provides the class ColorLookupTable, a table of the colors of
+the tubes on a grid of voltages. The colors are indexed with a KD-tree in
+CIELAB, so that the voltages for thousands of target colors are found by
+nearest-neighbour lookups and, if the table knows the tubemodel.ColorModel
+it was built from, a few Newton steps.
+
+Example:
+
+>>> from tubemodel import ColorModel
+>>> model = ColorModel([(67.8, -6.7, -9.0), (138.7, -16.4, -8.9),
+...                     (58.2, -2.7, -9.8)],
+...                    [[[1.8], [0.0]], [[0.45], [0.05]], [[4.7], [27.0]]])
+>>> lut = ColorLookupTable.fromModel(model, step=256)
+>>> len(lut)
+2197
+>>> voltages, feasible = lut.inverse(model.xyY([(2000, 2500, 1500)]))
+>>> voltages.tolist(), feasible.tolist()
+([[2000, 2500, 1500]], [True])
+
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from convert import xyY2XYZ, XYZ2Lab
+
+
+class ColorLookupTable(object):
+    """
+    Colors (XYZ) of the tubes for a grid of voltages with a KD-tree index
+    in CIELAB relative to the brightest color of the table.
+
+    Attributes:
+        voltages: array of shape (N, 3) of uint16
+            voltages of the table
+
+        XYZ: array of shape (N, 3) of float32
+            colors of the voltages
+
+        white_XYZ: array of 3 floats
+            white of CIELAB
+
+        model: None or tubemodel.ColorModel
+            model, which refines the voltages of lookups
+
+    """
+    def __init__(self, voltages, XYZ, white_XYZ=None, model=None):
+        """
+        Parameters:
+            voltages: array of shape (N, 3)
+                voltages of the table
+
+            XYZ: array of shape (N, 3)
+                colors of the voltages; rows with nan are left out
+
+            white_XYZ: *None* or triple
+                white of CIELAB, by default the color with the highest
+                luminance in the table
+
+            model: *None* or tubemodel.ColorModel
+                model, which refines the voltages of lookups
+
+        """
+        voltages = np.asarray(voltages)
+        XYZ = np.asarray(XYZ, dtype=float)
+        valid = np.all(np.isfinite(XYZ), axis=1)
+        self.voltages = voltages[valid].astype(np.uint16)
+        self.XYZ = XYZ[valid].astype(np.float32)
+        if white_XYZ is None:
+            white_XYZ = self.XYZ[np.argmax(self.XYZ[:, 1])]
+        self.white_XYZ = np.asarray(white_XYZ, dtype=float)
+        self.model = model
+        self.tree = cKDTree(XYZ2Lab(self.XYZ, self.white_XYZ))
+
+    def __len__(self):
+        return len(self.voltages)
+
+    @classmethod
+    def fromModel(cls, model, step=64):
+        """
+        Returns the table of a tubemodel.ColorModel on a grid, which has
+        every *step* voltages from model.low to model.high (including
+        model.high) for every channel.
+
+        """
+        levels = np.unique(np.append(np.arange(model.low, model.high, step),
+            model.high))
+        grid = np.array(np.meshgrid(levels, levels, levels,
+            indexing="ij")).reshape(3, -1).T
+        return cls(grid, model.XYZ(grid), model=model)
+
+    @classmethod
+    def fromMeasurements(cls, voltages, xyY, model=None):
+        """
+        Returns the table of measured colors *xyY* (shape (N, 3)) at
+        *voltages* (shape (N, 3)). Failed measurements (nan) are left out.
+
+        """
+        return cls(voltages, xyY2XYZ(xyY), model=model)
+
+    def lookup(self, xyY, k=1):
+        """
+        Returns the voltages of the colors in the table, which are nearest
+        to the target colors *xyY* (shape (N, 3)) in CIELAB, as integer
+        array of shape (N, 3) and their distances (delta E) as array of
+        length N.
+
+        If *k* > 1, the voltages of the k nearest colors are averaged
+        with weights inverse to their distances.
+
+        """
+        Lab = XYZ2Lab(np.atleast_2d(xyY2XYZ(xyY)), self.white_XYZ)
+        distances, indices = self.tree.query(Lab, k=k)
+        if k == 1:
+            return (self.voltages[indices].astype(int), distances)
+        weights = 1.0/np.maximum(distances, 1e-9)
+        weights /= weights.sum(axis=1)[:, np.newaxis]
+        voltages = np.sum(self.voltages[indices]*weights[:, :, np.newaxis],
+                axis=1)
+        return (np.round(voltages).astype(int), distances[:, 0])
+
+    def inverse(self, xyY, max_distance=2.0):
+        """
+        Returns the voltages for the target colors *xyY* (shape (N, 3)) as
+        integer array of shape (N, 3) and a boolean array of length N,
+        which is False for targets the tubes can not produce.
+
+        With a model the nearest voltages of the table are refined with
+        ColorModel.inverse, otherwise the voltages of the 4 nearest
+        colors are averaged and targets further than *max_distance*
+        (delta E) from the table count as not produced.
+
+        """
+        if self.model is not None:
+            start, distances = self.lookup(xyY)
+            return self.model.inverse(xyY, start=start)
+        voltages, distances = self.lookup(xyY, k=min(4, len(self)))
+        return (voltages, distances <= max_distance)
+
+    def save(self, filename):
+        """
+        Saves the table (without the model) to *filename* (numpy .npz).
+
+        """
+        np.savez_compressed(filename, voltages=self.voltages, XYZ=self.XYZ,
+                white_XYZ=self.white_XYZ)
+
+    @classmethod
+    def load(cls, filename, model=None):
+        """
+        Loads a table saved with save. The *model* (None or
+        tubemodel.ColorModel) refines the lookups.
+
+        """
+        data = np.load(filename)
+        return cls(data["voltages"], data["XYZ"], data["white_XYZ"],
+                model=model)
@@ -9,6 +9,9 @@
 #
 # content: (1) class Convert
 #          (2) function xyY2rgb
+#          (3) function xyY2XYZ
+#          (4) function XYZ2xyY
+#          (5) function XYZ2Lab
 #
 # input: --
 # output: --
@@ -119,3 +122,52 @@ def xyY2rgb(xyY):
     convert = Convert()
     return convert.convertXyYToRgb(xyY)
 
+def xyY2XYZ(xyY):
+    """
+    Converts xyY coordinates to XYZ. Works on arrays of shape (..., 3). If
+    y is 0, XYZ is 0 like in Convert.convertXyYToXyz.
+
+    >>> xyY2XYZ([[0.25, 0.5, 10.0], [0.3, 0.0, 5.0]]).tolist()
+    [[5.0, 10.0, 5.0], [0.0, 0.0, 0.0]]
+
+    """
+    xyY = np.asarray(xyY, dtype=float)
+    x, y, Y = xyY[..., 0], xyY[..., 1], xyY[..., 2]
+    valid = y != 0
+    scale = np.where(valid, Y, 0.0)/np.where(valid, y, 1.0)
+    return np.stack((x*scale, np.where(valid, Y, 0.0), (1.0 - x - y)*scale),
+            axis=-1)
+
+def XYZ2xyY(XYZ):
+    """
+    Converts XYZ coordinates to xyY. Works on arrays of shape (..., 3). If
+    X + Y + Z is not positive, x and y are nan.
+
+    >>> XYZ2xyY([5.0, 10.0, 5.0]).tolist()
+    [0.25, 0.5, 10.0]
+
+    """
+    XYZ = np.asarray(XYZ, dtype=float)
+    total = XYZ.sum(axis=-1)
+    with np.errstate(invalid="ignore"):
+        valid = total > 0
+    total = np.where(valid, total, np.nan)
+    return np.stack((XYZ[..., 0]/total, XYZ[..., 1]/total, XYZ[..., 1]),
+            axis=-1)
+
+def XYZ2Lab(XYZ, white_XYZ):
+    """
+    Converts XYZ coordinates to CIELAB relative to the white *white_XYZ*.
+    Works on arrays of shape (..., 3).
+
+    >>> [round(v, 4) for v in XYZ2Lab([50.0, 50.0, 50.0], [100.0, 100.0,
+    ...     100.0]).tolist()]
+    [76.0693, 0.0, 0.0]
+
+    """
+    ratios = np.asarray(XYZ, dtype=float)/np.asarray(white_XYZ, dtype=float)
+    delta = 6.0/29
+    f = np.where(ratios > delta**3, np.cbrt(ratios),
+            ratios/(3*delta**2) + 4.0/29)
+    return np.stack((116.0*f[..., 1] - 16.0, 500.0*(f[..., 0] - f[..., 1]),
+        200.0*(f[..., 1] - f[..., 2])), axis=-1)
@@ -22,27 +22,61 @@ from wasco.wasco import Wasco
 from wasco.constants import DAOUT2, DAOUT3, DAOUT4
 import time
 
+import ramp
+from simwasco import VirtualClock, SimulatedWasco
+
+# high resolution clock for the deadlines of the ramps
+if hasattr(time, "perf_counter"):
+    default_clock = time.perf_counter
+elif sys.platform == "win32":
+    default_clock = time.clock
+else:
+    default_clock = time.time
 
 class DevTubes(object):
     """
     Encapsulates all functions controlling fluorescent tubes in the booth.
     It provides all low level functionality.
 
+    Voltages are changed along a ramp, whose speed is limited by
+    self.slew_rate (DAC counts per millisecond) and whose shape is given by
+    self.ramp_profile ("linear" or "s-curve").
+
     Example:
 
     >>> devtub = DevTubes(dummy=True)
     >>> devtub.setVoltages((1000, 1000, 1000))
+    >>> devtub.last_ramp[-1].tolist()
+    [1000, 1000, 1000]
+
+    Simulated without any hardware and without sleeping:
+
+    >>> devtub = DevTubes(simulate=True)
+    >>> devtub.setVoltages((0x400, 0xFFF, 0xFFF))
+    >>> devtub.wascocard.finalValue(devtub.red_out)
+    1024
+    >>> devtub.wascocard.maxSlewRate(devtub.red_out) <= devtub.slew_rate
+    True
 
     """
-    def __init__(self, dummy=False):
+    def __init__(self, dummy=False, simulate=False):
         """
         Setting some "global" variables.
 
         If dummy=True no wasco runtime libraries will be loaded.
 
+        If simulate=True a simwasco.SimulatedWasco with a virtual clock is
+        used instead of the wasco card. Nothing sleeps for real and all
+        writes are recorded in self.wascocard.timeline.
+
         """
 
-        self.wascocard = Wasco(dummy=dummy)    # create wasco object
+        if simulate:
+            self.virtual_clock = VirtualClock()
+            self.wascocard = SimulatedWasco(self.virtual_clock)
+        else:
+            self.virtual_clock = None
+            self.wascocard = Wasco(dummy=dummy)    # create wasco object
         self.wasco_boardId = self.wascocard.boardId
 
         self.red_out = DAOUT3
@@ -51,18 +85,45 @@ class DevTubes(object):
         self.low_threshold = 0x200 # min voltages must be integer
         self.low_warning = 0x400 # low warning voltages must be integer
         self.high_threshold = 0xFFF # max voltages must be integer
+        self.off_level = self.low_threshold # voltage to switch a channel
+                                            # off, no warning is printed
 
         # voltage which is set at the moment
         self.U_r = self.high_threshold
         self.U_b = self.high_threshold
         self.U_g = self.high_threshold
 
+        # speed and shape of the voltage ramps
+        self.slew_rate = 5.0 # max change in DAC counts per millisecond
+        self.max_step = 5 # max change in DAC counts per step
+        self.ramp_profile = "linear" # "linear" or "s-curve"
+
+        # clock and sleep function used to keep the deadlines of a ramp
+        self.clock = default_clock
+        self.sleep = time.sleep
+        self.spin_time = 0.002 # wait the last seconds busy for precision
+        self.spin_fraction = 0.1 # but at most this part of a ramp step
+        if simulate:
+            self.clock = self.virtual_clock.time
+            self.sleep = self.virtual_clock.sleep
+            self.spin_time = 0.0
+
+        # ramp which was written by the last call of setVoltages
+        self.last_ramp = ramp.computeRamp((self.U_r, self.U_g, self.U_b),
+                (self.U_r, self.U_g, self.U_b), 0)
+        self.last_ramp_times = ramp.rampTimes(self.last_ramp,
+                (self.U_r, self.U_g, self.U_b), self.slew_rate)
 
-    def setVoltages(self, U_rgb):
+    def setVoltages(self, U_rgb, abort=None):
         """
         Sets voltage in list or tuple of U_rgb to wasco card. U_rgb should
         contain three integers between self.low_threshold and
-        self.high_threshold.
+        self.high_threshold. Channels set below self.low_warning print a
+        warning unless they are set to self.off_level.
+
+        self.U_r, self.U_g, self.U_b always hold the voltages which were
+        written last. If *abort* (threading.Event) is given and set while
+        the ramp is running, the ramp stops at these voltages.
 
         """
         #set the wasco-card stepwise to the right voltage
@@ -71,13 +132,13 @@ class DevTubes(object):
         U_b_new = int(U_rgb[2])
 
         # warning
-        if U_r_new < self.low_warning:
+        if U_r_new < self.low_warning and U_r_new != self.off_level:
             print("WARNING: red channel is below recommended range (" +
                     str(self.low_warning) +")", file=sys.stderr)
-        if U_g_new < self.low_warning:
+        if U_g_new < self.low_warning and U_g_new != self.off_level:
             print("WARNING: green channel is below recommended range (" +
                     str(self.low_warning) +")", file=sys.stderr)
-        if U_b_new < self.low_warning:
+        if U_b_new < self.low_warning and U_b_new != self.off_level:
             print("WARNING: blue channel is below recommended range (" +
                     str(self.low_warning) +")", file=sys.stderr)
 
@@ -107,30 +168,95 @@ class DevTubes(object):
                     +")", file=sys.stderr)
             U_b_new = self.high_threshold
 
-        diff_r = U_r_new - self.U_r
-        diff_g = U_g_new - self.U_g
-        diff_b = U_b_new - self.U_b
+        start = (self.U_r, self.U_g, self.U_b)
+        stop = (U_r_new, U_g_new, U_b_new)
+        (self.last_ramp_times, self.last_ramp) = self.computeRamp(start,
+                stop)
+        self.playRamp(self.last_ramp, start, self.last_ramp_times, abort)
+        return
 
-        steps = max( abs(diff_r), abs(diff_g), abs(diff_b))
-        steps = int(steps*0.2)
+    def computeRamp(self, start, stop):
+        """
+        Returns the tuple (times, ramp) to get from the voltages *start* to
+        *stop*. ramp is an integer array with one row per step and the
+        columns red, green, blue; times contains the time in seconds after
+        the start of the ramp at which each row has to be written.
 
-        if steps == 0:
-            return
+        The ramp follows self.ramp_profile, no channel changes more than
+        self.max_step counts per step and faster than self.slew_rate
+        counts per millisecond.
 
-        slope_r = diff_r/float(steps)
-        slope_g = diff_g/float(steps)
-        slope_b = diff_b/float(steps)
-
-        for i in range(steps):
-            time.sleep(0.0001)
-            self.wascocard.wasco_outportW(self.wasco_boardId,
-                    self.red_out, int(self.U_r + slope_r*i))
-            self.wascocard.wasco_outportW(self.wasco_boardId,
-                    self.green_out, int(self.U_g + slope_g*i))
-            self.wascocard.wasco_outportW(self.wasco_boardId,
-                    self.blue_out, int(self.U_b + slope_b*i))
-        self.U_r = U_r_new
-        self.U_g = U_g_new
-        self.U_b = U_b_new
-        return
+        """
+        steps = ramp.rampSteps(start, stop, self.max_step,
+                self.ramp_profile)
+        ramp_array = ramp.computeRamp(start, stop, steps, self.ramp_profile)
+        return (ramp.rampTimes(ramp_array, start, self.slew_rate),
+                ramp_array)
 
+    def playRamp(self, ramp_array, start, times, abort=None):
+        """
+        Writes the ramp *ramp_array* step by step to the wasco card. Each
+        step is written at its deadline in *times* (seconds after the start
+        of the ramp), so that delays do not add up over the ramp.
+
+        Only the channels that changed since the last step are written.
+        All writes are prepared before the first value is sent to the card.
+        After each step self.U_r, self.U_g, self.U_b are updated.
+
+        Returns the number of steps written, which is smaller than the
+        length of the ramp, if *abort* (threading.Event) was set.
+
+        """
+        ports = (self.red_out, self.green_out, self.blue_out)
+        changed = ramp.changedMask(ramp_array, start).tolist()
+        rows = ramp_array.tolist()
+        writes = [[(port, value) for port, value, is_changed in
+                    zip(ports, row, row_changed) if is_changed]
+                for row, row_changed in zip(rows, changed)]
+        outport = self.wascocard.wasco_outportW
+        board_id = self.wasco_boardId
+        spin_time = self.spin_time
+        if len(times) > 1:
+            spin_time = min(spin_time, self.spin_fraction*(times[-1] -
+                times[0])/(len(times) - 1))
+        start_time = self.clock()
+        steps_written = 0
+        for deadline, row, step_writes in zip(
+                (start_time + times).tolist(), rows, writes):
+            self.waitUntil(deadline, spin_time)
+            if abort is not None and abort.is_set():
+                break
+            for port, value in step_writes:
+                outport(board_id, port, value)
+            (self.U_r, self.U_g, self.U_b) = row
+            steps_written += 1
+        return steps_written
+
+    def waitUntil(self, deadline, spin_time=None):
+        """
+        Waits until self.clock() reaches *deadline*.
+
+        Sleeps for most of the time and waits busy for the last
+        *spin_time* (default self.spin_time) seconds, because sleep is not
+        precise enough on most operating systems. If the spin time is 0,
+        it only sleeps.
+
+        playRamp waits busy for at most self.spin_fraction of the mean
+        interval between the steps. With the default ramp (a step every
+        millisecond) the ramp mostly sleeps, instead of keeping a CPU busy
+        and holding the GIL, while it runs in a background thread (see
+        tubes.Tubes.setVoltagesAsync). A sleep, which overshoots a
+        deadline, does not delay the following steps.
+
+        """
+        if spin_time is None:
+            spin_time = self.spin_time
+        remaining = deadline - self.clock()
+        if spin_time <= 0:
+            if remaining > 0:
+                self.sleep(remaining)
+            return
+        if remaining > spin_time:
+            self.sleep(remaining - spin_time)
+        while self.clock() < deadline:
+            pass
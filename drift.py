@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./drift.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) fitGainOffset
+#          (2) CorrectedChannel
+#          (3) DriftModel
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module corrects the calibration of the tubes for their drift over
+days. A short reference check measures every channel at a few voltages
+and compares the luminances with the calibrated model; the deviation is a
+gain and an offset per channel. DriftModel collects the checks and
+predicts gain and offset as linear functions of the days (and the
+operating hours) since the calibration, so that a check every few days
+replaces most full calibrations.
+
+Example:
+
+>>> from tubemodel import LuminanceFunction
+>>> drift = DriftModel(calibration_time=0.0)
+>>> drift.addCheck(10*86400.0, gain=(0.98, 0.99, 0.97), offset=(0, 0, 0))
+>>> gain, offset = drift.correction(5*86400.0)
+>>> print("%.3f %.3f %.3f" % tuple(gain))
+0.990 0.995 0.985
+>>> red = drift.correct([LuminanceFunction(67.8, -6.7, -9.0)]*3,
+...                     20*86400.0)[0]
+>>> print("%.2f" % (red.luminance(3000)/red.model.luminance(3000)))
+0.98
+
+"""
+
+import json
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+
+
+def fitGainOffset(predicted, measured):
+    """
+    Returns gain and offset, so that gain*predicted + offset fits the
+    *measured* luminances best (least squares). Failed measurements (nan)
+    are left out. With only one predicted luminance the offset is 0.
+
+    Raises ValueError, if there is no valid measurement.
+
+    """
+    predicted = np.asarray(predicted, dtype=float).ravel()
+    measured = np.asarray(measured, dtype=float).ravel()
+    valid = np.isfinite(predicted) & np.isfinite(measured)
+    predicted = predicted[valid]
+    measured = measured[valid]
+    if len(np.unique(predicted)) < 2:
+        if not np.any(predicted):
+            raise ValueError("no valid measurement to estimate the gain")
+        return (float(np.dot(predicted, measured)/np.dot(predicted,
+            predicted)), 0.0)
+    gain, offset = np.polyfit(predicted, measured, 1)
+    return (float(gain), float(offset))
+
+
+class CorrectedChannel(object):
+    """
+    Channel model (see tubemodel.channelModels) with the luminance
+    gain*model.luminance(x) + offset.
+
+    """
+    def __init__(self, model, gain=1.0, offset=0.0):
+        self.model = model
+        self.gain = float(gain)
+        self.offset = float(offset)
+
+    def luminance(self, x):
+        """
+        Returns the luminance for voltages *x*.
+
+        """
+        return self.gain*self.model.luminance(x) + self.offset
+
+    def inverse(self, y):
+        """
+        Returns the voltages (as floats) which give luminance *y*.
+
+        """
+        return self.model.inverse((np.asarray(y, dtype=float) -
+            self.offset)/self.gain)
+
+    def derivative(self, x):
+        """
+        Returns the derivative of the luminance by the voltage at *x*.
+
+        """
+        return self.gain*self.model.derivative(x)
+
+
+class DriftModel(object):
+    """
+    Gain and offset of the luminance of red, green, and blue relative to
+    the calibration as a function of the time since the calibration.
+
+    Every check (addCheck) gives gain and offset at one time. Together
+    with the calibration itself (gain 1, offset 0) they are fitted by
+    least squares with a straight line in the days since the calibration
+    and, if all checks know them, in the operating hours. If all checks
+    were at the time of the calibration, the last check is used as it is.
+    The line is not extrapolated: after the last check the correction of
+    the last check holds.
+
+    Attributes:
+        calibration_time: float
+            time of the calibration in seconds since the epoch
+
+        calibration_hours: None or float
+            operating hours of the tubes at the calibration
+
+        checks: list of dicts
+            the checks with the keys time, hours, gain, and offset
+
+    """
+    def __init__(self, calibration_time, calibration_hours=None):
+        self.calibration_time = float(calibration_time)
+        self.calibration_hours = calibration_hours
+        self.checks = list()
+
+    def addCheck(self, time, gain, offset, hours=None):
+        """
+        Adds gain and offset (triples for red, green, and blue) measured at
+        *time* (seconds since the epoch) and *hours* (None or operating
+        hours of the tubes).
+
+        """
+        self.checks.append({"time": float(time),
+            "hours": None if hours is None else float(hours),
+            "gain": [float(g) for g in gain],
+            "offset": [float(o) for o in offset]})
+
+    def _features(self, times, hours):
+        # columns of the linear model for times (and hours)
+        days = (np.asarray(times, dtype=float) -
+                self.calibration_time)/SECONDS_PER_DAY
+        columns = [np.ones(len(days)), days]
+        if hours is not None:
+            columns.append(np.asarray(hours, dtype=float) -
+                    self.calibration_hours)
+        return np.column_stack(columns)
+
+    def correction(self, time, hours=None):
+        """
+        Returns the predicted gain and offset (arrays of 3 floats) of red,
+        green, and blue at *time* (seconds since the epoch). The operating
+        *hours* are only used, if they are known for the calibration and
+        all checks. *time* and *hours* are limited to the span from the
+        calibration to the last check.
+
+        """
+        if not self.checks:
+            return (np.ones(3), np.zeros(3))
+        use_hours = (hours is not None and self.calibration_hours is not None
+                and all(check["hours"] is not None for check in self.checks))
+        times = [self.calibration_time] + [check["time"] for check in
+                self.checks]
+        observed_hours = None
+        if use_hours:
+            observed_hours = [self.calibration_hours] + [check["hours"] for
+                    check in self.checks]
+        design = self._features(times, observed_hours)
+        if np.linalg.matrix_rank(design) < design.shape[1]:
+            design = design[:, :2]
+            use_hours = False
+        if np.linalg.matrix_rank(design) < 2:
+            # all checks at the time of the calibration
+            last = self.checks[-1]
+            return (np.array(last["gain"]), np.array(last["offset"]))
+        # a line through a few noisy checks must not run away
+        time = min(max(time, self.calibration_time), max(times))
+        if use_hours:
+            hours = min(max(hours, self.calibration_hours),
+                    max(observed_hours))
+        values = np.vstack(([1.0]*3 + [0.0]*3, [check["gain"] +
+            check["offset"] for check in self.checks]))
+        coefficients = np.linalg.lstsq(design, values, rcond=-1)[0]
+        prediction = np.dot(self._features([time], [hours] if use_hours
+            else None), coefficients)[0]
+        return (prediction[:3], prediction[3:])
+
+    def correct(self, models, time, hours=None):
+        """
+        Returns the channel *models* of red, green, and blue (see
+        tubemodel.channelModels) corrected for the drift at *time* as list
+        of CorrectedChannel.
+
+        """
+        gain, offset = self.correction(time, hours)
+        return [CorrectedChannel(model, gain[i], offset[i]) for i, model in
+                enumerate(models)]
+
+    def save(self, filename):
+        """
+        Saves the calibration time and the checks to *filename* (JSON).
+
+        """
+        with open(filename, "w") as f:
+            json.dump({"calibration_time": self.calibration_time,
+                "calibration_hours": self.calibration_hours,
+                "checks": self.checks}, f, indent=1)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Loads a drift model saved with save.
+
+        """
+        with open(filename) as f:
+            data = json.load(f)
+        drift = cls(data["calibration_time"], data["calibration_hours"])
+        drift.checks = data["checks"]
+        return drift
+
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./journal.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) CalibrationJournal
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module provides the class CalibrationJournal, an append-only log of a
+calibration of the tubes. Every sample is written to the disk as soon as it
+is measured, so that an interrupted calibration can be resumed with the
+same journal file instead of starting again.
+
+The journal is a text file with one JSON object per line. The first line
+holds the settings of the calibration, every further line is either a
+sample of a channel or the mark that a channel is complete.
+
+Example:
+
+>>> import os, tempfile
+>>> filename = os.path.join(tempfile.mkdtemp(), "journal.txt")
+>>> journal = CalibrationJournal(filename, n=2, each=1)
+>>> journal.append("red", (4095, 4095, 4095), (0.3, 0.3, 20.0), [0.0]*36,
+...                timestamp=0.0)
+>>> journal = CalibrationJournal(filename, n=2, each=1) # after a crash
+>>> journal.count("red")
+1
+>>> journal.nextSample("red", (4095, 4095, 4095))["xyY"]
+[0.3, 0.3, 20.0]
+>>> journal.nextSample("red", (1024, 4095, 4095)) is None
+True
+
+"""
+
+import json
+import os
+
+
+class CalibrationJournal(object):
+    """
+    Journal of a calibration of the tubes in the file *filename*.
+
+    If the file exists, its samples are loaded and can be replayed with
+    nextSample. Otherwise a new journal is started. A journal can only be
+    resumed with the same settings (n, each, adaptive, stop_tolerance,
+    unattended, n_baseline, robust), because the measured voltages depend
+    on them.
+
+    Each sample is appended to the file, flushed, and synced to the disk
+    before append returns. A last line, which was only written partly
+    during a crash, is ignored.
+
+    """
+    def __init__(self, filename, n, each, adaptive=False,
+            stop_tolerance=None, unattended=False, n_baseline=5,
+            robust=False):
+        """
+        Parameters:
+            filename: str
+                name of the journal file
+
+            n, each, adaptive, stop_tolerance, unattended, n_baseline,
+            robust:
+                settings of the calibration (see CalibTubes.calibrate);
+                n_baseline only counts in unattended calibrations
+
+        """
+        self.filename = filename
+        self.settings = {"n": n, "each": each, "adaptive": bool(adaptive)}
+        if stop_tolerance is not None:
+            self.settings["stop_tolerance"] = float(stop_tolerance)
+        if unattended:
+            self.settings["unattended"] = True
+            self.settings["n_baseline"] = n_baseline
+        if robust:
+            # outliers are remeasured
+            self.settings["robust"] = True
+        self.samples = dict()
+        self.completed = set()
+        self.cursor = dict()
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            self._load()
+        else:
+            self._write({"settings": self.settings})
+
+    def _load(self):
+        with open(self.filename) as f:
+            lines = f.readlines()
+        entries = list()
+        for i, line in enumerate(lines):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                if i < len(lines) - 1:
+                    raise ValueError("line %i of journal %s is broken"
+                            %(i + 1, self.filename))
+        if not entries or entries[0].get("settings") != self.settings:
+            raise ValueError("journal %s was written with other settings"
+                    %self.filename + " than %s" %str(self.settings))
+        if not lines[-1].endswith("\n"):
+            # remove the broken last line before appending
+            with open(self.filename, "w") as f:
+                f.writelines(lines[:-1])
+        for entry in entries[1:]:
+            if "complete" in entry:
+                self.completed.add(entry["complete"])
+            else:
+                self.samples.setdefault(entry["channel"], list()).append(
+                        entry)
+
+    def _write(self, entry):
+        with open(self.filename, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, channel, voltage, xyY, spectrum, timestamp,
+            settling=None):
+        """
+        Writes a measured sample of *channel* to the journal. *settling* is
+        the time (seconds) the light settled before the measurement.
+
+        """
+        entry = {"channel": channel,
+                 "voltages": [int(v) for v in voltage],
+                 "xyY": [float(v) for v in xyY],
+                 "spectrum": [float(v) for v in spectrum],
+                 "timestamp": float(timestamp)}
+        if settling is not None:
+            entry["settling"] = float(settling)
+        self._write(entry)
+        self.samples.setdefault(channel, list()).append(entry)
+        self.cursor[channel] = len(self.samples[channel])
+
+    def complete(self, channel):
+        """
+        Marks the measurement of *channel* as complete.
+
+        """
+        if channel not in self.completed:
+            self._write({"complete": channel})
+            self.completed.add(channel)
+
+    def isComplete(self, channel):
+        """
+        Returns True, if *channel* was measured completely.
+
+        """
+        return channel in self.completed
+
+    def count(self, channel):
+        """
+        Returns the number of samples of *channel* in the journal.
+
+        """
+        return len(self.samples.get(channel, ()))
+
+    def nextSample(self, channel, voltage):
+        """
+        Returns the next sample of *channel* (dict with the keys voltages,
+        xyY, spectrum, timestamp, and settling, if it was recorded) from
+        the journal, which has to be measured at *voltage*, or None, if all
+        samples of the channel were replayed already.
+
+        Raises ValueError, if the sample in the journal was measured at
+        another voltage.
+
+        """
+        samples = self.samples.get(channel, ())
+        position = self.cursor.get(channel, 0)
+        if position >= len(samples):
+            return None
+        sample = samples[position]
+        if sample["voltages"] != [int(v) for v in voltage]:
+            raise ValueError("sample %i of %s in journal was measured at"
+                    %(position, channel) + " %s and not at %s"
+                    %(str(sample["voltages"]), str(tuple(voltage))))
+        self.cursor[channel] = position + 1
+        return sample
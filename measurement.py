@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./measurement.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) SAMPLE_DTYPE
+#          (2) MeasurementBatch
+#          (3) subtractBaseline
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module provides the class MeasurementBatch, which stores the
+measurements of the tubes in one preallocated structured numpy array.
+
+The i1 Pro writes its results into ctypes buffers. MeasurementBatch owns
+these buffers and numpy views on them, so that every sample is copied
+directly from the buffers into the next row of the array without creating
+any Python lists.
+
+Example:
+
+>>> batch = MeasurementBatch(2)
+>>> batch.tri_stim[:] = [0.31, 0.33, 12.5]  # done by I1_GetTriStimulus
+>>> batch.record((0xFFF, 0x800, 0x800), timestamp=0.0)
+0
+>>> batch.tri_stim[2] = 13.0
+>>> batch.record((0xFFF, 0x900, 0x900), timestamp=1.0)
+1
+>>> batch.xyY[:, 2].tolist()
+[12.5, 13.0]
+>>> batch.voltages[1].tolist()
+[4095, 2304, 2304]
+
+"""
+
+from ctypes import c_float
+
+import numpy as np
+
+from eyeone.constants import TRISTIMULUS_SIZE, SPECTRUM_SIZE
+from convert import xyY2XYZ, XYZ2xyY
+
+# one measurement of the tubes
+SAMPLE_DTYPE = np.dtype([("voltages", np.int16, (3,)),
+                         ("xyY", np.float32, (TRISTIMULUS_SIZE,)),
+                         ("spectrum", np.float32, (SPECTRUM_SIZE,)),
+                         ("timestamp", np.float64),
+                         ("settling", np.float32)])
+
+
+class MeasurementBatch(object):
+    """
+    Preallocated storage for *size* measurements of the tubes.
+
+    Pass self.tri_stim and self.spectrum to I1_GetTriStimulus and
+    I1_GetSpectrum and call record afterwards. The recorded samples are
+    available as contiguous arrays in self.voltages, self.xyY,
+    self.spectra, self.timestamps, and self.settling_times.
+
+    For old code, indexing a batch returns the triple (voltages, xyY,
+    spectrum) of tuples, which measureVoltages returned before.
+
+    """
+    def __init__(self, size):
+        """
+        Parameters:
+            size: int
+                maximal number of samples in the batch
+
+        """
+        self.data = np.zeros(size, dtype=SAMPLE_DTYPE)
+        self.count = 0
+        self.tri_stim = (c_float * TRISTIMULUS_SIZE)() # memory where i1 Pro
+                                                       # saves tristim.
+        self.spectrum = (c_float * SPECTRUM_SIZE)()    # memory where i1 Pro
+                                                       # saves spectrum.
+        # views on the ctypes buffers without copying them
+        self._tri_stim_view = np.ctypeslib.as_array(self.tri_stim)
+        self._spectrum_view = np.ctypeslib.as_array(self.spectrum)
+
+    def record(self, voltage, timestamp, settling=np.nan):
+        """
+        Stores the content of self.tri_stim and self.spectrum together with
+        *voltage*, *timestamp* (seconds), and the time the light needed to
+        settle before the measurement (*settling*, seconds, nan if unknown)
+        as next sample and returns its index.
+
+        Raises IndexError, if the batch is full.
+
+        """
+        if self.count >= len(self.data):
+            raise IndexError("MeasurementBatch is full (%i samples)"
+                    %len(self.data))
+        sample = self.data[self.count]
+        sample["voltages"] = voltage
+        sample["xyY"] = self._tri_stim_view
+        sample["spectrum"] = self._spectrum_view
+        sample["timestamp"] = timestamp
+        sample["settling"] = settling
+        self.count += 1
+        return self.count - 1
+
+    def add(self, voltage, xyY, spectrum, timestamp, settling=np.nan):
+        """
+        Stores a sample, which was measured before (e.g. read from a
+        journal.CalibrationJournal), and returns its index.
+
+        """
+        self._tri_stim_view[:] = xyY
+        self._spectrum_view[:] = spectrum
+        return self.record(voltage, timestamp, settling)
+
+    def restoreOrder(self, order):
+        """
+        Puts the samples, which were measured in the order *order* (as
+        returned by ordering.orderVoltages), into the original order.
+
+        """
+        if len(order) != self.count:
+            raise ValueError("order must have one index per sample")
+        samples = self.data[:self.count].copy()
+        self.data[np.asarray(order, dtype=int)] = samples
+
+    @property
+    def voltages(self):
+        return self.data["voltages"][:self.count]
+
+    @property
+    def xyY(self):
+        return self.data["xyY"][:self.count]
+
+    @property
+    def spectra(self):
+        return self.data["spectrum"][:self.count]
+
+    @property
+    def timestamps(self):
+        return self.data["timestamp"][:self.count]
+
+    @property
+    def settling_times(self):
+        return self.data["settling"][:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("sample index out of range")
+        sample = self.data[index]
+        return (tuple(sample["voltages"].tolist()),
+                tuple(sample["xyY"].tolist()),
+                tuple(sample["spectrum"].tolist()))
+
+
+def subtractBaseline(xyY, spectra, baseline_xyY, baseline_spectrum):
+    """
+    Subtracts the light measured with all tubes at their off level
+    (*baseline_xyY*, *baseline_spectrum*) from the measurements *xyY* and
+    *spectra* (arrays with one row per measurement) and returns the
+    corrected tuple (xyY, spectra) as new arrays.
+
+    The light adds up in XYZ, so the subtraction is done in XYZ. x and y
+    are nan, if nothing is left after the subtraction.
+
+    """
+    XYZ = xyY2XYZ(xyY) - xyY2XYZ(baseline_xyY)
+    return (XYZ2xyY(XYZ), np.asarray(spectra, dtype=float) -
+            np.asarray(baseline_spectrum, dtype=float))
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./ordering.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) rampDistances
+#          (2) pathLength
+#          (3) orderVoltages
+#          (4) restoreOrder
+#          (5) coarseToFine
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module plans the order in which a batch of voltage triples is
+measured. All channels of the tubes ramp at the same time, so the time to
+get from one triple to the next is proportional to the largest change of a
+single channel. orderVoltages finds a short path through all triples with
+respect to this distance, which saves ramp and settling time, and
+restoreOrder puts the results back into the order of the caller.
+
+Example:
+
+>>> voltages = [(0x400, 0x400, 0x400), (0xFFF, 0xFFF, 0xFFF),
+...             (0x500, 0x400, 0x400), (0xF00, 0xFFF, 0xFFF)]
+>>> order = orderVoltages(voltages, start=(0xFFF, 0xFFF, 0xFFF))
+>>> order
+[1, 3, 0, 2]
+>>> pathLength([voltages[i] for i in order], start=(0xFFF, 0xFFF, 0xFFF))
+3582
+>>> restoreOrder([voltages[i] for i in order], order) == voltages
+True
+
+"""
+
+import numpy as np
+
+
+def rampDistances(voltages, other=None):
+    """
+    Returns the matrix of ramp distances (largest change of a single
+    channel) between all triples in *voltages* and all triples in *other*
+    (default: *voltages*).
+
+    """
+    voltages = np.asarray(voltages, dtype=int).reshape(-1, 3)
+    if other is None:
+        other = voltages
+    other = np.asarray(other, dtype=int).reshape(-1, 3)
+    return np.abs(voltages[:, np.newaxis, :] -
+            other[np.newaxis, :, :]).max(axis=2)
+
+
+def pathLength(voltages, start=None):
+    """
+    Returns the sum of the ramp distances, when the triples in *voltages*
+    are set one after the other beginning at the triple *start*.
+
+    """
+    voltages = np.asarray(voltages, dtype=int).reshape(-1, 3)
+    if start is not None:
+        voltages = np.vstack((np.asarray(start, dtype=int), voltages))
+    if len(voltages) < 2:
+        return 0
+    return int(np.abs(np.diff(voltages, axis=0)).max(axis=1).sum())
+
+
+def _nearestNeighbourPath(distances, first):
+    n = len(distances)
+    path = [first]
+    visited = np.zeros(n, dtype=bool)
+    visited[first] = True
+    for i in range(n - 1):
+        row = np.where(visited, np.iinfo(distances.dtype).max,
+                distances[path[-1]])
+        path.append(int(np.argmin(row)))
+        visited[path[-1]] = True
+    return path
+
+
+def _twoOpt(path, distances, start_distances, max_rounds=50):
+    # reverses segments of the path as long as this makes it shorter; the
+    # end of the path is open, the beginning is fixed by start_distances
+    path = np.array(path)
+    n = len(path)
+    for k in range(max_rounds):
+        improved = False
+        for i in range(n - 1):
+            if i == 0:
+                before = start_distances[path[0]]
+            else:
+                before = distances[path[i - 1], path[i]]
+            j = np.arange(i + 1, n)
+            after = np.zeros(len(j), dtype=distances.dtype)
+            has_next = j < n - 1
+            after[has_next] = distances[path[j[has_next]],
+                    path[j[has_next] + 1]]
+            old = before + after
+            if i == 0:
+                new_before = start_distances[path[j]]
+            else:
+                new_before = distances[path[i - 1], path[j]]
+            new_after = np.zeros(len(j), dtype=distances.dtype)
+            new_after[has_next] = distances[path[i], path[j[has_next] + 1]]
+            gain = old - (new_before + new_after)
+            best = int(np.argmax(gain))
+            if gain[best] > 0:
+                path[i:j[best] + 1] = path[i:j[best] + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return path.tolist()
+
+
+def orderVoltages(voltages, start=None, counterbalance=False):
+    """
+    Returns a list of indices into *voltages* (sequence of triples), in
+    which the triples should be measured to keep the ramps between them
+    short.
+
+    Equal triples are measured one after the other. The path through the
+    different triples is found with a nearest neighbour search followed by
+    2-opt improvements and begins near *start* (the voltages set at the
+    moment).
+
+    If *counterbalance* is True, the path is walked forward and then
+    backward and repeated triples are split between both walks, so that
+    they are approached equally often from both directions. This controls
+    for hysteresis and carry-over at the cost of walking the path twice.
+
+    """
+    voltages = np.asarray(voltages, dtype=int).reshape(-1, 3)
+    if len(voltages) == 0:
+        return list()
+    unique, inverse = np.unique(voltages, axis=0, return_inverse=True)
+    inverse = np.asarray(inverse).ravel()
+    distances = rampDistances(unique)
+    if start is None:
+        start_distances = np.zeros(len(unique), dtype=distances.dtype)
+    else:
+        start_distances = rampDistances(unique, [start])[:, 0]
+    first = int(np.argmin(start_distances))
+    path = _nearestNeighbourPath(distances, first)
+    path = _twoOpt(path, distances, start_distances)
+
+    members = [list() for i in range(len(unique))]
+    for index, u in enumerate(inverse.tolist()):
+        members[u].append(index)
+    if not counterbalance:
+        return [index for u in path for index in members[u]]
+    forward = list()
+    backward = list()
+    for u in path:
+        half = (len(members[u]) + 1) // 2
+        forward.extend(members[u][:half])
+        backward.append(members[u][half:])
+    return forward + [index for part in backward[::-1] for index in part]
+
+
+def restoreOrder(results, order):
+    """
+    Returns the list *results*, which was measured in the order *order*
+    (as returned by orderVoltages), in the original order of the voltages.
+
+    """
+    if len(results) != len(order):
+        raise ValueError("results and order must have the same length")
+    restored = [None]*len(order)
+    for result, index in zip(results, order):
+        restored[index] = result
+    return restored
+
+
+def coarseToFine(n):
+    """
+    Returns the indices 0, ..., n - 1 of a sweep in an order, in which
+    every beginning covers the whole sweep: first both ends, then the
+    middle, then the middles of the halves, and so on. A measurement in
+    this order can stop early and still spans the whole range.
+
+    >>> coarseToFine(9)
+    [0, 8, 4, 2, 6, 1, 3, 5, 7]
+
+    """
+    if n <= 0:
+        return []
+    order = [0] if n == 1 else [0, n - 1]
+    intervals = [(0, n - 1)]
+    while intervals:
+        next_intervals = list()
+        for (low, high) in intervals:
+            if high - low < 2:
+                continue
+            middle = (low + high) // 2
+            order.append(middle)
+            next_intervals.extend(((low, middle), (middle, high)))
+        intervals = next_intervals
+    return order
@@ -6,7 +6,9 @@
 #
 # GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
 #
-# content:
+# content: (1) CalibDataFile
+#          (2) TubesDataFile
+#          (3) BackgroundTubesDataFile
 #
 # input: --
 # output: --
@@ -17,12 +19,22 @@
 
 """
 This modules provides the class CalibDataFile, which provides a convenient
-method of writing the calibration data to a comma separated file.
+method of writing the calibration data to a comma separated file, and the
+classes TubesDataFile and BackgroundTubesDataFile for the measurements of
+the tubes.
 
 """
 
 #import json #JSON format is used so comments can be saved
+import io
 import time
+import threading
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+import numpy as np
 
 #Fix inheriting from file later, need way of working with open()
 class CalibDataFile(object):
@@ -220,6 +232,10 @@ class TubesDataFile(object):
         When entering a context, print the header to the file_object.
 
         """
+        self.file_object.write(self._header())
+        return self
+
+    def _header(self):
         delimiter = self.delimiter
         writestr = ("x" + str(delimiter) + "y" + str(delimiter) + "Y" +
                 str(delimiter) + "voltage_r" + str(delimiter) + "voltage_g"
@@ -227,65 +243,51 @@ class TubesDataFile(object):
         for i in range(36):
             writestr += str(delimiter) + "l" + str(i+1)
         writestr += "\n"
-        self.file_object.write(writestr)
-        return self
+        return writestr
 
     def __exit__(self, *exc):
         self.close()
         return False
 
-    def write_data_txt_loop(self, xyY=None, voltage=None, spec_list=None):
-        delimiter = self.delimiter
-        # Fundamentally different to JSON, as can write to buffer on the fly
-        # - i.e. does not need complete structure to write
-        # If at 0, write headers:
-        for p in range(len(xyY)):
-            if self.file_object.tell() == 0:
-                writestr = ("x" + str(delimiter) + "y" + str(delimiter) +
-                        "Y" + str(delimiter) + "voltage_r" + str(delimiter)
-                        + "voltage_g" + str(delimiter) + "voltage_b")
-                for i in range(36):
-                    writestr += str(delimiter) + "l" + str(i+1)
-                writestr += "\n"
-                self.file_object.write(writestr)
-
-            writestr = ""
-
-            # Write xyY values from 3 element list (should really be tuple
-            # as different data)
-            if xyY != None:
-                for i in range(3):
-                    writestr += str(xyY[p][i]) + str(delimiter)
-            else:
-                for i in range(3):
-                    writestr += "NA" + str(delimiter)
-
-            # Write voltage_{r,g,b} values from 3 element list (should
-            # really be tuple as different data)
-            if voltage != None:
-                for i in range(3):
-                    writestr += str(voltage[p][i]) + str(delimiter)
-            else:
-                for i in range(3):
-                    writestr += "NA" + str(delimiter)
+    def write_data_array(self, xyY=None, voltage=None, spec_list=None):
+        """
+        Writes all samples of a measurement at once: *xyY* (N, 3),
+        *voltage* (N, 3), and *spec_list* (N, 36) are arrays with one row
+        per sample, None gives columns of NA.
 
-            # Write spectral values from 36 element list
-            if spec_list != None:
-                for i in range(36):
-                    writestr += str(spec_list[p][i])+str(delimiter)
+        The rows are formatted with one numpy.savetxt into a buffer, which
+        is written with one call. If nothing was written to the file yet,
+        the header is written first.
+
+        """
+        n = max([len(values) for values in (xyY, voltage, spec_list) if
+            values is not None] or [0])
+        if n == 0:
+            return
+        columns = list()
+        formats = list()
+        for values, width, fmt in ((xyY, 3, "%.9g"), (voltage, 3, "%d"),
+                (spec_list, 36, "%.9g")):
+            if values is None:
+                formats += ["NA"]*width
             else:
-                for i in range(36):
-                    writestr += "NA"+str(delimiter)
-                writestr=writestr[:-1] #remove trailing delimiter
-            # Terminate record with newline
-            writestr += "\n"
-            self.file_object.write(writestr)
+                columns.append(np.reshape(np.asarray(values, dtype=float),
+                    (n, width)))
+                formats += [fmt]*width
+        buffer = io.BytesIO()
+        np.savetxt(buffer, np.hstack(columns),
+                fmt=str(self.delimiter).join(formats))
+        writestr = buffer.getvalue().decode("ascii")
+        if self.file_object.tell() == 0:
+            writestr = self._header() + writestr
+        self.file_object.write(writestr)
 
-            #rgb_r rgb_g rgb_b x y Y  voltage_r voltage_g voltage_b l1 l2 l3 ...
-            #NA    NA    NA    0.2 ...
+    def write_data_txt_loop(self, xyY=None, voltage=None, spec_list=None):
+        """
+        Writes all samples of a measurement, see write_data_array.
 
-            #"{rgb_r}  {}".format(rgb_r="NA", ...
-            #                 " ".join(list of strings)
+        """
+        self.write_data_array(xyY=xyY, voltage=voltage, spec_list=spec_list)
 
     def write_data_txt(self, xyY=None, voltage=None, spec_list=None):
         delimiter = self.delimiter
@@ -295,7 +297,7 @@ class TubesDataFile(object):
 
         # Write xyY values from 3 element list (should really be tuple as
         # different data)
-        if xyY != None:
+        if xyY is not None:
             for i in range(3):
                 writestr += str(xyY[i])+str(delimiter)
         else:
@@ -304,7 +306,7 @@ class TubesDataFile(object):
 
         # Write voltage_{r,g,b} values from 3 element list (should really
         # be tuple as different data)
-        if voltage != None:
+        if voltage is not None:
             for i in range(3):
                 writestr += str(voltage[i])+str(delimiter)
         else:
@@ -312,7 +314,7 @@ class TubesDataFile(object):
                 writestr += "NA"+str(delimiter)
 
         # Write spectral values from 36 element list
-        if spec_list != None:
+        if spec_list is not None:
             for i in range(36):
                 writestr += str(spec_list[i])+str(delimiter)
         else:
@@ -335,3 +337,90 @@ class TubesDataFile(object):
     def close(self):
         self.file_object.close()
 
+
+class BackgroundTubesDataFile(TubesDataFile):
+    """
+    Writes the measurements of the tubes like TubesDataFile, but formats
+    and writes them in a background thread, so that the measurement loop
+    does not wait for the disk.
+
+    write_data_txt copies the values into a bounded queue and returns
+    immediately (it only blocks, if the queue is full). The writer thread
+    takes the samples from the queue and writes them in the order they were
+    given.
+
+    Example:
+
+    >>> import printing
+    >>> with printing.BackgroundTubesDataFile(prefix="YourPrefixHere",
+    ...             delimiter="\t") as filename:
+    >>>     #code here
+    >>>     filename.write_data_txt(xyY=xyY, voltage=voltage,
+    ...             spec_list=spec_list)
+    >>>     #more code
+
+    If there is an error inside the with context, all samples which are
+    already in the queue are written before the file is closed, so data are
+    not lost. An error of the writer thread is raised in the next call of
+    write_data_txt or close.
+
+    """
+    def __init__(self, prefix="measure_tubes_", delimiter="\t",
+            maxsize=1000):
+        """
+        Parameters:
+            prefix: str
+                file name prefix
+
+            delimiter: str
+                delimiter which separates the values
+
+            maxsize: int
+                maximal number of samples waiting in the queue
+
+        """
+        TubesDataFile.__init__(self, prefix=prefix, delimiter=delimiter)
+        self.queue = queue.Queue(maxsize)
+        self.error = None
+        self.thread = threading.Thread(target=self._run,
+                name="TubesDataFileWriter")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def write_data_txt(self, xyY=None, voltage=None, spec_list=None):
+        self._raiseError()
+        # copy the values, as the buffers of the i1 Pro get overwritten
+        self.queue.put(tuple(None if values is None else tuple(values)
+            for values in (xyY, voltage, spec_list)))
+
+    def _run(self):
+        while True:
+            sample = self.queue.get()
+            if sample is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                TubesDataFile.write_data_txt(self, *sample)
+                if self.queue.empty():
+                    self.file_object.flush()
+            except Exception as err:
+                self.error = err
+
+    def _raiseError(self):
+        if self.error is not None:
+            error = self.error
+            self.error = None
+            raise error
+
+    def close(self):
+        """
+        Waits until all samples in the queue are written and closes the
+        file.
+
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        TubesDataFile.close(self)
+        self._raiseError()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./ramp.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) profileFractions
+#          (2) computeRamp
+#          (3) changedMask
+#          (4) rampSteps
+#          (5) rampTimes
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module computes the voltage ramps that are used to change the voltages
+of the tubes smoothly. A ramp is a numpy integer array with one row per
+step and one column per channel (red, green, blue). The whole ramp is
+computed before the first value is written to the wasco card.
+
+The speed of a ramp is given by the slew rate, i.e. the maximal change of
+a channel in DAC counts per millisecond. The profile of a ramp is either
+"linear" (constant speed) or "s-curve" (smooth start and stop, the ramp
+has 1.5 times more steps and takes 1.5 times longer to keep the peak speed
+at the slew rate).
+
+"""
+
+import math
+
+import numpy as np
+
+# ratio between the peak speed of a profile and the mean speed
+PROFILE_PEAK = {"linear": 1.0, "s-curve": 1.5}
+
+
+def profileFractions(steps, profile="linear"):
+    """
+    Returns the fractions of the way from start to stop after each of the
+    *steps* steps for the given *profile*.
+
+    Example:
+
+    >>> profileFractions(4).tolist()
+    [0.25, 0.5, 0.75, 1.0]
+    >>> profileFractions(2, "s-curve").tolist()
+    [0.5, 1.0]
+
+    """
+    if not profile in PROFILE_PEAK:
+        raise ValueError("profile must be one of %s and not %s"
+                %(str(sorted(PROFILE_PEAK.keys())), str(profile)))
+    fraction = np.arange(1, steps + 1, dtype=float) / steps
+    if profile == "s-curve":
+        fraction = fraction*fraction*(3.0 - 2.0*fraction)
+    return fraction
+
+
+def computeRamp(start, stop, steps, profile="linear"):
+    """
+    Returns the ramp from *start* to *stop* in *steps* steps as an integer
+    array of shape (steps, 3).
+
+    The start voltages are not part of the ramp, the last row always equals
+    *stop*.
+
+    Parameters:
+        start: (vol_r, vol_g, vol_b)
+            voltages which are set at the moment
+
+        stop: (vol_r, vol_g, vol_b)
+            voltages which should be set at the end of the ramp
+
+        steps: int
+            number of steps (rows) of the ramp
+
+        profile: *"linear"* or "s-curve"
+            shape of the ramp
+
+    Example:
+
+    >>> computeRamp((1000, 1000, 1000), (1010, 1000, 990), 2).tolist()
+    [[1005, 1000, 995], [1010, 1000, 990]]
+
+    """
+    start = np.asarray(start, dtype=float)
+    stop = np.asarray(stop, dtype=float)
+    if steps < 1:
+        return np.empty((0, 3), dtype=int)
+    fraction = profileFractions(steps, profile)
+    return np.rint(start + np.outer(fraction, stop - start)).astype(int)
+
+
+def changedMask(ramp, start):
+    """
+    Returns a boolean array of the same shape as *ramp*, which is True for
+    every value that differs from the value of the step before.
+
+    Values which are False do not need to be written to the wasco card
+    again. The first row is compared to *start*.
+
+    Example:
+
+    >>> ramp = computeRamp((1000, 1000, 1000), (1003, 1000, 1000), 3)
+    >>> changedMask(ramp, (1000, 1000, 1000)).tolist()
+    [[True, False, False], [True, False, False], [True, False, False]]
+
+    """
+    ramp = np.asarray(ramp)
+    previous = np.vstack((np.asarray(start).reshape(1, 3), ramp[:-1]))
+    return ramp != previous
+
+
+def rampSteps(start, stop, max_step, profile="linear"):
+    """
+    Returns the number of steps needed to get from *start* to *stop*, if no
+    channel may change more than *max_step* counts in one step.
+
+    Example:
+
+    >>> rampSteps((0x400, 0xFFF, 0xFFF), (0xFFF, 0xFFF, 0xFFF), 5)
+    615
+
+    """
+    diff = max([abs(new - old) for old, new in zip(start, stop)])
+    if diff == 0:
+        return 0
+    return int(math.ceil(diff * PROFILE_PEAK[profile] / float(max_step)))
+
+
+def rampTimes(ramp, start, slew_rate):
+    """
+    Returns the times in seconds, relative to the start of the ramp, at
+    which the rows of *ramp* have to be written so that no channel changes
+    faster than *slew_rate* counts per millisecond.
+
+    The rows follow in equal intervals, which are given by the largest
+    change of one step (including the rounding of the ramp). The last row
+    is written at the end of the ramp.
+
+    Example:
+
+    >>> ramp = computeRamp((1000, 1000, 1000), (1020, 1000, 1000), 4)
+    >>> rampTimes(ramp, (1000, 1000, 1000), 10.0).tolist()
+    [0.0005, 0.001, 0.0015, 0.002]
+
+    """
+    if slew_rate <= 0:
+        raise ValueError("slew_rate must be positive and not %s"
+                %str(slew_rate))
+    ramp = np.asarray(ramp)
+    if len(ramp) == 0:
+        return np.empty(0)
+    previous = np.vstack((np.asarray(start).reshape(1, 3), ramp[:-1]))
+    interval = np.abs(ramp - previous).max() / float(slew_rate) / 1000.0
+    return np.arange(1, len(ramp) + 1, dtype=float) * interval
@@ -147,7 +147,9 @@ class SetTubesManualBase(object):
             self.voltages[colortube[1]] = self.voltages[colortube[1]] - step
         else:
             pass
-        self.tub.setVoltages(self.voltages)
+        # do not block the key handler, fast key presses are merged into
+        # one transition
+        self.tub.setVoltagesAsync(self.voltages)
         self.tellme(str(self.voltages))
 
     def tellme(self, text):
@@ -187,7 +189,7 @@ class SetTubesManualBase(object):
 
         """
         self.voltages = self.knobs.states[:3]
-        self.tub.setVoltages(self.voltages)
+        self.tub.setVoltagesAsync(self.voltages)
         self.tellme(str(self.voltages))
 
     def onKeyPress(self, event):
@@ -541,7 +543,7 @@ class SetTubesManualPlot(SetTubesManualBase):
         for i in range(self.each):
             self.tub.setVoltages(self.voltages)
             #print(self.voltages)
-            time.sleep(self.imi) # to give the i1 Pro time to adapt and to
+            self.tub.wait(self.imi) # to give the i1 Pro time to adapt and to
                                  # reduce carry-over effects
             if(self.eyeone.I1_TriggerMeasurement() != eNoError):
                 print("Measurement failed for voltage %s ."
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./simeyeone.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) SimulatedTubesModel
+#          (2) SimulatedEyeOne
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module provides a simulated i1 Pro photometer. It measures simulated
+tubes, which are driven by a simwasco.SimulatedWasco, so that calibrations
+can be run and benchmarked without any hardware and with realistic data.
+
+The simulated tubes follow the luminance function of Pinheiro & Bates
+(2000) for each channel, their light adds up, the luminance drifts while
+the tubes warm up, it follows a change of the voltages with a lag, and
+every measurement has some noise.
+
+Example:
+
+>>> from calibtubes import CalibTubes
+>>> eyeone = SimulatedEyeOne(seed=1)
+>>> caltub = CalibTubes(eyeone, simulate=True)
+>>> eyeone.calibrate()
+Measurement mode set to SingleEmission.
+Color space set to CIExyY.
+<BLANKLINE>
+Please put i1 Pro on calibration plate and press key to start calibration.
+Calibration of i1 Pro done.
+>>> voltages, xyY, spectra = caltub.measureOneColorChannel("red", n=3)
+(4095, 4095, 4095)
+(2560, 4095, 4095)
+(1025, 4095, 4095)
+
+"""
+
+from __future__ import print_function
+
+import math
+
+import numpy as np
+
+from eyeone.constants import eNoError
+
+from colorimetry import WAVELENGTHS, spectrumToXYZ, spectrumToxyY
+
+# returned if a simulated measurement fails
+MEASUREMENT_FAILED = eNoError + 1
+
+
+class SimulatedTubesModel(object):
+    """
+    Model of the light of the tubes in the booth.
+
+    Attributes:
+        parameters: 3 x 3 array
+            parameters (a, b, c) of the luminance function
+            a + (b - a)*exp(-exp(c)*voltage) for red, green, and blue
+
+        peaks, widths: arrays of 3 floats
+            peak wavelength and standard deviation in nm of the spectrum
+            of red, green, and blue; the chromaticities follow from the
+            spectra
+
+        warmup_amplitudes: array of 3 floats
+            relative loss of luminance of each channel right after
+            switching on
+
+        warmup_tau: float
+            time constant of the warm-up in seconds
+
+        ambient: float
+            luminance of achromatic stray light in cd/m^2
+
+    """
+    def __init__(self):
+        self.parameters = np.array([[67.8, -6.7, -9.0],
+                                    [138.7, -16.4, -8.9],
+                                    [58.2, -2.7, -9.8]])
+        self.peaks = np.array([611.0, 545.0, 450.0])
+        self.widths = np.array([18.0, 22.0, 20.0])
+        self.warmup_amplitudes = np.array([0.10, 0.06, 0.14])
+        self.warmup_tau = 3600.0
+        self.ambient = 0.02
+
+    def luminance(self, voltages):
+        """
+        Returns the luminance of red, green, and blue for the voltages as
+        an array of shape (..., 3). Negative values are set to zero.
+
+        """
+        voltages = np.asarray(voltages, dtype=float)
+        a, b, c = self.parameters.T
+        Y = a + (b - a)*np.exp(-np.exp(c)*voltages)
+        return np.maximum(Y, 0.0)
+
+    def warmUpFactor(self, on_time):
+        """
+        Returns the relative luminance of red, green, and blue after the
+        tubes were switched on for *on_time* seconds.
+
+        """
+        return 1.0 - self.warmup_amplitudes*math.exp(
+                -max(on_time, 0.0)/self.warmup_tau)
+
+    def XYZ(self, channel_Y):
+        """
+        Returns XYZ of the mixture for the luminance of each channel
+        (array of shape (..., 3)).
+
+        """
+        return spectrumToXYZ(self.spectrum(channel_Y))
+
+    def spectrum(self, channel_Y):
+        """
+        Returns the spectral radiance in W/(sr m^2 nm) (36 bands from 380
+        to 730 nm) of the mixture for the luminance of each channel (array
+        of shape (..., 3)).
+
+        """
+        shapes = np.exp(-0.5*((WAVELENGTHS[:, np.newaxis] - self.peaks)
+                /self.widths)**2)
+        flat = np.ones(len(WAVELENGTHS))
+        # scale every spectrum to a luminance of 1 cd/m^2
+        shapes /= spectrumToXYZ(shapes.T)[:, 1]
+        flat /= spectrumToXYZ(flat)[1]
+        return np.dot(np.asarray(channel_Y), shapes.T) + self.ambient*flat
+
+
+class SimulatedEyeOne(object):
+    """
+    Replaces eyeone.eyeone.EyeOne and measures simulated tubes.
+
+    The simulated photometer has to be attached to a DevTubes object with
+    simulate=True. CalibTubes(eyeone, simulate=True) does this
+    automatically.
+
+    """
+    def __init__(self, model=None, seed=None, on_time=4*3600.0):
+        """
+        Parameters:
+            model: *None* or SimulatedTubesModel
+                model of the tubes, if None the default model is used
+
+            seed: *None* or int
+                seed for the measurement noise
+
+            on_time: *14400.0* or float
+                seconds the tubes are switched on at virtual time 0
+
+        """
+        self.model = model if model is not None else SimulatedTubesModel()
+        self.random = np.random.RandomState(seed)
+        self.on_time = on_time
+        self.is_calibrated = False
+
+        self.settling_tau = 0.2 # lag of the light after a change in s
+        self.measurement_time = 0.3 # duration of one measurement in s
+        self.relative_noise = 0.002 # relative sd of Y
+        self.absolute_noise = 0.01 # sd of Y in cd/m^2
+        self.spectral_noise = 0.001 # relative sd of each band
+        self.failure_rate = 0.0 # probability that a measurement fails
+
+        self.devtub = None
+        self.clock = None
+        self.channel_state = None
+        self.timeline_index = 0
+        self.tri_stim = np.zeros(3)
+        self.spectrum = np.zeros(36)
+
+    def attachDevTubes(self, devtub):
+        """
+        Measure the tubes controlled by *devtub* (DevTubes with
+        simulate=True) from now on.
+
+        """
+        if devtub.virtual_clock is None:
+            raise ValueError("SimulatedEyeOne needs DevTubes with"
+                    + " simulate=True.")
+        self.devtub = devtub
+        self.clock = devtub.virtual_clock
+        self.ports = (devtub.red_out, devtub.green_out, devtub.blue_out)
+        target = self.model.luminance((devtub.U_r, devtub.U_g, devtub.U_b))
+        # (time of last change, light at that time, light it approaches)
+        self.channel_state = [[self.clock.time(), Y, Y] for Y in target]
+        self.timeline_index = len(devtub.wascocard.timeline)
+
+    def channelLuminance(self):
+        """
+        Returns the luminance of red, green, and blue at the moment,
+        including the lag after changes of the voltages and the warm-up.
+
+        """
+        if self.devtub is None:
+            raise ValueError("Attach the SimulatedEyeOne to simulated"
+                    + " tubes with attachDevTubes first.")
+        timeline = self.devtub.wascocard.timeline
+        for (t, port, value) in timeline[self.timeline_index:]:
+            if not port in self.ports:
+                continue
+            state = self.channel_state[self.ports.index(port)]
+            state[1] = self._lagged(state, t)
+            state[0] = t
+            state[2] = float(self.model.luminance(
+                [value, value, value])[self.ports.index(port)])
+        self.timeline_index = len(timeline)
+        now = self.clock.time()
+        Y = np.array([self._lagged(state, now) for state in
+            self.channel_state])
+        return Y * self.model.warmUpFactor(self.on_time + now)
+
+    def _lagged(self, state, t):
+        t_change, light, target = state
+        return target + (light - target)*math.exp(-(t - t_change)
+                /self.settling_tau)
+
+    def calibrate(self):
+        print("Measurement mode set to SingleEmission.")
+        print("Color space set to CIExyY.")
+        print("\nPlease put i1 Pro on calibration plate and press key to"
+                + " start calibration.")
+        print("Calibration of i1 Pro done.")
+        self.is_calibrated = True
+
+    def I1_SetOption(self, key, value):
+        return eNoError
+
+    def I1_KeyPressed(self):
+        return eNoError
+
+    def I1_Calibrate(self):
+        self.is_calibrated = True
+        return eNoError
+
+    def I1_TriggerMeasurement(self):
+        """
+        Measures the simulated tubes. Like the real device a failed
+        measurement leaves the last results untouched.
+
+        """
+        if self.random.uniform() < self.failure_rate:
+            self.clock.sleep(self.measurement_time)
+            return MEASUREMENT_FAILED
+        channel_Y = self.channelLuminance()
+        spectrum = self.model.spectrum(channel_Y)
+        Y = spectrumToXYZ(spectrum)[1]
+        noise = self.random.normal(0, 1)*np.hypot(self.relative_noise*Y,
+                self.absolute_noise)
+        spectrum *= (1.0 + noise/Y)*(1.0 + self.random.normal(0,
+                self.spectral_noise, len(spectrum)))
+        # like the i1 Pro, the tristimulus values are computed from the
+        # measured spectrum
+        self.spectrum = spectrum
+        self.tri_stim = spectrumToxyY(spectrum)
+        self.clock.sleep(self.measurement_time)
+        return eNoError
+
+    def I1_GetTriStimulus(self, tri_stim, index):
+        for i, value in enumerate(self.tri_stim):
+            tri_stim[i] = value
+        return eNoError
+
+    def I1_GetSpectrum(self, spectrum, index):
+        for i, value in enumerate(self.spectrum):
+            spectrum[i] = value
+        return eNoError
+
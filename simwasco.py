@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./simwasco.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) VirtualClock
+#          (2) SimulatedWasco
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module provides a simulated wasco card, which records every value
+written to it, and a virtual clock, which advances the time without
+sleeping. Together they allow to run ramps and whole calibrations of the
+tubes in a few milliseconds (e.g. in tests and benchmarks).
+
+Use them via DevTubes(simulate=True), Tubes(simulate=True), or
+CalibTubes(eyeone, simulate=True).
+
+"""
+
+import numpy as np
+
+
+class VirtualClock(object):
+    """
+    Clock whose time only advances, when sleep is called.
+
+    Example:
+
+    >>> clock = VirtualClock()
+    >>> clock.sleep(0.5)
+    >>> clock.time()
+    0.5
+
+    """
+    def __init__(self, start=0.0):
+        """
+        Parameters:
+            start: *0.0* or float
+                time in seconds the clock starts with
+
+        """
+        self.now = float(start)
+
+    def time(self):
+        """
+        Returns the virtual time in seconds.
+
+        """
+        return self.now
+
+    def sleep(self, seconds):
+        """
+        Advances the virtual time by *seconds* immediately.
+
+        """
+        if seconds > 0:
+            self.now += seconds
+
+
+class SimulatedWasco(object):
+    """
+    Replaces wasco.wasco.Wasco and records a timeline of all values written
+    with wasco_outportW.
+
+    Example:
+
+    >>> clock = VirtualClock()
+    >>> wasco = SimulatedWasco(clock)
+    >>> wasco.wasco_outportW(wasco.boardId, 3, 0x400)
+    >>> clock.sleep(0.01)
+    >>> wasco.wasco_outportW(wasco.boardId, 3, 0x432)
+    >>> wasco.writeCount(3)
+    2
+    >>> wasco.finalValue(3)
+    1074
+    >>> wasco.maxSlewRate(3)
+    5.0
+
+    """
+    def __init__(self, clock, boardId=0):
+        """
+        Parameters:
+            clock: VirtualClock
+                clock which gives the time stamps of the timeline
+
+            boardId: *0* or int
+                id of the simulated board
+
+        """
+        self.clock = clock
+        self.boardId = boardId
+        self.timeline = list() # (time, port, value) of every write
+        self.port_values = dict()
+
+    def wasco_outportW(self, boardId, port, value):
+        """
+        Writes *value* to *port* and records it in the timeline.
+
+        """
+        self.timeline.append( (self.clock.time(), port, int(value)) )
+        self.port_values[port] = int(value)
+
+    def wasco_inportW(self, boardId, port):
+        """
+        Returns the value written last to *port* (0 if nothing was
+        written).
+
+        """
+        return self.port_values.get(port, 0)
+
+    def portTimeline(self, port):
+        """
+        Returns the tuple (times, values) of numpy arrays with all writes to
+        *port*.
+
+        """
+        writes = [(t, value) for (t, p, value) in self.timeline if p == port]
+        if not writes:
+            return (np.empty(0), np.empty(0, dtype=int))
+        times, values = zip(*writes)
+        return (np.array(times, dtype=float), np.array(values, dtype=int))
+
+    def writeCount(self, port=None):
+        """
+        Returns the number of writes to *port* or to all ports, if *port*
+        is None.
+
+        """
+        if port is None:
+            return len(self.timeline)
+        return len(self.portTimeline(port)[1])
+
+    def finalValue(self, port):
+        """
+        Returns the value written last to *port* or None.
+
+        """
+        return self.port_values.get(port)
+
+    def maxSlewRate(self, port):
+        """
+        Returns the largest change between two consecutive writes to *port*
+        in counts per millisecond (inf if two different values were
+        written at the same time).
+
+        """
+        times, values = self.portTimeline(port)
+        if len(values) < 2:
+            return 0.0
+        diff = np.abs(np.diff(values)).astype(float)
+        # rounded to nanoseconds against the rounding errors of the clock
+        dt = np.round(np.diff(times) * 1000.0, 6)
+        moved = diff > 0
+        if not np.any(moved):
+            return 0.0
+        if np.any(dt[moved] <= 0):
+            return float("inf")
+        return float(np.max(diff[moved] / dt[moved]))
+
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./store.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) STORE_DTYPE
+#          (2) MeasurementStore
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module provides the class MeasurementStore, an append-only binary file
+for the measurements of the tubes, which can be read back without parsing.
+
+The file starts with a text header (magic line, size of the header, and a
+JSON object with the record type and the runs), which is followed by
+fixed-width records of the type STORE_DTYPE. A batch of measurements is
+written with one write call and the records are read as a numpy memory map,
+so that each field (voltages, xyY, spectrum, timestamp, run, channel) is
+available as an array. exportText writes the tab separated text of
+printing.TubesDataFile.
+
+Example:
+
+>>> import os, tempfile
+>>> filename = os.path.join(tempfile.mkdtemp(), "tubes.store")
+>>> store = MeasurementStore(filename)
+>>> run = store.startRun("calibrate", n=2)
+>>> store.append([(4095, 4095, 4095), (2048, 4095, 4095)],
+...              [(0.3, 0.3, 20.0), (0.3, 0.3, 10.0)], channel="red",
+...              run=run)
+2
+>>> store = MeasurementStore(filename) # e.g. months later
+>>> print("%i %s" % (len(store), store.runs[0]["name"]))
+2 calibrate
+>>> store.records["xyY"][:, 2].tolist()
+[20.0, 10.0]
+>>> store.select(channel="red")["voltages"][1].tolist()
+[2048, 4095, 4095]
+
+"""
+
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from measurement import SAMPLE_DTYPE
+
+# one measurement of the tubes with the run and the channel it belongs to
+STORE_DTYPE = np.dtype(SAMPLE_DTYPE.descr + [("run", np.int32),
+                                             ("channel", "S16")])
+
+MAGIC = "ACHROLAB MEASUREMENT STORE 1\n"
+
+
+class MeasurementStore(object):
+    """
+    Append-only binary file *filename* of measurements of the tubes.
+
+    If the file exists, it is opened for appending, otherwise it is
+    created. A record, which was only written partly during a crash, is
+    removed when the file is opened again.
+
+    Attributes:
+        runs: list of dicts
+            the runs with the keys name, start (seconds since the epoch),
+            and metadata
+
+        records: array of STORE_DTYPE
+            read-only memory map of all records
+
+    """
+    def __init__(self, filename, header_size=4096):
+        """
+        Parameters:
+            filename: str
+                name of the store
+
+            header_size: *4096* or int
+                bytes reserved for the header of a new file; it grows, if
+                there are more runs than fit into it
+
+        """
+        self.filename = filename
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            self._readHeader()
+            # remove a partly written last record
+            end = self.header_size + len(self)*self.dtype.itemsize
+            if os.path.getsize(filename) > end:
+                with open(filename, "r+b") as f:
+                    f.truncate(end)
+        else:
+            self.header_size = header_size
+            self.dtype = STORE_DTYPE
+            self.runs = list()
+            with open(filename, "wb"):
+                pass
+            self._writeHeader()
+
+    def _readHeader(self):
+        with open(self.filename, "rb") as f:
+            if f.read(len(MAGIC)).decode("ascii") != MAGIC:
+                raise ValueError("%s is not a measurement store"
+                        %self.filename)
+            self.header_size = int(f.read(16).decode("ascii"))
+            header = json.loads(f.read(self.header_size - len(MAGIC) -
+                16).decode("ascii"))
+        self.dtype = np.dtype([tuple([str(field[0]), str(field[1])] +
+            [tuple(shape) for shape in field[2:]]) for field in
+            header["dtype"]])
+        self.runs = header["runs"]
+
+    def _writeHeader(self):
+        text = json.dumps({"dtype": self.dtype.descr, "runs": self.runs})
+        size = self.header_size
+        while len(MAGIC) + 16 + len(text) + 1 > size:
+            size *= 2
+        if size != self.header_size:
+            self._moveRecords(size)
+        header = MAGIC + "%015i\n" %size + text
+        header += " "*(size - len(header) - 1) + "\n"
+        with open(self.filename, "r+b") as f:
+            f.write(header.encode("ascii"))
+
+    def _moveRecords(self, size):
+        # copies the records behind a larger header
+        temporary = self.filename + ".tmp"
+        with open(self.filename, "rb") as source:
+            with open(temporary, "wb") as target:
+                target.write(b" "*size)
+                source.seek(self.header_size)
+                shutil.copyfileobj(source, target)
+        if os.name == "nt":
+            os.remove(self.filename)
+        os.rename(temporary, self.filename)
+        self.header_size = size
+
+    def __len__(self):
+        return max(os.path.getsize(self.filename) - self.header_size,
+                0)//self.dtype.itemsize
+
+    def startRun(self, name, **metadata):
+        """
+        Adds a run (e.g. a calibration) with *name* and the keyword
+        arguments as metadata to the header and returns its number.
+
+        """
+        self.runs.append({"name": name, "start": time.time(),
+            "metadata": metadata})
+        self._writeHeader()
+        return len(self.runs) - 1
+
+    def append(self, voltages, xyY, spectra=None, timestamps=None,
+            channel="", run=-1, settling_times=None):
+        """
+        Appends measurements to the store with one write and returns the
+        number of records.
+
+        Parameters:
+            voltages: array of shape (N, 3)
+
+            xyY: array of shape (N, 3)
+
+            spectra: *None* or array of shape (N, 36)
+                None is stored as nan
+
+            timestamps: *None* or array of length N
+                seconds since the epoch, None is stored as nan
+
+            channel: *""* or str
+                name of the measured channel, e.g. "red"
+
+            run: *-1* or int
+                number of the run from startRun, -1 for no run
+
+            settling_times: *None* or array of length N
+                seconds the light settled before each measurement, None is
+                stored as nan; stores written before they were recorded
+                drop them
+
+        """
+        xyY = np.atleast_2d(np.asarray(xyY, dtype=float))
+        records = np.zeros(len(xyY), dtype=self.dtype)
+        records["voltages"] = np.reshape(voltages, (len(xyY), 3))
+        records["xyY"] = xyY
+        records["spectrum"] = np.nan if spectra is None else spectra
+        records["timestamp"] = np.nan if timestamps is None else timestamps
+        records["run"] = run
+        records["channel"] = channel
+        if "settling" in self.dtype.names:
+            records["settling"] = (np.nan if settling_times is None else
+                    settling_times)
+        with open(self.filename, "ab") as f:
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        return len(records)
+
+    def appendBatch(self, batch, channel="", run=-1):
+        """
+        Appends all samples of a measurement.MeasurementBatch.
+
+        """
+        data = batch.data[:len(batch)]
+        return self.append(data["voltages"], data["xyY"], data["spectrum"],
+                data["timestamp"], channel=channel, run=run,
+                settling_times=data["settling"])
+
+    @property
+    def records(self):
+        count = len(self)
+        if count == 0:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self.filename, dtype=self.dtype, mode="r",
+                offset=self.header_size, shape=(count,))
+
+    def select(self, run=None, channel=None):
+        """
+        Returns the records of *run* (None for all) and *channel* (None for
+        all).
+
+        """
+        records = self.records
+        selected = np.ones(len(records), dtype=bool)
+        if run is not None:
+            selected &= records["run"] == run
+        if channel is not None:
+            selected &= records["channel"] == channel.encode("ascii")
+        return records[selected]
+
+    def exportText(self, filename, delimiter="\t", run=None, channel=None):
+        """
+        Writes the records of *run* and *channel* (see select) to the text
+        file *filename* with the columns of printing.TubesDataFile (x, y,
+        Y, voltage_r, voltage_g, voltage_b, l1, ..., l36).
+
+        """
+        records = self.select(run, channel)
+        columns = (["x", "y", "Y", "voltage_r", "voltage_g", "voltage_b"] +
+                ["l" + str(i + 1) for i in range(records.dtype["spectrum"
+                    ].shape[0])])
+        table = np.hstack((records["xyY"], records["voltages"],
+            records["spectrum"]))
+        fmt = ["%.8g"]*3 + ["%d"]*3 + ["%.8g"]*(len(columns) - 6)
+        with open(filename, "w") as f:
+            np.savetxt(f, table, fmt=fmt, delimiter=delimiter,
+                    header=delimiter.join(columns), comments="")
+
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_calibtubes.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import numpy as np
+
+from ..calibtubes import CalibTubes
+from ..drift import CorrectedChannel
+from ..measurement import MeasurementBatch
+from ..simeyeone import SimulatedEyeOne
+from ..store import MeasurementStore
+
+class TestParameters(unittest.TestCase):
+
+    def test_load_old_parameters(self):
+        caltub = CalibTubes(SimulatedEyeOne(), simulate=True)
+        caltub.loadParameter(os.path.join(os.path.dirname(__file__),
+            "testdata", "lastParameterTubes.pkl"))
+        self.assertTrue(caltub.is_calibrated)
+        for p in (caltub.red_p1, caltub.red_p2, caltub.red_p3,
+                caltub.green_p1, caltub.green_p2, caltub.green_p3,
+                caltub.blue_p1, caltub.blue_p2, caltub.blue_p3):
+            self.assertTrue(np.isfinite(p))
+        self.assertEqual(caltub.primaries, None)
+        self.assertEqual(caltub.color_model, None)
+        self.assertEqual(caltub.baseline_xyY, None)
+        self.assertTrue(caltub.guessVoltages(20.0) is not None)
+
+class TestSettle(unittest.TestCase):
+
+    def setUp(self):
+        self.eyeone = SimulatedEyeOne(seed=4)
+        self.caltub = CalibTubes(self.eyeone, simulate=True)
+        self.eyeone.calibrate()
+        self.caltub.settling = "adaptive"
+        self.calls = {"trigger": 0, "tristimulus": 0}
+        trigger = self.eyeone.I1_TriggerMeasurement
+        tristimulus = self.eyeone.I1_GetTriStimulus
+        def countTrigger():
+            self.calls["trigger"] += 1
+            return trigger()
+        def countTriStimulus(tri_stim, index):
+            self.calls["tristimulus"] += 1
+            return tristimulus(tri_stim, index)
+        self.eyeone.I1_TriggerMeasurement = countTrigger
+        self.eyeone.I1_GetTriStimulus = countTriStimulus
+
+    def test_adaptive(self):
+        batch = MeasurementBatch(2)
+        for voltage in ((0x800, 0xFFF, 0xFFF), (0x800, 0x800, 0xFFF)):
+            settling = self.caltub.measureSample(voltage, 0.5,
+                    batch.tri_stim, batch.spectrum)
+            batch.record(voltage, self.caltub.time(), settling)
+        # the accepted reading is not read out a second time
+        self.assertTrue(self.calls["trigger"] > 4)
+        self.assertEqual(self.calls["tristimulus"], self.calls["trigger"])
+        # the settling time includes the accepted measurement
+        self.assertAlmostEqual(sum(self.caltub.settling_times),
+                self.calls["trigger"]*self.eyeone.measurement_time)
+        self.assertTrue(np.allclose(batch.settling_times,
+            self.caltub.settling_times))
+        model = self.eyeone.model
+        expected = (np.sum(model.luminance(batch.voltages), axis=1) +
+                model.ambient)
+        self.assertTrue(np.allclose(batch.xyY[:, 2], expected, rtol=0.02))
+
+    def test_failure(self):
+        self.eyeone.failure_rate = 1.0
+        tri_stim = MeasurementBatch(1).tri_stim
+        spectrum = MeasurementBatch(1).spectrum
+        self.caltub.measureSample((0x800, 0xFFF, 0xFFF), 0.5, tri_stim,
+                spectrum)
+        self.assertTrue(np.all(np.isnan(tri_stim[:])))
+        self.assertTrue(self.caltub.settling_times[-1] >=
+                self.caltub.settle_timeout)
+        self.assertEqual(self.calls["tristimulus"], 0)
+
+class TestCalibrate(unittest.TestCase):
+
+    def setUp(self):
+        self.eyeone = SimulatedEyeOne(seed=3)
+        self.eyeone.model.ambient = 1.0 # stray light in cd/m^2
+        self.caltub = CalibTubes(self.eyeone, simulate=True)
+        self.eyeone.calibrate()
+        self.directory = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory)
+        os.makedirs(os.path.join("calibdata", "measurements"))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def test_attended(self):
+        # like an attended calibration: the channel models contain the
+        # stray light, there is no baseline
+        caltub = self.caltub
+        ambient = self.eyeone.model.ambient
+        ((caltub.red_p1, caltub.red_p2, caltub.red_p3),
+         (caltub.green_p1, caltub.green_p2, caltub.green_p3),
+         (caltub.blue_p1, caltub.blue_p2, caltub.blue_p3)) = [(a + ambient,
+             b + ambient, c) for a, b, c in self.eyeone.model.parameters]
+        caltub.is_calibrated = True
+        caltub.calibration_time = caltub.time()
+        gain, offset = caltub.checkDrift()
+        self.assertTrue(np.allclose(gain, 1.0, atol=0.02))
+        self.assertTrue(np.allclose(offset, 0.0, atol=0.2))
+
+    def test_unattended(self):
+        caltub = self.caltub
+        # imi of the check, so that the light settles in the sweeps, too
+        output = StringIO()
+        stdout = sys.stdout
+        sys.stdout = output
+        try:
+            caltub.calibrate(imi=1.0, n=10, unattended=True,
+                    journal="journal.txt")
+        finally:
+            sys.stdout = stdout
+        self.assertTrue(caltub.baseline_xyY is not None)
+        # nobody has to put the i1 Pro in position or press a key
+        self.assertFalse("press key" in output.getvalue())
+        gain, offset = caltub.checkDrift()
+        self.assertTrue(np.allclose(gain, 1.0, atol=0.02))
+        self.assertTrue(np.allclose(offset, 0.0, atol=0.2))
+
+    def test_recalibrate(self):
+        caltub = self.caltub
+        caltub.calibrate(imi=1.0, n=10, unattended=True)
+        # the tubes lose 10 % of their light
+        self.eyeone.model.parameters[:, :2] *= 0.9
+        gain, offset = caltub.checkDrift()
+        self.assertTrue(np.allclose(gain, 0.9, atol=0.02))
+        caltub.calibrate(imi=1.0, n=10, unattended=True)
+        self.assertEqual(caltub.drift_model, None)
+        for channel in caltub.color_model.channels:
+            self.assertFalse(isinstance(channel, CorrectedChannel))
+        gain, offset = caltub.checkDrift()
+        self.assertTrue(np.allclose(gain, 1.0, atol=0.02))
+
+    def test_load_drift(self):
+        caltub = self.caltub
+        caltub.calibrate(imi=1.0, n=10, unattended=True)
+        caltub.checkDrift(filename="drift.json")
+        caltub.loadDrift("drift.json")
+        self.assertEqual(len(caltub.drift_model.checks), 1)
+        # the drift of the last calibration does not apply to a new one
+        caltub.calibrate(imi=1.0, n=10, unattended=True)
+        self.assertRaises(ValueError, caltub.loadDrift, "drift.json")
+        self.assertEqual(caltub.drift_model, None)
+
+    def test_attended_after_unattended(self):
+        caltub = self.caltub
+        caltub.calibrate(imi=1.0, n=10, unattended=True)
+        caltub.calibrate(imi=1.0, n=10)
+        self.assertEqual(caltub.baseline_xyY, None)
+        self.assertEqual(caltub.baseline_spectrum, None)
+        self.assertFalse(np.any(caltub.color_model.baseline_XYZ))
+
+    def test_settling_times(self):
+        caltub = self.caltub
+        caltub.settling = "adaptive"
+        caltub.calibrate(imi=1.0, n=10, unattended=True,
+                journal="journal.txt")
+        count = len(caltub.settling_times)
+        # every sample in the journal knows how long its light settled
+        with open("journal.txt") as f:
+            settling = [json.loads(line)["settling"] for line in f
+                    if '"settling"' in line]
+        self.assertEqual(len(settling), count)
+        self.assertTrue(np.allclose(settling, caltub.settling_times,
+            atol=1e-6))
+        os.remove("journal.txt")
+        caltub.calibrate(imi=1.0, n=10, unattended=True)
+        self.assertEqual(len(caltub.settling_times), count)
+
+    def test_lookup_table(self):
+        caltub = self.caltub
+        caltub.calibrate(imi=1.0, n=10)
+        caltub.saveParameter("parameters.pkl")
+        caltub.buildLookupTable(step=256)
+        self.assertTrue(caltub.color_lut.model is caltub.color_model)
+        caltub.calibrate(imi=1.0, n=10)
+        self.assertEqual(caltub.color_lut, None)
+        caltub.buildLookupTable(step=256)
+        caltub.loadParameter("parameters.pkl")
+        self.assertEqual(caltub.color_lut, None)
+
+    def test_store(self):
+        caltub = self.caltub
+        caltub.store = MeasurementStore("tubes.store")
+        caltub.calibrate(imi=1.0, n=10, robust=True)
+        for color in ("red", "green", "blue", "all"):
+            timestamps = caltub.store.select(channel=color)["timestamp"]
+            self.assertEqual(len(timestamps), 10)
+            self.assertTrue(np.all(np.isfinite(timestamps)))
+            self.assertTrue(np.all(np.diff(timestamps) > 0))
+
+    def test_remeasure_timestamps(self):
+        caltub = self.caltub
+        voltages, xyY, spectra, timestamps = caltub.measureOneColorChannel(
+                "red", imi=1.0, n=10, timestamps=True)
+        xyY = np.array(xyY)
+        xyY[3, 2] += 10.0
+        measurement = caltub.remeasureOutliers("red", (voltages, xyY,
+            spectra, timestamps), imi=1.0)
+        self.assertEqual(len(measurement), 4)
+        self.assertTrue(measurement[3][3] > timestamps[-1])
+        self.assertEqual(measurement[3][4], timestamps[4])
+
+    def test_operating_hours(self):
+        caltub = self.caltub
+        caltub.operating_hours = 120.0
+        caltub.calibrate(imi=1.0, n=10, unattended=True)
+        caltub.saveParameter("parameters.pkl")
+        loaded = CalibTubes(SimulatedEyeOne(), simulate=True)
+        loaded.loadParameter("parameters.pkl")
+        self.assertEqual(loaded.calibration_hours, 120.0)
+        caltub.operating_hours = 130.0
+        caltub.checkDrift()
+        self.assertEqual(caltub.drift_model.calibration_hours, 120.0)
+        self.assertEqual(caltub.drift_model.checks[0]["hours"], 130.0)
+
+    def test_save_load_baseline(self):
+        caltub = self.caltub
+        caltub.calibrate(imi=1.0, n=10, unattended=True)
+        caltub.saveParameter("parameters.pkl")
+        loaded = CalibTubes(SimulatedEyeOne(), simulate=True)
+        loaded.loadParameter("parameters.pkl")
+        self.assertEqual(loaded.baseline_xyY, caltub.baseline_xyY)
+        self.assertTrue(np.allclose(loaded.baseline_spectrum,
+            caltub.baseline_spectrum))
+        self.assertTrue(np.allclose(loaded.color_model.baseline_XYZ,
+            caltub.color_model.baseline_XYZ))
+        self.assertTrue(np.any(loaded.color_model.baseline_XYZ))
+        xyY = [(0.3, 0.3, 30.0), (0.35, 0.32, 50.0)]
+        self.assertEqual(loaded.guessVoltagesBatch(xyY)[0].tolist(),
+                caltub.guessVoltagesBatch(xyY)[0].tolist())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_colorimetry.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import unittest
+
+import numpy as np
+
+from ..colorimetry import (WAVELENGTHS, CMF_1931, CMF_1964, spectrumToXYZ,
+        spectrumToxyY, spectrumScale)
+
+class TestColorimetry(unittest.TestCase):
+
+    def test_tables(self):
+        self.assertEqual(len(WAVELENGTHS), 36)
+        self.assertEqual(CMF_1931.shape, (36, 3))
+        self.assertEqual(CMF_1964.shape, (36, 3))
+        self.assertEqual(WAVELENGTHS[np.argmax(CMF_1931[:, 1])], 560)
+
+    def test_equal_energy(self):
+        for observer in ("1931", "1964"):
+            x, y, Y = spectrumToxyY(np.ones(36), observer)
+            self.assertAlmostEqual(x, 1.0/3, places=3)
+            self.assertAlmostEqual(y, 1.0/3, places=3)
+        self.assertRaises(ValueError, spectrumToXYZ, np.ones(36), "1976")
+
+    def test_batch(self):
+        spectra = np.random.RandomState(0).uniform(0, 0.01, (5, 36))
+        XYZ = spectrumToXYZ(spectra)
+        self.assertEqual(XYZ.shape, (5, 3))
+        for i in range(5):
+            self.assertTrue(np.allclose(XYZ[i], spectrumToXYZ(spectra[i])))
+        self.assertEqual(spectrumToxyY(spectra, "1964").shape, (5, 3))
+
+    def test_spectrum_scale(self):
+        spectra = np.random.RandomState(1).uniform(0, 0.01, (5, 36))
+        Y = spectrumToXYZ(spectra, scale=1.5)[:, 1]
+        self.assertAlmostEqual(spectrumScale(spectra, Y), 1.5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_colorlut.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..colorlut import ColorLookupTable
+from ..tubemodel import ColorModel
+
+class TestColorLookupTable(unittest.TestCase):
+
+    def setUp(self):
+        self.model = ColorModel([(67.8, -6.7, -9.0), (138.7, -16.4, -8.9),
+            (58.2, -2.7, -9.8)], [[[0.3, 1.8], [0.05, 0.0]],
+                [[-0.1, 0.45], [0.02, 0.05]], [[0.5, 4.7], [3.0, 27.0]]])
+        self.voltages = np.random.RandomState(0).uniform(0x400, 0xFFF,
+                (200, 3))
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_from_model(self):
+        lut = ColorLookupTable.fromModel(self.model, step=128)
+        self.assertEqual(len(lut), 25**3)
+        self.assertEqual(lut.voltages.dtype, np.uint16)
+        # the nearest grid point is close to the voltages
+        voltages, distances = lut.lookup(self.model.xyY(self.voltages))
+        self.assertTrue(np.all(distances < 8.0))
+        voltages, feasible = lut.inverse(self.model.xyY(self.voltages))
+        self.assertTrue(np.all(feasible))
+        self.assertTrue(np.all(np.abs(voltages - self.voltages) <= 0.5 +
+            1e-9))
+
+    def test_from_measurements(self):
+        xyY = self.model.xyY(self.voltages)
+        xyY[0] = np.nan
+        lut = ColorLookupTable.fromMeasurements(self.voltages, xyY)
+        self.assertEqual(len(lut), 199)
+        voltages, distances = lut.lookup(xyY[1:5])
+        self.assertTrue(np.all(voltages == self.voltages[1:5].astype(
+            np.uint16)))
+        voltages, feasible = lut.inverse([(0.2, 0.7, 1000.0)])
+        self.assertFalse(feasible[0])
+
+    def test_save_load(self):
+        lut = ColorLookupTable.fromModel(self.model, step=256)
+        filename = os.path.join(self.directory, "lut.npz")
+        lut.save(filename)
+        loaded = ColorLookupTable.load(filename, model=self.model)
+        self.assertTrue(np.all(loaded.voltages == lut.voltages))
+        self.assertTrue(np.all(loaded.XYZ == lut.XYZ))
+        xyY = self.model.xyY(self.voltages[:10])
+        self.assertTrue(np.all(loaded.inverse(xyY)[0] ==
+            lut.inverse(xyY)[0]))
+
+if __name__ == "__main__":
+    unittest.main()
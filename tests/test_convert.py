@@ -11,7 +11,9 @@
 
 import unittest
 
-from ..convert import xyY2rgb
+import numpy as np
+
+from ..convert import xyY2rgb, xyY2XYZ, XYZ2xyY, XYZ2Lab
 from ..convert import Convert
 
 class ConvertTest(unittest.TestCase):
@@ -51,3 +53,21 @@ class ConvertTest(unittest.TestCase):
         #assert [round(x, 14) for x in self.convert.convertXyzToRgb((15.,
         #    15., 0))] == [3.823824, 3.118855, -1.452654]
 
+    def test_xyY2XYZ(self):
+        xyY = np.array([[.5, .5, 15.], [.3, .6, 40.], [.15, .06, 2.]])
+        for given, row in zip(xyY2XYZ(xyY), xyY):
+            expected = self.convert.convertXyYToXyz(row)
+            for idx, value in enumerate(given):
+                self.assertAlmostEqual(value, expected[idx], 8)
+        self.assertTrue(np.allclose(XYZ2xyY(xyY2XYZ(xyY)), xyY))
+        self.assertTrue(np.all(np.isnan(XYZ2xyY([0., 0., 0.])[:2])))
+
+    def test_XYZ2Lab(self):
+        white = [95.047, 100.0, 108.883]
+        # red of sRGB
+        Lab = XYZ2Lab([[41.24, 21.26, 1.93], white], white)
+        self.assertTrue(np.allclose(Lab[0], [53.24, 80.09, 67.20],
+            atol=0.02))
+        self.assertTrue(np.allclose(Lab[1], [100.0, 0.0, 0.0]))
+        self.assertAlmostEqual(XYZ2Lab([0.5, 0.5, 0.5], white)[0],
+                4.516, places=3)
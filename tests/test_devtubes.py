@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_devtubes.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import unittest
+
+from ..devtubes import DevTubes
+
+class TestDevTubes(unittest.TestCase):
+
+    def test_spin_time(self):
+        devtub = DevTubes(simulate=True)
+        clock = devtub.virtual_clock
+        slept = []
+        def sleep(seconds):
+            slept.append(seconds)
+            clock.sleep(seconds)
+        def busyClock():
+            # every reading of the clock takes a microsecond
+            clock.sleep(1e-6)
+            return clock.time()
+        devtub.clock = busyClock
+        devtub.sleep = sleep
+        devtub.spin_time = 0.002
+        devtub.setVoltages((0x400, 0x400, 0x400))
+        duration = devtub.last_ramp_times[-1]
+        # a step every millisecond, the ramp mostly sleeps
+        self.assertTrue(sum(slept) > 0.85*duration)
+        self.assertTrue(max(slept) < 0.001)
+        self.assertEqual(devtub.wascocard.finalValue(devtub.red_out),
+                0x400)
+
+if __name__ == "__main__":
+    unittest.main()
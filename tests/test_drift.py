@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_drift.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..drift import fitGainOffset, CorrectedChannel, DriftModel
+from ..tubemodel import LuminanceFunction, MonotoneSpline
+
+DAY = 86400.0
+
+class TestDrift(unittest.TestCase):
+
+    def test_fit_gain_offset(self):
+        predicted = np.array([10.0, 10.0, 20.0, np.nan])
+        gain, offset = fitGainOffset(predicted, 0.9*predicted + 0.2)
+        self.assertAlmostEqual(gain, 0.9)
+        self.assertAlmostEqual(offset, 0.2)
+        self.assertEqual(fitGainOffset([10.0, 10.0], [9.0, 9.0]), (0.9, 0.0))
+        self.assertRaises(ValueError, fitGainOffset, [np.nan], [1.0])
+
+    def test_corrected_channel(self):
+        for model in (LuminanceFunction(67.8, -6.7, -9.0),
+                MonotoneSpline([1024, 2048, 3072, 4095],
+                    [1.0, 9.0, 15.0, 20.0])):
+            channel = CorrectedChannel(model, gain=0.9, offset=0.5)
+            x = np.linspace(0x500, 0xF00, 7)
+            self.assertTrue(np.allclose(channel.luminance(x),
+                0.9*model.luminance(x) + 0.5))
+            self.assertTrue(np.allclose(channel.inverse(
+                channel.luminance(x)), x))
+            self.assertTrue(np.allclose(channel.derivative(x),
+                0.9*model.derivative(x)))
+
+    def test_correction(self):
+        drift = DriftModel(calibration_time=100.0, calibration_hours=50.0)
+        gain, offset = drift.correction(100.0 + 5*DAY)
+        self.assertEqual(gain.tolist(), [1.0]*3)
+        self.assertEqual(offset.tolist(), [0.0]*3)
+        # the gain of red falls by 1 % per day, blue by 1 % per 10 hours
+        for day, hours in ((2, 60.0), (4, 100.0), (6, 110.0)):
+            drift.addCheck(100.0 + day*DAY, (1 - 0.01*day, 1.0, 1 -
+                0.001*(hours - 50)), (0.0, 0.1, 0.0), hours=hours)
+        gain, offset = drift.correction(100.0 + 5*DAY, hours=90.0)
+        self.assertTrue(np.allclose(gain, [0.95, 1.0, 0.96]))
+        # without operating hours only the days are used
+        gain, offset = drift.correction(100.0 + 5*DAY)
+        self.assertAlmostEqual(gain[0], 0.95)
+        self.assertTrue(0.0 < offset[1] < 0.2)
+
+    def test_no_extrapolation(self):
+        drift = DriftModel(calibration_time=100.0, calibration_hours=50.0)
+        drift.addCheck(100.0 + 2*DAY, (0.98, 1.0, 1.0), (0.0, 0.0, 0.0),
+                hours=60.0)
+        drift.addCheck(100.0 + 4*DAY, (0.96, 1.0, 0.9), (0.0, 0.0, 0.0),
+                hours=100.0)
+        # after the last check the correction of the last check holds
+        last = drift.correction(100.0 + 4*DAY, hours=100.0)[0]
+        for hours in (100.0, 5000.0):
+            gain = drift.correction(100.0 + 400*DAY, hours)[0]
+            self.assertTrue(np.allclose(gain, last))
+        self.assertTrue(np.allclose(drift.correction(100.0 + 40*DAY)[0],
+            drift.correction(100.0 + 4*DAY)[0]))
+        self.assertTrue(np.allclose(drift.correction(100.0 - 10*DAY)[0],
+            drift.correction(100.0)[0]))
+
+    def test_save_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "drift.json")
+            drift = DriftModel(calibration_time=0.0)
+            drift.addCheck(DAY, (0.9, 1.0, 1.1), (0.0, 0.1, 0.2))
+            drift.save(filename)
+            loaded = DriftModel.load(filename)
+            self.assertEqual(loaded.checks, drift.checks)
+            self.assertTrue(np.allclose(loaded.correction(2*DAY)[0],
+                drift.correction(2*DAY)[0]))
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_journal.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ..journal import CalibrationJournal
+
+class TestCalibrationJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "journal.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def writeRed(self, journal, n):
+        for i in range(n):
+            journal.append("red", (4095 - i, 4095, 4095), (0.6, 0.3, i),
+                    [0.1]*36, timestamp=i)
+
+    def test_resume(self):
+        journal = CalibrationJournal(self.filename, n=3, each=1)
+        self.writeRed(journal, 3)
+        journal.complete("red")
+        journal.append("green", (4095, 4095, 4095), (0.3, 0.6, 50.0),
+                [0.2]*36, timestamp=3.0, settling=0.6)
+
+        journal = CalibrationJournal(self.filename, n=3, each=1)
+        self.assertTrue(journal.isComplete("red"))
+        self.assertFalse(journal.isComplete("green"))
+        self.assertEqual(journal.count("red"), 3)
+        sample = journal.nextSample("green", (4095, 4095, 4095))
+        self.assertEqual(sample["xyY"], [0.3, 0.6, 50.0])
+        self.assertEqual(sample["settling"], 0.6)
+        self.assertFalse("settling" in journal.nextSample("red",
+            (4095, 4095, 4095)))
+        self.assertEqual(journal.nextSample("green", (4000, 4095, 4095)),
+                None)
+        journal.append("green", (4000, 4095, 4095), (0.3, 0.6, 49.0),
+                [0.2]*36, timestamp=4.0)
+        self.assertEqual(journal.count("green"), 2)
+
+    def test_other_voltage(self):
+        journal = CalibrationJournal(self.filename, n=3, each=1)
+        self.writeRed(journal, 2)
+        journal = CalibrationJournal(self.filename, n=3, each=1)
+        self.assertRaises(ValueError, journal.nextSample, "red",
+                (1024, 4095, 4095))
+
+    def test_other_settings(self):
+        CalibrationJournal(self.filename, n=3, each=1)
+        self.assertRaises(ValueError, CalibrationJournal, self.filename,
+                n=4, each=1)
+        self.assertRaises(ValueError, CalibrationJournal, self.filename,
+                n=3, each=1, unattended=True)
+        self.assertRaises(ValueError, CalibrationJournal, self.filename,
+                n=3, each=1, robust=True)
+        # the number of baseline measurements only counts unattended
+        CalibrationJournal(self.filename, n=3, each=1, n_baseline=7)
+
+    def test_baseline_settings(self):
+        CalibrationJournal(self.filename, n=3, each=1, unattended=True)
+        CalibrationJournal(self.filename, n=3, each=1, unattended=True,
+                n_baseline=5)
+        self.assertRaises(ValueError, CalibrationJournal, self.filename,
+                n=3, each=1, unattended=True, n_baseline=3)
+
+    def test_broken_last_line(self):
+        journal = CalibrationJournal(self.filename, n=3, each=1)
+        self.writeRed(journal, 2)
+        with open(self.filename, "a") as f:
+            f.write('{"channel": "red", "volt')
+        journal = CalibrationJournal(self.filename, n=3, each=1)
+        self.assertEqual(journal.count("red"), 2)
+        self.writeRed(journal, 1)
+        journal = CalibrationJournal(self.filename, n=3, each=1)
+        self.assertEqual(journal.count("red"), 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_measurement.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import unittest
+
+import numpy as np
+
+from ..measurement import MeasurementBatch, subtractBaseline
+
+class TestMeasurementBatch(unittest.TestCase):
+
+    def fill(self, batch, n):
+        for i in range(n):
+            for j in range(3):
+                batch.tri_stim[j] = i + j/10.0
+            for j in range(36):
+                batch.spectrum[j] = i
+            batch.record((i, 2*i, 3*i), timestamp=float(i),
+                    settling=0.5*i)
+
+    def test_record(self):
+        batch = MeasurementBatch(5)
+        self.fill(batch, 4)
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(batch.xyY.shape, (4, 3))
+        self.assertEqual(batch.spectra.shape, (4, 36))
+        self.assertEqual(batch.voltages[:, 1].tolist(), [0, 2, 4, 6])
+        self.assertEqual(batch.timestamps.tolist(), [0.0, 1.0, 2.0, 3.0])
+        self.assertEqual(batch.settling_times.tolist(), [0.0, 0.5, 1.0, 1.5])
+        # no sample aliases the buffers of the i1 Pro
+        self.assertTrue(np.allclose(batch.xyY[:, 0], [0, 1, 2, 3]))
+        self.assertTrue(np.all(batch.spectra[:, 0] == [0, 1, 2, 3]))
+
+    def test_full(self):
+        batch = MeasurementBatch(2)
+        self.fill(batch, 2)
+        self.assertRaises(IndexError, batch.record, (0, 0, 0), 0.0)
+
+    def test_getitem(self):
+        batch = MeasurementBatch(3)
+        self.fill(batch, 3)
+        voltage, xyY, spectrum = batch[1]
+        self.assertEqual(voltage, (1, 2, 3))
+        self.assertEqual(len(xyY), 3)
+        self.assertEqual(len(spectrum), 36)
+        self.assertEqual(batch[-1][0], (2, 4, 6))
+        self.assertEqual([sample[0] for sample in batch[1:]],
+                [(1, 2, 3), (2, 4, 6)])
+        self.assertRaises(IndexError, batch.__getitem__, 3)
+
+    def test_restore_order(self):
+        batch = MeasurementBatch(3)
+        self.fill(batch, 3)
+        batch.restoreOrder([2, 0, 1])
+        self.assertEqual(batch.voltages[:, 0].tolist(), [1, 2, 0])
+        self.assertEqual(batch.settling_times.tolist(), [0.5, 1.0, 0.0])
+
+    def test_unknown_settling(self):
+        batch = MeasurementBatch(2)
+        batch.record((0, 0, 0), timestamp=0.0)
+        batch.add((1, 1, 1), [0.3, 0.3, 1.0], [0.0]*36, 1.0, settling=0.2)
+        self.assertTrue(np.isnan(batch.settling_times[0]))
+        self.assertAlmostEqual(batch.settling_times[1], 0.2)
+
+    def test_subtract_baseline(self):
+        xyY = np.array([[0.25, 0.5, 10.0], [0.3, 0.3, 5.0]])
+        spectra = np.ones((2, 36))
+        baseline = (1.0/3, 1.0/3, 1.0)
+        corrected, corrected_spectra = subtractBaseline(xyY, spectra,
+                baseline, np.ones(36)*0.5)
+        # XYZ (5, 10, 5) - (1, 1, 1) = (4, 9, 4)
+        self.assertTrue(np.allclose(corrected[0], [4/17.0, 9/17.0, 9.0]))
+        self.assertEqual(corrected[1, 2], 4.0)
+        self.assertTrue(np.all(corrected_spectra == 0.5))
+
+if __name__ == "__main__":
+    unittest.main()
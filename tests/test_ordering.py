@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_ordering.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import unittest
+
+import numpy as np
+
+from ..ordering import (orderVoltages, pathLength, restoreOrder,
+        coarseToFine)
+
+class TestOrdering(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.voltages = [tuple(x) for x in
+                random.randint(0x400, 0x1000, (60, 3)).tolist()]
+        self.start = (0xFFF, 0xFFF, 0xFFF)
+
+    def test_order_voltages(self):
+        order = orderVoltages(self.voltages, start=self.start)
+        self.assertEqual(sorted(order), list(range(60)))
+        ordered = [self.voltages[i] for i in order]
+        self.assertTrue(pathLength(ordered, self.start) <
+                pathLength(self.voltages, self.start)/2)
+        self.assertEqual(orderVoltages([]), [])
+
+    def test_sweep(self):
+        sweep = [(v, 0xFFF, 0xFFF) for v in range(0x400, 0x1000, 0x100)]
+        order = orderVoltages(sweep, start=self.start)
+        self.assertEqual(order, list(range(len(sweep)))[::-1])
+
+    def test_repeated_voltages(self):
+        voltages = [v for v in self.voltages[:10] for i in range(4)]
+        order = orderVoltages(voltages, start=self.start)
+        ordered = [voltages[i] for i in order]
+        for i in range(0, 40, 4):
+            self.assertEqual(len(set(ordered[i:i + 4])), 1)
+
+    def test_counterbalance(self):
+        voltages = [v for v in self.voltages[:10] for i in range(4)]
+        order = orderVoltages(voltages, start=self.start,
+                counterbalance=True)
+        self.assertEqual(sorted(order), list(range(40)))
+        ordered = [voltages[i] for i in order]
+        self.assertEqual(ordered[:20], ordered[20:][::-1])
+
+    def test_restore_order(self):
+        order = orderVoltages(self.voltages, start=self.start)
+        results = [self.voltages[i] for i in order]
+        self.assertEqual(restoreOrder(results, order), self.voltages)
+        self.assertRaises(ValueError, restoreOrder, results[1:], order)
+
+    def test_coarse_to_fine(self):
+        for n in range(20):
+            self.assertEqual(sorted(coarseToFine(n)), list(range(n)))
+        order = coarseToFine(50)
+        self.assertEqual(order[:3], [0, 49, 24])
+        # the first 9 indices leave no gap larger than 7 steps
+        self.assertTrue(np.max(np.diff(sorted(order[:9]))) <= 7)
+
+if __name__ == "__main__":
+    unittest.main()
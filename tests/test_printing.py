@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_printing.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..printing import TubesDataFile, BackgroundTubesDataFile
+
+class TestBackgroundTubesDataFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.directory, "measure_tubes_")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def readLines(self):
+        filename = os.path.join(self.directory,
+                os.listdir(self.directory)[0])
+        with open(filename) as f:
+            return f.readlines()
+
+    def test_write_in_order(self):
+        xyY = [0.3, 0.3, 10.0]
+        with BackgroundTubesDataFile(prefix=self.prefix,
+                maxsize=2) as calib_file:
+            for i in range(50):
+                xyY[2] = float(i)
+                calib_file.write_data_txt(xyY=xyY, voltage=(i, i, i),
+                        spec_list=[0.0]*36)
+        lines = self.readLines()
+        self.assertEqual(len(lines), 51)
+        self.assertTrue(lines[0].startswith("x\ty\tY"))
+        for i, line in enumerate(lines[1:]):
+            values = line.split("\t")
+            self.assertEqual(float(values[2]), float(i))
+            self.assertEqual(int(values[3]), i)
+
+    def test_flush_on_error(self):
+        def measure():
+            with BackgroundTubesDataFile(prefix=self.prefix) as calib_file:
+                for i in range(10):
+                    calib_file.write_data_txt(xyY=(0.3, 0.3, i),
+                            voltage=(i, i, i), spec_list=[0.0]*36)
+                raise RuntimeError("photometer disconnected")
+        self.assertRaises(RuntimeError, measure)
+        self.assertEqual(len(self.readLines()), 11)
+
+    def test_write_data_array(self):
+        xyY = np.column_stack((np.full(4, 0.3), np.full(4, 0.4),
+            np.arange(4.0)))
+        xyY[1] = np.nan
+        voltages = [(i, 2*i, 3*i) for i in range(4)]
+        with TubesDataFile(prefix=self.prefix) as calib_file:
+            calib_file.write_data_array(xyY=xyY, voltage=voltages,
+                    spec_list=np.ones((4, 36))*0.25)
+            calib_file.write_data_array(xyY=xyY[:2], voltage=voltages[:2])
+        lines = self.readLines()
+        self.assertEqual(len(lines), 7)
+        self.assertTrue(lines[0].startswith("x\ty\tY"))
+        values = lines[4].rstrip("\n").split("\t")
+        self.assertEqual(len(values), 42)
+        self.assertEqual(values[:6], ["0.3", "0.4", "3", "3", "6", "9"])
+        self.assertEqual(float(values[41]), 0.25)
+        self.assertEqual(lines[2].split("\t")[2], "nan")
+        self.assertEqual(lines[6].rstrip("\n").split("\t")[6:], ["NA"]*36)
+
+if __name__ == "__main__":
+    unittest.main()
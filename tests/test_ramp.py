@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_ramp.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import unittest
+
+import numpy as np
+
+from ..ramp import computeRamp, changedMask, rampSteps, rampTimes
+
+class TestRamp(unittest.TestCase):
+
+    def test_compute_ramp(self):
+        ramp = computeRamp((0x400, 0xFFF, 0xFFF), (0xFFF, 0xFFF, 0x800),
+                614)
+        self.assertEqual(ramp.shape, (614, 3))
+        self.assertEqual(ramp[-1].tolist(), [0xFFF, 0xFFF, 0x800])
+        self.assertTrue(np.all(np.diff(ramp[:, 0]) >= 0))
+        self.assertTrue(np.all(ramp[:, 1] == 0xFFF))
+        self.assertTrue(np.all(np.diff(ramp[:, 2]) <= 0))
+
+    def test_empty_ramp(self):
+        ramp = computeRamp((1000, 1000, 1000), (1000, 1000, 1000), 0)
+        self.assertEqual(ramp.shape, (0, 3))
+
+    def test_changed_mask(self):
+        start = (0x400, 0xFFF, 0xFFF)
+        ramp = computeRamp(start, (0xFFF, 0xFFF, 0xFFF), 614)
+        changed = changedMask(ramp, start)
+        self.assertTrue(np.all(changed[:, 0]))
+        self.assertFalse(np.any(changed[:, 1:]))
+
+    def test_s_curve(self):
+        start = (0x400, 0x400, 0x400)
+        stop = (0xFFF, 0x800, 0x400)
+        steps = rampSteps(start, stop, 5, "s-curve")
+        ramp = computeRamp(start, stop, steps, "s-curve")
+        self.assertEqual(ramp[-1].tolist(), list(stop))
+        self.assertTrue(np.abs(np.diff(ramp, axis=0)).max() <= 5)
+
+    def test_ramp_times(self):
+        start = (0x400, 0xFFF, 0xFFF)
+        stop = (0xFFF, 0xFFF, 0xFFF)
+        steps = rampSteps(start, stop, 5)
+        ramp = computeRamp(start, stop, steps)
+        times = rampTimes(ramp, start, 5.0)
+        slope = np.diff(ramp[:, 0]) / np.diff(times) / 1000.0
+        self.assertEqual(len(times), steps)
+        self.assertAlmostEqual(times[-1], steps / 1000.0)
+        self.assertTrue(slope.max() <= 5.0 + 1e-9)
+        self.assertRaises(ValueError, rampTimes, ramp, start, 0)
+        self.assertRaises(ValueError, computeRamp, start, stop, steps,
+                "step")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_simeyeone.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import unittest
+
+import numpy as np
+
+from eyeone.constants import eNoError
+
+from ..colorimetry import spectrumToXYZ
+from ..devtubes import DevTubes
+from ..simeyeone import (SimulatedTubesModel, SimulatedEyeOne,
+        MEASUREMENT_FAILED)
+
+class TestSimulatedTubesModel(unittest.TestCase):
+
+    def setUp(self):
+        self.model = SimulatedTubesModel()
+
+    def test_luminance(self):
+        Y = self.model.luminance([0xFFF, 0xFFF, 0xFFF])
+        self.assertAlmostEqual(Y[0], 22.855, 3)
+        self.assertTrue(np.all(Y > 0))
+        # below the lowest voltages the tubes give no light
+        self.assertEqual(self.model.luminance([0x200]*3).tolist(),
+                [0.0]*3)
+        self.assertEqual(self.model.luminance(np.zeros((4, 3))).shape,
+                (4, 3))
+
+    def test_warm_up(self):
+        self.assertTrue(np.allclose(self.model.warmUpFactor(0.0),
+            1 - self.model.warmup_amplitudes))
+        self.assertTrue(np.allclose(self.model.warmUpFactor(1e6), 1.0))
+
+    def test_spectrum(self):
+        self.model.ambient = 0.5
+        XYZ = self.model.XYZ([10.0, 20.0, 5.0])
+        self.assertAlmostEqual(XYZ[1], 35.5)
+        self.assertTrue(np.allclose(spectrumToXYZ(self.model.spectrum(
+            [10.0, 20.0, 5.0])), XYZ))
+        # the light of the channels adds up
+        self.assertTrue(np.allclose(self.model.XYZ([10.0, 0.0, 0.0]) +
+            self.model.XYZ([0.0, 20.0, 0.0]) - self.model.XYZ([0.0]*3),
+            self.model.XYZ([10.0, 20.0, 0.0])))
+
+class TestSimulatedEyeOne(unittest.TestCase):
+
+    def setUp(self):
+        self.eyeone = SimulatedEyeOne(seed=1)
+        self.devtub = DevTubes(simulate=True)
+        self.eyeone.attachDevTubes(self.devtub)
+
+    def measure(self):
+        tri_stim = [0.0]*3
+        spectrum = [0.0]*36
+        error = self.eyeone.I1_TriggerMeasurement()
+        self.eyeone.I1_GetTriStimulus(tri_stim, 0)
+        self.eyeone.I1_GetSpectrum(spectrum, 0)
+        return (error, tri_stim, spectrum)
+
+    def test_attach(self):
+        self.assertRaises(ValueError, SimulatedEyeOne().attachDevTubes,
+                DevTubes(dummy=True))
+        self.assertRaises(ValueError, SimulatedEyeOne().channelLuminance)
+        self.assertTrue(np.allclose(self.eyeone.channelLuminance(),
+            self.eyeone.model.luminance([0xFFF]*3)*
+            self.eyeone.model.warmUpFactor(self.eyeone.on_time)))
+
+    def test_measurement(self):
+        start = self.devtub.virtual_clock.time()
+        error, tri_stim, spectrum = self.measure()
+        self.assertEqual(error, eNoError)
+        self.assertAlmostEqual(self.devtub.virtual_clock.time() - start,
+                self.eyeone.measurement_time)
+        expected = np.sum(self.eyeone.channelLuminance()) + \
+                self.eyeone.model.ambient
+        self.assertTrue(abs(tri_stim[2] - expected) < 0.02*expected)
+        self.assertTrue(abs(spectrumToXYZ(spectrum)[1] - tri_stim[2]) <
+                1e-6*tri_stim[2])
+
+    def test_settling(self):
+        self.devtub.setVoltages((0x400, 0xFFF, 0xFFF))
+        target = self.eyeone.model.luminance([0x400]*3)[0]
+        # right after the ramp the light has not settled yet
+        self.assertTrue(self.eyeone.channelLuminance()[0] > 1.5*target)
+        self.devtub.sleep(10*self.eyeone.settling_tau)
+        self.assertTrue(np.allclose(self.eyeone.channelLuminance()[0],
+            target*self.eyeone.model.warmUpFactor(self.eyeone.on_time +
+                self.devtub.virtual_clock.time())[0], rtol=1e-3))
+
+    def test_failure(self):
+        error, tri_stim, spectrum = self.measure()
+        self.eyeone.failure_rate = 1.0
+        self.devtub.setVoltages((0x800, 0x800, 0x800))
+        failed, tri_stim_failed, spectrum_failed = self.measure()
+        # a failed measurement leaves the last results untouched
+        self.assertEqual(failed, MEASUREMENT_FAILED)
+        self.assertEqual(tri_stim_failed, tri_stim)
+        self.assertEqual(spectrum_failed, spectrum)
+
+if __name__ == "__main__":
+    unittest.main()
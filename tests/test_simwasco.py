@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_simwasco.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import unittest
+
+from ..simwasco import VirtualClock, SimulatedWasco
+from ..ramp import computeRamp, rampTimes
+
+class TestSimulatedWasco(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.wasco = SimulatedWasco(self.clock)
+
+    def test_virtual_clock(self):
+        self.clock.sleep(0.25)
+        self.clock.sleep(-1.0)
+        self.assertEqual(self.clock.time(), 0.25)
+
+    def test_timeline(self):
+        start = (0x400, 0x400, 0x400)
+        ramp = computeRamp(start, (0x800, 0x400, 0x400), 205)
+        times = rampTimes(ramp, start, 5.0)
+        t0 = self.clock.time()
+        for t, row in zip(times, ramp):
+            self.clock.sleep(t0 + t - self.clock.time())
+            self.wasco.wasco_outportW(self.wasco.boardId, 3, row[0])
+        self.assertEqual(self.wasco.writeCount(3), 205)
+        self.assertEqual(self.wasco.writeCount(4), 0)
+        self.assertEqual(self.wasco.finalValue(3), 0x800)
+        self.assertEqual(self.wasco.wasco_inportW(0, 3), 0x800)
+        self.assertTrue(self.wasco.maxSlewRate(3) <= 5.0 + 1e-6)
+        self.assertAlmostEqual(self.clock.time(), 0.205)
+
+    def test_jump(self):
+        self.wasco.wasco_outportW(0, 2, 0x400)
+        self.wasco.wasco_outportW(0, 2, 0x800)
+        self.assertEqual(self.wasco.maxSlewRate(2), float("inf"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_store.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..measurement import MeasurementBatch
+from ..store import MeasurementStore
+
+class TestMeasurementStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "tubes.store")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def fill(self, store, n, channel="red", run=-1):
+        voltages = np.column_stack((np.arange(n), np.arange(n) + 1,
+            np.arange(n) + 2))
+        xyY = np.column_stack((np.full(n, 0.3), np.full(n, 0.4),
+            np.arange(n, dtype=float)))
+        spectra = np.outer(np.arange(n), np.ones(36))
+        store.append(voltages, xyY, spectra, np.arange(n) + 100.0,
+                channel=channel, run=run)
+
+    def test_append_and_read(self):
+        store = MeasurementStore(self.filename)
+        run = store.startRun("calibrate", n=5)
+        self.fill(store, 5, run=run)
+        self.fill(store, 3, channel="green")
+        store = MeasurementStore(self.filename)
+        self.assertEqual(len(store), 8)
+        self.assertEqual(store.runs[0]["metadata"], {"n": 5})
+        records = store.records
+        self.assertTrue(isinstance(records, np.memmap))
+        self.assertEqual(records["voltages"][4].tolist(), [4, 5, 6])
+        self.assertEqual(records["timestamp"][7], 102.0)
+        self.assertTrue(np.allclose(records["spectrum"][3], 3.0))
+        self.assertEqual(len(store.select(run=run)), 5)
+        self.assertEqual(store.select(channel="green")["xyY"][:, 2].tolist(),
+                [0.0, 1.0, 2.0])
+
+    def test_append_batch(self):
+        batch = MeasurementBatch(3)
+        for i in range(2):
+            batch.tri_stim[2] = i
+            batch.record((i, i, i), timestamp=float(i), settling=0.5)
+        store = MeasurementStore(self.filename)
+        store.appendBatch(batch, channel="baseline")
+        self.fill(store, 1)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.records["timestamp"][:2].tolist(), [0.0, 1.0])
+        self.assertEqual(store.records["settling"][:2].tolist(), [0.5, 0.5])
+        self.assertTrue(np.isnan(store.records["settling"][2]))
+
+    def test_broken_last_record(self):
+        store = MeasurementStore(self.filename)
+        self.fill(store, 4)
+        with open(self.filename, "ab") as f:
+            f.write(b"\0"*17)
+        store = MeasurementStore(self.filename)
+        self.assertEqual(len(store), 4)
+        self.fill(store, 1)
+        self.assertEqual(MeasurementStore(self.filename).records["voltages"][
+            4].tolist(), [0, 1, 2])
+
+    def test_header_grows(self):
+        store = MeasurementStore(self.filename, header_size=1024)
+        self.fill(store, 3)
+        for i in range(30):
+            store.startRun("check", comment="x"*20)
+        self.assertTrue(store.header_size > 1024)
+        store = MeasurementStore(self.filename)
+        self.assertEqual(len(store.runs), 30)
+        self.assertEqual(store.records["xyY"][:, 2].tolist(),
+                [0.0, 1.0, 2.0])
+
+    def test_export_text(self):
+        store = MeasurementStore(self.filename)
+        self.fill(store, 3)
+        filename = os.path.join(self.directory, "tubes.txt")
+        store.exportText(filename)
+        with open(filename) as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith("x\ty\tY\tvoltage_r"))
+        values = lines[2].split("\t")
+        self.assertEqual(len(values), 42)
+        self.assertEqual(float(values[2]), 1.0)
+        self.assertEqual(values[3], "1")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_tubemodel.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import unittest
+
+import numpy as np
+
+from ..convert import XYZ2xyY
+from ..tubemodel import (START_PARAMETERS, luminance, inverseLuminance,
+        targetVoltages, primariesFromSweep,
+        luminanceJacobian, predictionSd, startParameters, fitChannels,
+        fitChannel, fitChannelRobust, IncrementalFit, ColorModel,
+        MonotoneSpline, channelModels, _fit_cache)
+
+class TestTubeModel(unittest.TestCase):
+
+    def test_inverse_luminance(self):
+        x = np.arange(0x400, 0x1000, 100)
+        p = START_PARAMETERS["green"]
+        self.assertTrue(np.allclose(inverseLuminance(luminance(x, *p), *p),
+            x))
+
+    def test_target_voltages(self):
+        parameters = np.array([START_PARAMETERS[color] for color in
+            ("red", "green", "blue")])
+        primaries = np.array([(1.8, 1.0, 0.0), (0.45, 1.0, 0.05),
+            (4.7, 1.0, 27.0)])
+        voltages = np.random.RandomState(5).randint(0x400, 0x1000, (100, 3))
+        channel_Y = luminance(voltages, *parameters.T)
+        xyY = XYZ2xyY(np.dot(channel_Y, primaries))
+        guessed, feasible = targetVoltages(xyY, parameters, primaries)
+        self.assertEqual(guessed.shape, (100, 3))
+        self.assertTrue(np.all(feasible))
+        self.assertTrue(np.all(np.abs(guessed - voltages) <= 1))
+        guessed, feasible = targetVoltages((0.33, 0.33, 1000.0), parameters,
+                primaries)
+        self.assertEqual(guessed.tolist(), [[0xFFF, 0xFFF, 0xFFF]])
+        self.assertFalse(feasible[0])
+        # chromaticity of a sweep
+        sweep = XYZ2xyY(np.outer(channel_Y[:, 0], primaries[0]))
+        sweep[3] = np.nan
+        self.assertTrue(np.allclose(primariesFromSweep(sweep), primaries[0]))
+
+    def test_monotone_spline(self):
+        p = START_PARAMETERS["red"]
+        x = np.repeat(np.linspace(0x400, 0xFFF, 12), 2)
+        y = luminance(x, *p) + np.tile([-0.1, 0.1], 12)
+        y[4] = np.nan
+        y[10] += 3.0 # not monotone
+        spline = MonotoneSpline(x, y)
+        self.assertEqual(len(spline.knots_x), 12)
+        self.assertTrue(np.all(np.diff(spline.knots_y) >= 0))
+        voltages = np.arange(0x300, 0x1100, 7)
+        Y = spline.luminance(voltages)
+        self.assertTrue(np.all(np.diff(Y) >= 0))
+        self.assertTrue(np.allclose(Y, luminance(voltages, *p), atol=2.0))
+        inside = (voltages >= 0x400) & (voltages <= 0xFFF)
+        self.assertTrue(np.allclose(spline.luminance(spline.inverse(
+            Y[inside])), Y[inside], atol=1e-3))
+        numeric = (spline.luminance(voltages + 0.5) -
+                spline.luminance(voltages - 0.5))
+        self.assertTrue(np.allclose(spline.derivative(voltages), numeric,
+            atol=1e-3))
+        self.assertRaises(ValueError, MonotoneSpline, [1024, 1024],
+                [1.0, 2.0])
+        # splines and parameters are both channel models
+        models = channelModels([spline, p])
+        self.assertTrue(models[0] is spline)
+        self.assertTrue(np.allclose(models[1].inverse(Y),
+            inverseLuminance(Y, *p)))
+
+    def test_jacobian(self):
+        x = np.linspace(0x400, 0xFFF, 20)
+        p = np.array(START_PARAMETERS["red"])
+        jacobian = luminanceJacobian(x, *p)
+        for i in range(3):
+            dp = np.zeros(3)
+            dp[i] = 1e-6
+            numeric = (luminance(x, *(p + dp)) - luminance(x, *(p - dp)))/2e-6
+            self.assertTrue(np.allclose(jacobian[:, i], numeric, rtol=1e-5,
+                atol=1e-6))
+
+    def test_fit_channel(self):
+        random = np.random.RandomState(1)
+        p = START_PARAMETERS["blue"]
+        x = np.linspace(0x400, 0xFFF, 30)
+        y = luminance(x, *p) + random.normal(0, 0.05, len(x))
+        popt, pcov = fitChannel(x, y, (50.0, 0.0, -9.5))
+        candidates = np.linspace(0x400, 0xFFF, 50)
+        sd = predictionSd(candidates, popt, pcov)
+        self.assertEqual(sd.shape, (50,))
+        self.assertTrue(np.all(sd > 0))
+        self.assertTrue(np.all(sd < 0.1))
+        error = np.abs(luminance(candidates, *popt) -
+                luminance(candidates, *p))
+        self.assertTrue(np.all(error < 4*sd + 0.01))
+
+    def test_start_parameters(self):
+        x = np.linspace(0x400, 0xFFF, 10)
+        p = START_PARAMETERS["green"]
+        self.assertTrue(np.allclose(startParameters(x, luminance(x, *p)), p,
+            rtol=0.02))
+        self.assertRaises(ValueError, startParameters, [1024, 1024, 4095],
+                [1.0, 1.0, 20.0])
+
+    def test_fit_channels(self):
+        random = np.random.RandomState(2)
+        x = np.linspace(0x400, 0xFFF, 20)
+        data = dict((color, (x, luminance(x, *START_PARAMETERS[color]) +
+            random.normal(0, 0.05, len(x)))) for color in START_PARAMETERS)
+        fits = fitChannels(data, use_cache=False)
+        self.assertEqual(sorted(fits.keys()), sorted(data.keys()))
+        for color in data:
+            popt, pcov = fitChannel(*data[color])
+            self.assertTrue(np.allclose(fits[color][0], popt))
+            self.assertTrue(np.allclose(fits[color][1], pcov, rtol=1e-4))
+        # the second fit of the same data comes from the cache
+        size = len(_fit_cache)
+        first = fitChannels(data)
+        self.assertEqual(len(_fit_cache), size + 1)
+        cached = _fit_cache[next(reversed(_fit_cache))]
+        cached["red"][0][0] += 1.0
+        try:
+            second = fitChannels(data)
+        finally:
+            cached["red"][0][0] -= 1.0
+        self.assertEqual(len(_fit_cache), size + 1)
+        self.assertEqual(second["red"][0][0], first["red"][0][0] + 1.0)
+        # other starting values are fitted again
+        fitChannels(data, p0={"red": START_PARAMETERS["red"]})
+        self.assertEqual(len(_fit_cache), size + 2)
+
+    def test_fit_channel_robust(self):
+        random = np.random.RandomState(4)
+        p = START_PARAMETERS["green"]
+        x = np.linspace(0x400, 0xFFF, 40)
+        y = luminance(x, *p) + random.normal(0, 0.1, len(x))
+        y[5] += 30.0
+        y[20] = np.nan
+        y[33] -= 5.0
+        popt, pcov, inliers = fitChannelRobust(x, y)
+        self.assertEqual(np.flatnonzero(~inliers).tolist(), [5, 20, 33])
+        self.assertTrue(np.allclose(luminance(x, *popt), luminance(x, *p),
+            atol=0.3))
+        # failed measurements are left out of the least-squares fit, too
+        popt_ls, pcov_ls = fitChannel(x[inliers], y[inliers])
+        self.assertTrue(np.allclose(popt, popt_ls))
+
+    def test_incremental_fit(self):
+        random = np.random.RandomState(3)
+        p = START_PARAMETERS["red"]
+        fit = IncrementalFit(tolerance=0.1)
+        self.assertEqual(fit.update(0x400, luminance(0x400, *p)), None)
+        voltages = random.uniform(0x400, 0xFFF, 200)
+        for i, x in enumerate(voltages):
+            fit.update(x, luminance(x, *p) + random.normal(0, 0.05))
+            if fit.isStable():
+                break
+        self.assertTrue(i < 199)
+        self.assertTrue(np.all(fit.predictionSd() < 0.1))
+        # the same estimate as a fit of all data at once
+        popt, pcov = fitChannel(fit.x[:fit.n], fit.y[:fit.n])
+        self.assertTrue(np.allclose(luminance(fit.grid, *fit.popt),
+            luminance(fit.grid, *popt), atol=1e-4))
+        self.assertTrue(np.allclose(luminance(fit.grid, *fit.popt),
+            luminance(fit.grid, *p), atol=0.3))
+
+    def test_color_model(self):
+        parameters = np.array([START_PARAMETERS[color] for color in
+            ("red", "green", "blue")])
+        coefficients = np.array([[[0.3, 1.8], [0.05, 0.0]],
+            [[-0.1, 0.45], [0.02, 0.05]], [[0.5, 4.7], [3.0, 27.0]]])
+        model = ColorModel(parameters, coefficients)
+        # the model is estimated again from the sweeps of the channels
+        sweep = np.linspace(0x400, 0xFFF, 20)
+        sweeps = dict()
+        for i, color in enumerate(("red", "green", "blue")):
+            Y = luminance(sweep, *parameters[i])
+            XYZ = np.column_stack((Y*np.polyval(coefficients[i, 0],
+                sweep/0xFFF), Y, Y*np.polyval(coefficients[i, 1],
+                    sweep/0xFFF)))
+            sweeps[color] = (sweep, XYZ2xyY(XYZ))
+        estimated = ColorModel.fromSweeps(sweeps, parameters=parameters)
+        self.assertTrue(np.allclose(estimated.coefficients, coefficients,
+            atol=1e-3))
+        voltages = np.random.RandomState(6).uniform(0x400, 0xFFF, (50, 3))
+        self.assertTrue(np.allclose(model.validate(voltages,
+            model.xyY(voltages)), 0.0))
+        # numerical derivatives
+        step = 1e-3
+        numeric = np.stack([(model.XYZ(voltages + step*np.eye(3)[i]) -
+            model.XYZ(voltages - step*np.eye(3)[i]))/(2*step)
+            for i in range(3)], axis=2)
+        self.assertTrue(np.allclose(model.jacobian(voltages), numeric,
+            rtol=1e-5, atol=1e-8))
+        # inverse
+        inverse, feasible = model.inverse(model.xyY(voltages))
+        self.assertTrue(np.all(feasible))
+        self.assertTrue(np.all(np.abs(inverse - voltages) <= 0.5 + 1e-9))
+        inverse, feasible = model.inverse([(0.33, 0.33, 1000.0)])
+        self.assertFalse(feasible[0])
+        # without a baseline the Newton steps start at targetVoltages
+        constant = ColorModel(parameters, coefficients[:, :, -1:])
+        primaries = np.column_stack((coefficients[:, 0, -1], np.ones(3),
+            coefficients[:, 1, -1]))
+        start, feasible = constant.inverse([(0.33, 0.33, 40.0)],
+                iterations=0)
+        self.assertEqual(start.tolist(), targetVoltages((0.33, 0.33, 40.0),
+            parameters, primaries)[0].tolist())
+
+    def test_color_model_interaction(self):
+        parameters = np.array([START_PARAMETERS[color] for color in
+            ("red", "green", "blue")])
+        coefficients = [[[1.8], [0.0]], [[0.45], [0.05]], [[4.7], [27.0]]]
+        interaction = [(0.02, -0.05, 0.0), (0.0, -0.08, 0.0),
+                (0.0, 0.03, 0.0)]
+        model = ColorModel(parameters, coefficients, (0.3, 0.3, 0.5),
+                interaction=interaction)
+        additive = ColorModel(parameters, coefficients, (0.3, 0.3, 0.5))
+        voltages = np.random.RandomState(7).uniform(0x400, 0xFFF, (50, 3))
+        # single channels are not changed
+        single = voltages.copy()
+        single[:, 1] = inverseLuminance(0.0, *parameters[1])
+        single[:, 2] = inverseLuminance(0.0, *parameters[2])
+        self.assertFalse(np.allclose(model.XYZ(voltages),
+            additive.XYZ(voltages)))
+        self.assertTrue(np.allclose(model.XYZ(single), additive.XYZ(single)))
+        step = 1e-3
+        numeric = np.stack([(model.XYZ(voltages + step*np.eye(3)[i]) -
+            model.XYZ(voltages - step*np.eye(3)[i]))/(2*step)
+            for i in range(3)], axis=2)
+        self.assertTrue(np.allclose(model.jacobian(voltages), numeric,
+            rtol=1e-5, atol=1e-8))
+        inverse, feasible = model.inverse(model.xyY(voltages))
+        self.assertTrue(np.all(feasible))
+        self.assertTrue(np.all(np.abs(inverse - voltages) <= 0.5 + 1e-9))
+        # fitted to a sweep of all channels
+        sweep = np.repeat(np.linspace(0x400, 0xFFF, 20)[:, np.newaxis], 3,
+                axis=1)
+        xyY = model.xyY(sweep)
+        xyY[2] = np.nan
+        fitted = additive.fitInteraction(sweep, xyY, degree=2)
+        self.assertTrue(np.allclose(fitted, interaction, atol=1e-6))
+        self.assertTrue(np.allclose(additive.validate(sweep, xyY), 0.0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_tubes.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import threading
+import time
+import unittest
+
+from ..tubes import Tubes, TransitionFuture
+
+class TestTransitionFuture(unittest.TestCase):
+
+    def test_result(self):
+        future = TransitionFuture((1000, 1000, 1000))
+        self.assertFalse(future.done())
+        self.assertFalse(future.wait(0.01))
+        self.assertRaises(RuntimeError, future.result, 0.01)
+        future._setResult((1000, 1000, 1000))
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), (1000, 1000, 1000))
+
+    def test_exception(self):
+        future = TransitionFuture((1000, 1000, 1000))
+        future._setException(ValueError("wasco card failed"))
+        self.assertTrue(future.done())
+        self.assertRaises(ValueError, future.result)
+
+class TestTubes(unittest.TestCase):
+
+    def setUp(self):
+        self.tub = Tubes(simulate=True)
+        # the first step of the next ramp waits for self.gate
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        sleep = self.tub.devtub.sleep
+        def gatedSleep(seconds):
+            self.started.set()
+            self.gate.wait(5.0)
+            sleep(seconds)
+        self.tub.devtub.sleep = gatedSleep
+
+    def tearDown(self):
+        self.gate.set()
+
+    def redWrites(self):
+        devtub = self.tub.devtub
+        return [value for (t, port, value) in devtub.wascocard.timeline if
+                port == devtub.red_out]
+
+    def test_set_voltages_async(self):
+        self.gate.set()
+        future = self.tub.setVoltagesAsync([0x800, 0x900, 0xA00])
+        self.assertEqual(future.result(5.0), (0x800, 0x900, 0xA00))
+        self.assertEqual(self.tub.currentVoltages(), (0x800, 0x900, 0xA00))
+        future = self.tub.setVoltagesAsync(("a", 0x900, 0xA00))
+        self.assertRaises(ValueError, future.result, 5.0)
+
+    def test_coalescing(self):
+        first = self.tub.setVoltagesAsync((0x400, 0x400, 0x400))
+        self.assertTrue(self.started.wait(5.0))
+        # the first ramp is still waiting for its first step
+        second = self.tub.setVoltagesAsync((0x800, 0x800, 0x800))
+        third = self.tub.setVoltagesAsync((0xE00, 0xE00, 0xE00))
+        self.assertFalse(first.done())
+        self.gate.set()
+        for future in (first, second, third):
+            self.assertEqual(future.result(5.0), (0xE00, 0xE00, 0xE00))
+        # the first ramp was aborted, the second never started
+        self.assertTrue(min(self.redWrites()) >= 0xE00)
+
+    def test_set_voltages_while_async(self):
+        self.tub.setVoltagesAsync((0x400, 0x400, 0x400))
+        self.assertTrue(self.started.wait(5.0))
+        thread = threading.Thread(target=self.tub.setVoltages,
+                args=((0xE00, 0xE00, 0xE00),))
+        thread.start()
+        # setVoltages hands its transition to the running worker
+        for i in range(500):
+            if self.tub._pending:
+                break
+            time.sleep(0.01)
+        self.gate.set()
+        thread.join(5.0)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.tub.currentVoltages(), (0xE00, 0xE00, 0xE00))
+        self.assertTrue(min(self.redWrites()) >= 0xE00)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tests/test_warmup.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+import unittest
+
+import numpy as np
+
+from ..warmup import fitDrift, linearTrend, WarmUpMonitor
+
+class TestWarmUp(unittest.TestCase):
+
+    def test_fit_drift(self):
+        t = np.arange(0, 3*3600, 300.0)
+        values = 20.0 - 2.0*np.exp(-t/2400.0)
+        values[4] = np.nan
+        final, amplitude, tau = fitDrift(t + 1000.0, values)
+        self.assertAlmostEqual(final, 20.0, places=4)
+        self.assertAlmostEqual(amplitude, -2.0, places=4)
+        self.assertAlmostEqual(tau, 2400.0, places=0)
+        self.assertRaises(ValueError, fitDrift, [0, 1, 2], [1, np.nan, 2])
+
+    def test_linear_trend(self):
+        t = np.arange(10.0)
+        slope, se = linearTrend(t, 3.0 + 0.5*t)
+        self.assertAlmostEqual(slope, 0.5)
+        self.assertAlmostEqual(se, 0.0)
+        self.assertEqual(linearTrend([1, 1, 1], [1, 2, 3])[1], float("inf"))
+
+    def test_monitor(self):
+        random = np.random.RandomState(8)
+        calls = list()
+        monitor = WarmUpMonitor(callback=calls.append)
+        warm = list()
+        for t in np.arange(0, 8*3600, 300.0):
+            factor = 1 - 0.15*np.exp(-t/3600.0)
+            Y = 20.0*factor*(1 + random.normal(0, 0.002))
+            warm.append(monitor.update(t, (0.31 + 0.01*factor, 0.33, Y)))
+        self.assertFalse(any(warm[:5]))
+        first = warm.index(True)
+        self.assertEqual(monitor.warm_time, 300.0*first)
+        # the real drift left is close to the tolerance
+        self.assertTrue(0.15*np.exp(-monitor.warm_time/3600.0) <
+                2*monitor.tolerance)
+        self.assertEqual(calls, [monitor])
+
+if __name__ == "__main__":
+    unittest.main()
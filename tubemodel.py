@@ -0,0 +1,1010 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./tubemodel.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) luminance
+#          (2) inverseLuminance
+#          (3) LuminanceFunction
+#          (4) MonotoneSpline
+#          (5) channelModels
+#          (6) targetVoltages
+#          (7) luminanceJacobian
+#          (8) predictionSd
+#          (9) startParameters
+#          (10) fitChannels
+#          (11) fitChannel
+#          (12) fitChannelRobust
+#          (13) IncrementalFit
+#          (14) primariesFromSweep
+#          (15) ColorModel
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module provides the luminance function of the tubes, a non-linear
+regression model based on Pinheiro & Bates (2000):
+
+    Y = a + (b - a)*exp(-exp(c)*voltage)
+
+for every color channel of the tubes, and the functions to fit it to
+measurements. MonotoneSpline is a non-parametric alternative, which
+interpolates the measurements and can not fail.
+
+All channels are fitted in one least-squares problem with the analytic
+Jacobian. The results are cached with a hash of the data as key, so that
+fitting the same data again costs nothing.
+
+Example:
+
+>>> x = np.linspace(0x400, 0xFFF, 10)
+>>> data = {"red": (x, luminance(x, 67.8, -6.7, -9.0)),
+...         "blue": (x, luminance(x, 58.2, -2.7, -9.8))}
+>>> fits = fitChannels(data)
+>>> popt, pcov = fits["red"]
+>>> print("%.1f %.1f %.1f" % tuple(popt))
+67.8 -6.7 -9.0
+
+"""
+
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+from scipy.interpolate import PchipInterpolator
+from scipy.optimize import least_squares
+
+from convert import xyY2XYZ, XYZ2xyY
+
+# starting values from an old calibration
+START_PARAMETERS = {"red": (67.8, -6.7, -9.0),
+                    "green": (138.7, -16.4, -8.9),
+                    "blue": (58.2, -2.7, -9.8),
+                    "all": (264.7, -25.8, -9.0)}
+
+
+def luminance(x, a, b, c):
+    """
+    Returns the luminance for voltages *x*.
+
+    Example:
+
+    >>> print("%.2f" % luminance(0xFFF, 67.8, -6.7, -9.0))
+    22.86
+
+    """
+    x = np.asarray(x, dtype=float)
+    return a + (b - a)*np.exp(-np.exp(c)*x)
+
+
+def inverseLuminance(y, a, b, c):
+    """
+    Returns the voltages (as floats) which give luminance *y*.
+
+    Example:
+
+    >>> print("%.0f" % inverseLuminance(22.8552, 67.8, -6.7, -9.0))
+    4095
+
+    """
+    y = np.asarray(y, dtype=float)
+    return -np.log((y - a)/(b - a))/np.exp(c)
+
+
+class LuminanceFunction(object):
+    """
+    Luminance function with the parameters *a*, *b*, *c* of one channel.
+    It has the same methods as MonotoneSpline.
+
+    """
+    def __init__(self, a, b, c):
+        self.a = float(a)
+        self.b = float(b)
+        self.c = float(c)
+
+    def luminance(self, x):
+        """
+        Returns the luminance for voltages *x*.
+
+        """
+        return luminance(x, self.a, self.b, self.c)
+
+    def inverse(self, y):
+        """
+        Returns the voltages (as floats) which give luminance *y*.
+
+        """
+        return inverseLuminance(y, self.a, self.b, self.c)
+
+    def derivative(self, x):
+        """
+        Returns the derivative of the luminance by the voltage at *x*.
+
+        """
+        x = np.asarray(x, dtype=float)
+        return (self.a - self.b)*np.exp(self.c)*np.exp(-np.exp(self.c)*x)
+
+
+class MonotoneSpline(object):
+    """
+    Non-parametric luminance function of one channel: a monotone piecewise
+    cubic (PCHIP) interpolation of the measured luminances.
+
+    Repeated voltages are averaged and the means are made non-decreasing
+    (pool adjacent violators), so that any data with at least two
+    different voltages give a monotone function. Outside the measured
+    voltages the function continues linearly.
+
+    The inverse uses a table of the luminance at every integer voltage
+    between the measured voltages. Evaluation and inversion are
+    vectorized and need O(log n) per value.
+
+    Example:
+
+    >>> spline = MonotoneSpline([1024, 2048, 3072, 4095],
+    ...                         [1.0, 9.0, 15.0, 20.0])
+    >>> print("%.1f" % spline.luminance(3072))
+    15.0
+    >>> print("%.1f" % spline.inverse(15.0))
+    3072.0
+
+    """
+    def __init__(self, x, y):
+        """
+        Parameters:
+            x, y: arrays
+                measured voltages and luminances; failed measurements
+                (nan) are left out
+
+        Raises ValueError, if there are less than 2 different voltages.
+
+        """
+        x = np.asarray(x, dtype=float).ravel()
+        y = np.asarray(y, dtype=float).ravel()
+        finite = np.isfinite(x) & np.isfinite(y)
+        x = x[finite]
+        y = y[finite]
+        knots, inverse_index = np.unique(x, return_inverse=True)
+        if len(knots) < 2:
+            raise ValueError("at least 2 different voltages are needed")
+        counts = np.bincount(inverse_index).astype(float)
+        means = np.bincount(inverse_index, weights=y)/counts
+        self.knots_x = knots
+        self.knots_y = _poolAdjacentViolators(means, counts)
+        self._pchip = PchipInterpolator(self.knots_x, self.knots_y,
+                extrapolate=False)
+        self._dpchip = self._pchip.derivative()
+        self._slopes = (float(self._dpchip(knots[0])),
+                float(self._dpchip(knots[-1])))
+        self.table_x = np.arange(np.ceil(knots[0]), np.floor(knots[-1]) + 1)
+        self.table_y = np.maximum.accumulate(self._pchip(self.table_x))
+
+    def luminance(self, x):
+        """
+        Returns the luminance for voltages *x*.
+
+        """
+        x = np.asarray(x, dtype=float)
+        low, high = self.knots_x[0], self.knots_x[-1]
+        y = self._pchip(np.clip(x, low, high))
+        y = np.where(x < low, self.knots_y[0] + self._slopes[0]*(x - low), y)
+        return np.where(x > high, self.knots_y[-1] + self._slopes[1]*(x -
+            high), y)
+
+    def derivative(self, x):
+        """
+        Returns the derivative of the luminance by the voltage at *x*.
+
+        """
+        x = np.asarray(x, dtype=float)
+        low, high = self.knots_x[0], self.knots_x[-1]
+        dy = self._dpchip(np.clip(x, low, high))
+        dy = np.where(x < low, self._slopes[0], dy)
+        return np.where(x > high, self._slopes[1], dy)
+
+    def inverse(self, y):
+        """
+        Returns the voltages (as floats) which give luminance *y*. Values
+        out of the measured range give the lowest or highest measured
+        voltage.
+
+        """
+        y = np.asarray(y, dtype=float)
+        table_x = self.table_x
+        table_y = self.table_y
+        upper = np.clip(np.searchsorted(table_y, y), 1, len(table_y) - 1)
+        lower = upper - 1
+        width = table_y[upper] - table_y[lower]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraction = np.where(width > 0, (y - table_y[lower])/width, 0.0)
+        x = table_x[lower] + np.clip(fraction, 0.0, 1.0)*(table_x[upper] -
+                table_x[lower])
+        return np.where(np.isfinite(y), x, np.nan)
+
+
+def _poolAdjacentViolators(y, weights):
+    # weighted least-squares non-decreasing fit to y
+    values = list()
+    sizes = list()
+    blocks = list()
+    for value, weight in zip(y, weights):
+        values.append(value)
+        sizes.append(weight)
+        blocks.append(1)
+        while len(values) > 1 and values[-2] > values[-1]:
+            weight = sizes[-2] + sizes[-1]
+            values[-2] = (values[-2]*sizes[-2] + values[-1]*sizes[-1])/weight
+            sizes[-2] = weight
+            blocks[-2] += blocks[-1]
+            del values[-1], sizes[-1], blocks[-1]
+    return np.repeat(values, blocks)
+
+
+def channelModels(parameters):
+    """
+    Returns a list of channel models (LuminanceFunction or MonotoneSpline)
+    for *parameters*, whose items are channel models or parameters
+    (a, b, c).
+
+    """
+    return [p if hasattr(p, "inverse") else LuminanceFunction(*p) for p in
+            parameters]
+
+
+def targetVoltages(xyY, parameters, primaries, baseline_xyY=None,
+        low=0x400, high=0xFFF):
+    """
+    Returns the voltages for an array of target colors *xyY* (shape (N,
+    3)) as integer array of shape (N, 3) and a boolean array of length N,
+    which is False for targets the tubes can not produce.
+
+    The light of the tubes adds up in XYZ, so the luminances of red,
+    green, and blue follow from a linear system and the voltages from the
+    inverse luminance function of each channel. Luminances out of the
+    range of a channel are clipped to the range.
+
+    Parameters:
+        xyY: array of shape (N, 3) or (3,)
+            target colors
+
+        parameters: array of shape (3, 3) or list of 3 channel models
+            parameters (a, b, c) of the luminance function or the models
+            (see channelModels) of red, green, and blue
+
+        primaries: array of shape (3, 3)
+            XYZ of red, green, and blue per cd/m^2 (one row per channel)
+
+        baseline_xyY: *None* or triple
+            light of the tubes at their off level, which is subtracted
+            from the targets
+
+        low, high: *0x400*, *0xFFF* or int
+            range of the voltages
+
+    Example:
+
+    >>> parameters = [(67.8, -6.7, -9.0), (138.7, -16.4, -8.9),
+    ...               (58.2, -2.7, -9.8)]
+    >>> primaries = [(1.8, 1.0, 0.0), (0.45, 1.0, 0.05), (4.7, 1.0, 27.0)]
+    >>> voltages, feasible = targetVoltages([(0.33, 0.33, 40.0),
+    ...         (0.33, 0.33, 400.0)], parameters, primaries)
+    >>> voltages.tolist(), feasible.tolist()
+    ([[2291, 2399, 1281], [4095, 4095, 4095]], [True, False])
+
+    """
+    XYZ = np.atleast_2d(xyY2XYZ(xyY))
+    if baseline_xyY is not None:
+        XYZ = XYZ - xyY2XYZ(baseline_xyY)
+    channel_Y = np.linalg.solve(np.asarray(primaries, dtype=float).T,
+            XYZ.T).T
+    models = channelModels(parameters)
+    limits = np.array([[model.luminance(low) for model in models],
+        [model.luminance(high) for model in models]])
+    Y_min = limits.min(axis=0)
+    Y_max = limits.max(axis=0)
+    with np.errstate(invalid="ignore"):
+        feasible = np.all((channel_Y >= Y_min) & (channel_Y <= Y_max),
+                axis=1)
+    channel_Y = np.clip(np.nan_to_num(channel_Y), Y_min, Y_max)
+    voltages = np.column_stack([model.inverse(channel_Y[:, i]) for i, model
+        in enumerate(models)])
+    voltages = np.clip(np.round(voltages), low, high)
+    return (voltages.astype(int), feasible)
+
+
+def luminanceJacobian(x, a, b, c):
+    """
+    Returns the derivatives of the luminance function with respect to the
+    parameters a, b, c as array of shape (len(x), 3).
+
+    """
+    x = np.asarray(x, dtype=float)
+    decay = np.exp(-np.exp(c)*x)
+    return np.column_stack((1.0 - decay, decay,
+        -(b - a)*decay*np.exp(c)*x))
+
+
+def predictionSd(x, popt, pcov):
+    """
+    Returns the standard deviation of the predicted luminance at voltages
+    *x*, which results from the uncertainty of the parameters *popt*
+    (covariance matrix *pcov*).
+
+    """
+    jacobian = luminanceJacobian(x, *popt)
+    variance = np.sum(np.dot(jacobian, pcov)*jacobian, axis=1)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def startParameters(x, y, c_grid=np.linspace(-12.0, -6.0, 61)):
+    """
+    Returns starting values (a, b, c) for the fit of voltages *x* and
+    luminances *y*. For a fixed c the luminance function is linear in a
+    and b, so a and b are solved for every c in *c_grid* and the c with
+    the smallest squared error is taken.
+
+    Raises ValueError, if there are less than 3 different voltages.
+
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(np.unique(x)) < 3:
+        raise ValueError("at least 3 different voltages are needed")
+    decay = np.exp(-np.exp(c_grid)[:, np.newaxis]*x)
+    rise = 1.0 - decay
+    s11 = np.sum(rise*rise, axis=1)
+    s12 = np.sum(rise*decay, axis=1)
+    s22 = np.sum(decay*decay, axis=1)
+    t1 = np.dot(rise, y)
+    t2 = np.dot(decay, y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        det = s11*s22 - s12*s12
+        a = (s22*t1 - s12*t2)/det
+        b = (s11*t2 - s12*t1)/det
+        sse = np.sum((y - a[:, np.newaxis]*rise - b[:, np.newaxis]*decay)
+                **2, axis=1)
+    sse[~np.isfinite(sse)] = np.inf
+    best = int(np.argmin(sse))
+    if not np.isfinite(sse[best]):
+        raise ValueError("no starting values found")
+    return (float(a[best]), float(b[best]), float(c_grid[best]))
+
+
+# cache of fitChannels: hash of the data -> results
+_fit_cache = OrderedDict()
+CACHE_SIZE = 256
+
+
+def _dataKey(channels, xs, ys, p0=None):
+    key = hashlib.sha1()
+    for channel, x, y in zip(channels, xs, ys):
+        key.update(str(channel).encode("utf-8"))
+        key.update(np.ascontiguousarray(x).tobytes())
+        key.update(np.ascontiguousarray(y).tobytes())
+        if p0 is not None and channel in p0:
+            key.update(b"p0")
+            key.update(np.asarray(p0[channel], dtype=float).tobytes())
+    return key.hexdigest()
+
+
+def fitChannels(data, p0=None, use_cache=True):
+    """
+    Fits the luminance function to all channels in *data* at once and
+    returns a dict with (popt, pcov) for every channel like
+    scipy.optimize.curve_fit.
+
+    Parameters:
+        data: dict
+            channel name -> (voltages, luminances) with at least 3
+            different voltages per channel; failed measurements (nan)
+            are left out
+
+        p0: *None* or dict
+            channel name -> starting values (a, b, c); channels without
+            starting values get them from startParameters
+
+        use_cache: *True* or False
+            if True and the same data was fitted before with the same
+            starting values, the cached results are returned (other
+            starting values can lead to another optimum)
+
+    Raises RuntimeError, if the fit does not converge.
+
+    """
+    channels = sorted(data.keys())
+    xs = [np.asarray(data[ch][0], dtype=float).ravel() for ch in channels]
+    ys = [np.asarray(data[ch][1], dtype=float).ravel() for ch in channels]
+    finite = [np.isfinite(x) & np.isfinite(y) for x, y in zip(xs, ys)]
+    xs = [x[mask] for x, mask in zip(xs, finite)]
+    ys = [y[mask] for y, mask in zip(ys, finite)]
+    key = _dataKey(channels, xs, ys, p0)
+    if use_cache and key in _fit_cache:
+        return dict((ch, (popt.copy(), pcov.copy())) for ch, (popt, pcov)
+                in _fit_cache[key].items())
+
+    start = list()
+    for ch, x, y in zip(channels, xs, ys):
+        if p0 is not None and ch in p0:
+            start.extend(p0[ch])
+        else:
+            start.extend(startParameters(x, y))
+    x = np.concatenate(xs)
+    y = np.concatenate(ys)
+    group = np.concatenate([np.repeat(i, len(v)) for i, v in
+        enumerate(xs)])
+    rows = np.arange(len(x))
+    columns = 3*group[:, np.newaxis] + np.arange(3)
+
+    def residuals(params):
+        a, b, c = params.reshape(-1, 3)[group].T
+        return a + (b - a)*np.exp(-np.exp(c)*x) - y
+
+    def jacobian(params):
+        a, b, c = params.reshape(-1, 3)[group].T
+        jac = np.zeros((len(x), len(params)))
+        decay = np.exp(-np.exp(c)*x)
+        jac[rows[:, np.newaxis], columns] = np.column_stack((1.0 - decay,
+            decay, -(b - a)*decay*np.exp(c)*x))
+        return jac
+
+    result = least_squares(residuals, np.array(start, dtype=float),
+            jac=jacobian, method="lm", x_scale="jac")
+    if result.status <= 0 or not np.all(np.isfinite(result.x)):
+        raise RuntimeError("fit of the luminance function did not converge: "
+                + result.message)
+
+    fits = dict()
+    for i, ch in enumerate(channels):
+        popt = result.x[3*i:3*i + 3].copy()
+        mask = group == i
+        jac = result.jac[mask][:, 3*i:3*i + 3]
+        dof = np.sum(mask) - 3
+        try:
+            if dof <= 0:
+                raise np.linalg.LinAlgError("no degrees of freedom")
+            pcov = np.linalg.inv(np.dot(jac.T, jac)) * (
+                    np.sum(result.fun[mask]**2)/dof)
+        except np.linalg.LinAlgError:
+            pcov = np.empty((3, 3))
+            pcov.fill(np.inf)
+        fits[ch] = (popt, pcov)
+
+    if use_cache:
+        _fit_cache[key] = fits
+        while len(_fit_cache) > CACHE_SIZE:
+            _fit_cache.popitem(last=False)
+    return dict((ch, (popt.copy(), pcov.copy())) for ch, (popt, pcov) in
+            fits.items())
+
+
+def fitChannel(x, y, p0=None):
+    """
+    Fits the luminance function to voltages *x* and luminances *y* and
+    returns (popt, pcov) like scipy.optimize.curve_fit. If *p0* is None,
+    the starting values come from the data.
+
+    Raises RuntimeError, if the fit does not converge.
+
+    """
+    return fitChannels({"channel": (x, y)},
+            None if p0 is None else {"channel": p0})["channel"]
+
+
+def _robustScale(residuals):
+    # standard deviation of the residuals estimated by their median
+    scale = 1.4826*np.median(np.abs(residuals))
+    return max(scale, 1e-9)
+
+
+def fitChannelRobust(x, y, p0=None, loss="soft_l1", threshold=4.0):
+    """
+    Fits the luminance function to voltages *x* and luminances *y* with a
+    robust loss and rejects the measurements, which are further than
+    *threshold* robust standard deviations away from the fit. The
+    remaining measurements are fitted again like with fitChannel.
+
+    Returns (popt, pcov, inliers), where inliers is a boolean array, which
+    is False for rejected and failed (nan) measurements.
+
+    Parameters:
+        loss: *"soft_l1"* or "huber", "cauchy", "arctan"
+            loss function of scipy.optimize.least_squares
+
+        threshold: *4.0* or float
+            rejection threshold in robust standard deviations
+
+    Raises RuntimeError, if the fit does not converge, and ValueError, if
+    there are not enough measurements.
+
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+    finite = np.isfinite(x) & np.isfinite(y)
+    x_finite = x[finite]
+    y_finite = y[finite]
+    if p0 is None:
+        p0 = startParameters(x_finite, y_finite)
+    scale = _robustScale(luminance(x_finite, *p0) - y_finite)
+
+    def residuals(params):
+        return luminance(x_finite, *params) - y_finite
+
+    def jacobian(params):
+        return luminanceJacobian(x_finite, *params)
+
+    result = least_squares(residuals, np.array(p0, dtype=float),
+            jac=jacobian, method="trf", loss=loss, f_scale=scale,
+            x_scale="jac")
+    if result.status <= 0 or not np.all(np.isfinite(result.x)):
+        raise RuntimeError("robust fit of the luminance function did not"
+                + " converge: " + result.message)
+    distance = np.abs(luminance(x, *result.x) - y)
+    scale = _robustScale(distance[finite])
+    inliers = finite.copy()
+    inliers[finite] = distance[finite] <= threshold*scale
+    popt, pcov = fitChannel(x[inliers], y[inliers], result.x)
+    return (popt, pcov, inliers)
+
+
+class IncrementalFit(object):
+    """
+    Estimate of the luminance function of one channel, which is updated
+    after every new measurement.
+
+    Every update makes a few damped Gauss-Newton steps, which start at the
+    last estimate, so an update costs only a few passes over the data. The
+    estimate is stable, when the predicted luminances on *grid* changed
+    less than *tolerance* in the last *window* updates and their standard
+    deviation is smaller than *tolerance*, too.
+
+    Example:
+
+    >>> fit = IncrementalFit(tolerance=0.05)
+    >>> for x in (0x400, 0xFFF, 0xA00, 0x700, 0xD00, 0x580, 0x880, 0xB80):
+    ...     popt = fit.update(x, luminance(x, 58.2, -2.7, -9.8))
+    >>> print("%.1f %.1f %.1f" % tuple(fit.popt))
+    58.2 -2.7 -9.8
+    >>> fit.isStable()
+    True
+
+    """
+    def __init__(self, grid=None, tolerance=0.05, window=3, iterations=3):
+        """
+        Parameters:
+            grid: *None* or array of voltages
+                voltages at which the predictions have to be stable, by
+                default 32 voltages from 0x400 to 0xFFF
+
+            tolerance: *0.05* or float
+                largest change and standard deviation of the predicted
+                luminance in cd/m^2
+
+            window: *3* or int
+                number of updates the predictions have to be stable
+
+            iterations: *3* or int
+                Gauss-Newton steps per update
+
+        """
+        if grid is None:
+            grid = np.linspace(0x400, 0xFFF, 32)
+        self.grid = np.asarray(grid, dtype=float)
+        self.tolerance = tolerance
+        self.window = window
+        self.iterations = iterations
+        self.x = np.zeros(64)
+        self.y = np.zeros(64)
+        self.n = 0
+        self.popt = None
+        self.pcov = None
+        self.changes = list() # largest change of the predictions per update
+        self._damping = 1e-3
+
+    def update(self, x, y):
+        """
+        Adds the measurement of luminance *y* at voltage *x* and returns
+        the new parameters (a, b, c) or None, if there are not enough
+        different voltages yet. Failed measurements (nan) are ignored.
+
+        """
+        if not (np.isfinite(x) and np.isfinite(y)):
+            return self.popt
+        if self.n == len(self.x):
+            self.x = np.concatenate((self.x, np.zeros(len(self.x))))
+            self.y = np.concatenate((self.y, np.zeros(len(self.y))))
+        self.x[self.n] = x
+        self.y[self.n] = y
+        self.n += 1
+        x = self.x[:self.n]
+        y = self.y[:self.n]
+        if len(np.unique(x)) < 4:
+            return None
+
+        old = None
+        if self.popt is None:
+            self.popt = np.array(startParameters(x, y))
+            iterations = 10*self.iterations
+        else:
+            old = luminance(self.grid, *self.popt)
+            iterations = self.iterations
+        for i in range(iterations):
+            self._step(x, y)
+        if not np.all(np.isfinite(self.popt)):
+            # start again from the data with the next update
+            self.popt = None
+            self.pcov = None
+            self.changes = list()
+            return None
+
+        jacobian = luminanceJacobian(x, *self.popt)
+        residuals = luminance(x, *self.popt) - y
+        try:
+            self.pcov = np.linalg.inv(np.dot(jacobian.T, jacobian)) * (
+                    np.dot(residuals, residuals)/max(self.n - 3, 1))
+        except np.linalg.LinAlgError:
+            self.pcov = np.empty((3, 3))
+            self.pcov.fill(np.inf)
+        if old is not None:
+            self.changes.append(float(np.max(np.abs(
+                luminance(self.grid, *self.popt) - old))))
+        return self.popt
+
+    def _step(self, x, y):
+        # one Levenberg-Marquardt step from self.popt
+        residuals = luminance(x, *self.popt) - y
+        sse = np.dot(residuals, residuals)
+        jacobian = luminanceJacobian(x, *self.popt)
+        jtj = np.dot(jacobian.T, jacobian)
+        jtr = np.dot(jacobian.T, residuals)
+        for i in range(10):
+            try:
+                delta = np.linalg.solve(jtj + self._damping*np.diag(
+                    np.diag(jtj)), -jtr)
+            except np.linalg.LinAlgError:
+                self._damping *= 10.0
+                continue
+            new = self.popt + delta
+            new_residuals = luminance(x, *new) - y
+            if np.dot(new_residuals, new_residuals) <= sse:
+                self.popt = new
+                self._damping = max(self._damping/10.0, 1e-9)
+                return
+            self._damping *= 10.0
+
+    def predictionSd(self, x=None):
+        """
+        Returns the standard deviation of the predicted luminance at
+        voltages *x* (default self.grid).
+
+        """
+        if x is None:
+            x = self.grid
+        return predictionSd(x, self.popt, self.pcov)
+
+    def isStable(self):
+        """
+        Returns True, if the predictions on self.grid are stable and
+        precise enough to stop measuring.
+
+        """
+        if self.popt is None or len(self.changes) < self.window:
+            return False
+        if max(self.changes[-self.window:]) >= self.tolerance:
+            return False
+        sd = self.predictionSd()
+        return bool(np.all(np.isfinite(sd)) and np.max(sd) < self.tolerance)
+
+
+def primariesFromSweep(xyY):
+    """
+    Returns XYZ per cd/m^2 (array of shape (3,)) of a channel from the
+    measurements *xyY* (shape (N, 3)) of a sweep of the channel, where
+    the other channels are off. Failed measurements (nan) are left out.
+
+    """
+    XYZ = xyY2XYZ(xyY)
+    XYZ = XYZ[np.all(np.isfinite(XYZ), axis=1)]
+    return XYZ.sum(axis=0)/XYZ[:, 1].sum()
+
+
+class ColorModel(object):
+    """
+    Colorimetric model of the tubes, which maps voltages (V_r, V_g, V_b)
+    to XYZ. The light of the channels adds up:
+
+        XYZ = baseline + sum_i Y_i(V_i) * (X/Y, 1, Z/Y)_i(V_i)
+
+    where Y_i is the luminance function of channel i and the ratios X/Y
+    and Z/Y of every channel are polynomials in the voltage, so that a
+    shift of the chromaticity with the voltage is part of the model.
+
+    The channels are not exactly additive, if they are on together. The
+    interaction multiplies every component j of the sum with a gain
+
+        1 + g_j(w),   w = sum_(i<k) Y_i Y_k / sum_(i<k) Ymax_i Ymax_k
+
+    where g_j is a polynomial without constant term, Ymax_i is the
+    luminance of channel i at the highest voltage and w is 0, if only one
+    channel is on. The gains are fitted to a sweep of all channels with
+    fitInteraction.
+
+    Example:
+
+    >>> parameters = [(67.8, -6.7, -9.0), (138.7, -16.4, -8.9),
+    ...               (58.2, -2.7, -9.8)]
+    >>> coefficients = [[[1.8], [0.0]], [[0.45], [0.05]], [[4.7], [27.0]]]
+    >>> model = ColorModel(parameters, coefficients)
+    >>> xyY = model.xyY([(2000, 2500, 1500)])
+    >>> voltages, feasible = model.inverse(xyY)
+    >>> voltages.tolist(), feasible.tolist()
+    ([[2000, 2500, 1500]], [True])
+
+    """
+    def __init__(self, parameters, coefficients, baseline_xyY=None,
+            low=0x400, high=0xFFF, interaction=None):
+        """
+        Parameters:
+            parameters: array of shape (3, 3) or list of 3 channel models
+                parameters (a, b, c) of the luminance function or the
+                models (see channelModels) of red, green, and blue
+
+            coefficients: array of shape (3, 2, degree + 1)
+                polynomial coefficients (highest power first, like
+                numpy.polyval) of X/Y and Z/Y of every channel in the
+                voltage divided by 0xFFF
+
+            baseline_xyY: *None* or triple
+                light of the tubes at their off level
+
+            low, high: *0x400*, *0xFFF* or int
+                range of the voltages
+
+            interaction: *None* or array of shape (3, degree + 1)
+                polynomial coefficients (like numpy.polyval, the constant
+                is ignored) of the gains g of X, Y, and Z; None means
+                additive channels
+
+        """
+        self.channels = channelModels(parameters)
+        self._Y_max = np.array([model.luminance(high) for model in
+            self.channels], dtype=float)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        if baseline_xyY is None:
+            self.baseline_XYZ = np.zeros(3)
+        else:
+            self.baseline_XYZ = xyY2XYZ(baseline_xyY)
+        self.low = low
+        self.high = high
+        if interaction is None:
+            interaction = np.zeros((3, 1))
+        self.interaction = np.asarray(interaction, dtype=float)
+
+    @classmethod
+    def fromSweeps(cls, sweeps, parameters=None, degree=1,
+            baseline_xyY=None):
+        """
+        Returns a ColorModel estimated from the sweeps of the channels.
+
+        Parameters:
+            sweeps: dict
+                "red", "green", "blue" -> (voltages, xyY), where voltages
+                are the voltages of the channel and xyY an array of shape
+                (N, 3) measured with the other channels off
+
+            parameters: *None*, array of shape (3, 3), or list of models
+                parameters or models of the luminance functions, if None
+                they are fitted with fitChannels
+
+            degree: *1* or int
+                degree of the polynomials of X/Y and Z/Y
+
+        """
+        colors = ("red", "green", "blue")
+        if parameters is None:
+            fits = fitChannels(dict((color, (sweeps[color][0],
+                np.asarray(sweeps[color][1])[:, 2])) for color in colors))
+            parameters = [fits[color][0] for color in colors]
+        coefficients = np.zeros((3, 2, degree + 1))
+        for i, color in enumerate(colors):
+            voltages = np.asarray(sweeps[color][0], dtype=float)
+            XYZ = xyY2XYZ(sweeps[color][1])
+            valid = np.all(np.isfinite(XYZ), axis=1) & (XYZ[:, 1] > 0)
+            u = voltages[valid]/0xFFF
+            Y = XYZ[valid, 1]
+            # weighted by Y, because the ratios of dim light are noisy
+            for j, k in enumerate((0, 2)):
+                coefficients[i, j] = np.polyfit(u, XYZ[valid, k]/Y, degree,
+                        w=np.sqrt(Y))
+        return cls(parameters, coefficients, baseline_xyY)
+
+    def _channels(self, voltages):
+        # luminance, ratios, and their derivatives for voltages (N, 3)
+        Y = np.column_stack([model.luminance(voltages[:, i]) for i, model
+            in enumerate(self.channels)])
+        dY = np.column_stack([model.derivative(voltages[:, i]) for i, model
+            in enumerate(self.channels)])
+        u = voltages/float(0xFFF)
+        ratios = np.ones(voltages.shape + (3,))
+        dratios = np.zeros(voltages.shape + (3,))
+        for i in range(3):
+            for j, k in enumerate((0, 2)):
+                poly = self.coefficients[i, j]
+                ratios[:, i, k] = np.polyval(poly, u[:, i])
+                dratios[:, i, k] = np.polyval(np.polyder(poly), u[:, i]
+                        )/0xFFF if len(poly) > 1 else 0.0
+        return (Y, dY, ratios, dratios)
+
+    def _overlap(self, Y):
+        # w of the interaction and its derivatives by Y_i, Y (N, 3)
+        Y_max = self._Y_max
+        norm = (Y_max[0]*Y_max[1] + Y_max[0]*Y_max[2] + Y_max[1]*Y_max[2])
+        w = (Y[:, 0]*Y[:, 1] + Y[:, 0]*Y[:, 2] + Y[:, 1]*Y[:, 2])/norm
+        dw = (np.sum(Y, axis=1)[:, np.newaxis] - Y)/norm
+        return (w, dw)
+
+    def _gains(self, w):
+        # gains 1 + g_j(w) and their derivatives by w, shape (N, 3)
+        gains = np.ones((len(w), 3))
+        dgains = np.zeros((len(w), 3))
+        for j in range(3):
+            poly = self.interaction[j].copy()
+            poly[-1] = 0.0
+            gains[:, j] += np.polyval(poly, w)
+            if len(poly) > 1:
+                dgains[:, j] = np.polyval(np.polyder(poly), w)
+        return (gains, dgains)
+
+    def additiveXYZ(self, voltages):
+        """
+        Returns the sum of the light of the channels without the
+        interaction and the baseline (array of shape (N, 3)) for
+        *voltages* (shape (N, 3)).
+
+        """
+        voltages = np.atleast_2d(np.asarray(voltages, dtype=float))
+        Y, dY, ratios, dratios = self._channels(voltages)
+        return np.sum(Y[:, :, np.newaxis]*ratios, axis=1)
+
+    def XYZ(self, voltages):
+        """
+        Returns XYZ (array of shape (N, 3)) for *voltages* (shape (N, 3)).
+
+        """
+        voltages = np.atleast_2d(np.asarray(voltages, dtype=float))
+        Y, dY, ratios, dratios = self._channels(voltages)
+        gains, dgains = self._gains(self._overlap(Y)[0])
+        return self.baseline_XYZ + gains*np.sum(Y[:, :, np.newaxis]*ratios,
+                axis=1)
+
+    def xyY(self, voltages):
+        """
+        Returns xyY (array of shape (N, 3)) for *voltages* (shape (N, 3)).
+
+        """
+        return XYZ2xyY(self.XYZ(voltages))
+
+    def jacobian(self, voltages):
+        """
+        Returns the derivatives of XYZ with respect to the voltages as
+        array of shape (N, 3, 3), where [n, j, i] is the derivative of
+        component j by the voltage of channel i.
+
+        """
+        voltages = np.atleast_2d(np.asarray(voltages, dtype=float))
+        Y, dY, ratios, dratios = self._channels(voltages)
+        w, dw = self._overlap(Y)
+        gains, dgains = self._gains(w)
+        additive = np.sum(Y[:, :, np.newaxis]*ratios, axis=1)
+        # [n, i, j] derivative of component j of the sum by voltage i
+        derivatives = (dY[:, :, np.newaxis]*ratios +
+                Y[:, :, np.newaxis]*dratios)
+        derivatives = (gains[:, np.newaxis, :]*derivatives +
+                (dw*dY)[:, :, np.newaxis]*(dgains*additive)[:, np.newaxis,
+                    :])
+        return np.transpose(derivatives, (0, 2, 1))
+
+    def fitInteraction(self, voltages, xyY, degree=1):
+        """
+        Fits the gains of the interaction of the channels to measurements
+        *xyY* (shape (N, 3)) at *voltages* (shape (N, 3)) with more than
+        one channel on, e.g. the sweep with all channels, by least squares
+        in XYZ. Failed measurements are left out. Sets and returns
+        self.interaction.
+
+        Parameters:
+            degree: *1* or positive int
+                degree of the polynomials g of the gains
+
+        """
+        voltages = np.atleast_2d(np.asarray(voltages, dtype=float))
+        XYZ = np.atleast_2d(xyY2XYZ(xyY)) - self.baseline_XYZ
+        Y, dY, ratios, dratios = self._channels(voltages)
+        additive = np.sum(Y[:, :, np.newaxis]*ratios, axis=1)
+        w = self._overlap(Y)[0]
+        valid = (np.all(np.isfinite(XYZ), axis=1) &
+                np.all(np.isfinite(additive), axis=1))
+        if np.sum(valid & (w > 0)) < degree:
+            raise ValueError("at least %i measurements with more than one"
+                    %degree + " channel on are needed")
+        powers = w[valid, np.newaxis]**np.arange(degree, 0, -1)
+        interaction = np.zeros((3, degree + 1))
+        for j in range(3):
+            design = powers*additive[valid, j][:, np.newaxis]
+            interaction[j, :-1] = np.linalg.lstsq(design, XYZ[valid, j] -
+                    additive[valid, j], rcond=-1)[0]
+        self.interaction = interaction
+        return interaction
+
+    def validate(self, voltages, xyY):
+        """
+        Compares the model with measurements *xyY* (shape (N, 3)) at
+        *voltages* (shape (N, 3)), e.g. the sweep with all channels, and
+        returns the root mean square error of Y (cd/m^2) and of the
+        chromaticity (distance in xy). Failed measurements are left out.
+
+        """
+        xyY = np.asarray(xyY, dtype=float)
+        predicted = self.xyY(voltages)
+        valid = np.all(np.isfinite(xyY), axis=1) & np.all(np.isfinite(
+            predicted), axis=1)
+        error = predicted[valid] - xyY[valid]
+        rms_Y = np.sqrt(np.mean(error[:, 2]**2))
+        rms_xy = np.sqrt(np.mean(np.sum(error[:, :2]**2, axis=1)))
+        return (float(rms_Y), float(rms_xy))
+
+    def inverse(self, xyY, iterations=20, tolerance=1e-4, start=None):
+        """
+        Returns the voltages, which give the target colors *xyY* (shape
+        (N, 3)), as integer array of shape (N, 3) and a boolean array of
+        length N, which is False for targets the tubes can not produce.
+
+        The voltages start at *start* (array of shape (N, 3)) or at the
+        solution of a model with constant chromaticities (targetVoltages)
+        and are refined with Newton steps for all targets at once. A
+        target counts as produced, if the relative error of XYZ is below
+        *tolerance* within the range of the voltages.
+
+        """
+        target = np.atleast_2d(xyY2XYZ(xyY))
+        if start is None:
+            middle = np.array([[(self.low + self.high)/2.0]*3])
+            Y, dY, ratios, dratios = self._channels(middle)
+            # without a baseline XYZ2xyY would give nan chromaticities
+            baseline_xyY = None
+            if np.any(self.baseline_XYZ):
+                baseline_xyY = XYZ2xyY(self.baseline_XYZ)
+            start, feasible = targetVoltages(XYZ2xyY(target),
+                    self.channels, ratios[0], baseline_xyY, self.low,
+                    self.high)
+        voltages = np.array(start, dtype=float).reshape(target.shape)
+        # only targets, which did not converge yet, are iterated
+        active = np.arange(len(voltages))
+        for i in range(iterations):
+            current = voltages[active]
+            residuals = self.XYZ(current) - target[active]
+            try:
+                step = np.linalg.solve(self.jacobian(current),
+                        residuals[:, :, np.newaxis])[:, :, 0]
+            except np.linalg.LinAlgError:
+                break
+            step = np.nan_to_num(step)
+            voltages[active] = np.clip(current - step, self.low, self.high)
+            active = active[np.any(np.abs(step) >= 0.05, axis=1)]
+            if len(active) == 0:
+                break
+        voltages = np.round(voltages)
+        error = np.abs(self.XYZ(voltages) - target)
+        # one step of the voltages changes XYZ by up to the derivative
+        resolution = np.sum(np.abs(self.jacobian(voltages)), axis=2)
+        with np.errstate(invalid="ignore"):
+            feasible = np.all(error <= np.maximum(tolerance*np.abs(target),
+                resolution), axis=1)
+        return (voltages.astype(int), feasible)
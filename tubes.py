@@ -22,6 +22,9 @@ provides convenient methods to measure and calibrate the tubes.
 
 """
 
+import threading
+import time
+
 import devtubes
 from colorentry import ColorEntry
 
@@ -29,6 +32,69 @@ from colorentry import ColorEntry
 #from os import chdir, path
 #        chdir(path.dirname(self.__file__))
 
+class TransitionFuture(object):
+    """
+    Result of Tubes.setVoltagesAsync. It can be polled with done() or
+    awaited with wait() or result().
+
+    If a transition is retargeted before it is finished, its future is
+    finished together with the transition that replaced it and result()
+    returns the voltages which were set at the end.
+
+    """
+    def __init__(self, voltages):
+        """
+        Parameters:
+            voltages: (vol_r, vol_g, vol_b)
+                requested voltages
+
+        """
+        self.voltages = voltages
+        self._finished = threading.Event()
+        self._result = None
+        self._exception = None
+
+    def done(self):
+        """
+        Returns True, if the transition is finished.
+
+        """
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Waits until the transition is finished or *timeout* seconds are
+        over. Returns True, if the transition is finished.
+
+        """
+        self._finished.wait(timeout)
+        return self._finished.is_set()
+
+    def result(self, timeout=None):
+        """
+        Waits until the transition is finished and returns the triple of
+        voltages the tubes are set to.
+
+        Raises RuntimeError if the transition did not finish within
+        *timeout* seconds and reraises the exception of the transition, if
+        it failed.
+
+        """
+        if not self.wait(timeout):
+            raise RuntimeError("transition to %s not finished after %s s"
+                    %(str(self.voltages), str(timeout)))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def _setResult(self, result):
+        self._result = result
+        self._finished.set()
+
+    def _setException(self, exception):
+        self._exception = exception
+        self._finished.set()
+
 class Tubes(object):
     """
     Gives high level access to the tubes.
@@ -40,6 +106,9 @@ class Tubes(object):
 
     >>> tub = Tubes(dummy=True)
     >>> tub.setVoltages((1000, 1000, 1000))
+    >>> future = tub.setVoltagesAsync((1200, 1000, 1000))
+    >>> future.result()
+    (1200, 1000, 1000)
     >>> tub.printNote()
     <BLANKLINE>
             Note:
@@ -49,7 +118,7 @@ class Tubes(object):
 
 
     """
-    def __init__(self, dummy=False):
+    def __init__(self, dummy=False, simulate=False):
         """
         Initializes tubes object.
 
@@ -62,8 +131,18 @@ class Tubes(object):
             dummy: *False* or True
                 If dummy=True no wasco runtime libraries will be loaded.
 
+            simulate: *False* or True
+                If simulate=True a simulated wasco card with a virtual
+                clock is used and wait() does not sleep for real.
+
         """
-        self.devtub = devtubes.DevTubes(dummy=dummy)
+        self.devtub = devtubes.DevTubes(dummy=dummy, simulate=simulate)
+        # background worker for setVoltagesAsync
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._abort_ramp = threading.Event()
+        self._target = None
+        self._pending = list()
 
     def setVoltages(self, voltages):
         """
@@ -76,11 +155,74 @@ class Tubes(object):
         the change in voltage has to be smoothly. This prevents the
         fluorescent tubes to accidentally give out.
 
+        If a transition of setVoltagesAsync is running, the worker thread
+        does this transition, too. Otherwise the tubes are set in this
+        thread and setVoltagesAsync waits until they are set, so that only
+        one thread writes to the wasco card.
+
+        """
+        if isinstance(voltages, ColorEntry):
+            voltages = voltages.voltages
+        with self._worker_lock:
+            if self._worker is None:
+                self.devtub.setVoltages(voltages)
+                return
+        self.setVoltagesAsync(voltages).result()
+
+    def setVoltagesAsync(self, voltages):
+        """
+        Sets tubes to given voltages in a background thread and returns a
+        TransitionFuture immediately (or after setVoltages in another
+        thread finished).
+
+        If a transition is still running, it is stopped at the voltages
+        currently set and the new transition starts from there. Therefore
+        fast consecutive calls result in one smooth transition to the last
+        requested voltages.
+
+        If setVoltagesAsync gets an ColorEntry object, it extracts the
+        voltages from this object.
+
         """
         if isinstance(voltages, ColorEntry):
-            self.devtub.setVoltages(voltages.voltages)
-        else:
-            self.devtub.setVoltages(voltages)
+            voltages = voltages.voltages
+        voltages = tuple(voltages) # the caller might change a list later
+        future = TransitionFuture(voltages)
+        with self._worker_lock:
+            self._target = voltages
+            self._pending.append(future)
+            self._abort_ramp.set()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._runTransitions,
+                        name="TubesTransitions")
+                self._worker.daemon = True
+                self._worker.start()
+        return future
+
+    def wait(self, seconds):
+        """
+        Waits *seconds* seconds. With simulated tubes only the virtual
+        clock advances.
+
+        """
+        self.devtub.sleep(seconds)
+
+    def time(self):
+        """
+        Returns the time in seconds since the epoch. With simulated tubes
+        the virtual time is returned.
+
+        """
+        if self.devtub.virtual_clock is not None:
+            return self.devtub.virtual_clock.time()
+        return time.time()
+
+    def currentVoltages(self):
+        """
+        Returns the triple of voltages which is set at the moment.
+
+        """
+        return (self.devtub.U_r, self.devtub.U_g, self.devtub.U_b)
 
     def printNote(self):
         """
@@ -94,3 +236,32 @@ class Tubes(object):
         to radiate a stable amount of light.
         """)
 
+    def _runTransitions(self):
+        """
+        Runs in the worker thread and ramps the tubes to the last requested
+        voltages. The worker thread ends, when there is nothing left to do.
+
+        """
+        while True:
+            with self._worker_lock:
+                if not self._pending:
+                    self._worker = None
+                    return
+                target = self._target
+                futures = self._pending
+                self._pending = list()
+                self._abort_ramp.clear()
+            try:
+                self.devtub.setVoltages(target, abort=self._abort_ramp)
+            except Exception as exception:
+                for future in futures:
+                    future._setException(exception)
+                continue
+            with self._worker_lock:
+                if self._pending:
+                    # retargeted, finish futures with the next transition
+                    self._pending = futures + self._pending
+                    continue
+            result = self.currentVoltages()
+            for future in futures:
+                future._setResult(result)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+# ./warmup.py
+#
+# (c) 2010-2013 Konstantin Sering, Nora Umbach, Dominik Wabersich
+# <colorlab[at]psycho.uni-tuebingen.de>
+#
+# GPL 3.0+ or (cc) by-sa (http://creativecommons.org/licenses/by-sa/3.0/)
+#
+# content: (1) fitDrift
+#          (2) linearTrend
+#          (3) WarmUpMonitor
+#
+# input: --
+# output: --
+#
+# created 2026-10-17
+# last mod 2026-10-17
+
+"""
+This module decides, when the tubes are warmed up. Instead of waiting a
+fixed time (four hours) a reference voltage is measured every few minutes
+and an exponential decay
+
+    value(t) = final + amplitude * exp(-t/tau)
+
+is fitted to the luminance and to the chromaticity x and y. The tubes are
+warm, as soon as the predicted remaining drift |value(t) - final| is below
+a tolerance for all three. A slow drift, which is hidden in the noise of a
+short series, is caught by the linear trend of the last hour: it has to
+stay below the tolerance during the next half hour, too.
+
+Example:
+
+>>> import numpy as np
+>>> monitor = WarmUpMonitor(tolerance=0.005, xy_tolerance=0.001)
+>>> for t in np.arange(0, 2*3600, 300):
+...     Y = 20.0*(1 - 0.1*np.exp(-t/1800.0))
+...     if monitor.update(t, (0.31, 0.33, Y)):
+...         break
+>>> print("warm after %i minutes" % (t/60))
+warm after 115 minutes
+
+"""
+
+import numpy as np
+from scipy.optimize import minimize_scalar
+
+
+def fitDrift(t, values, taus=None):
+    """
+    Fits value(t) = final + amplitude * exp(-t/tau) by least squares and
+    returns (final, amplitude, tau).
+
+    The fit is linear in final and amplitude, so it is done for every time
+    constant in *taus* and the best one is refined between its neighbours.
+    By default *taus* are 60 log spaced values from a tenth of the
+    shortest time difference to ten times the duration of the series.
+    Failed measurements (nan) are left out.
+
+    Raises ValueError, if there are less than 3 values.
+
+    """
+    t = np.asarray(t, dtype=float)
+    values = np.asarray(values, dtype=float)
+    valid = np.isfinite(t) & np.isfinite(values)
+    if np.sum(valid) < 3:
+        raise ValueError("at least 3 values are needed to fit the drift")
+    t = t[valid] - np.min(t[valid])
+    values = values[valid]
+    if taus is None:
+        steps = np.diff(np.unique(t))
+        shortest = max(np.min(steps), 1.0) if len(steps) else 1.0
+        taus = np.logspace(np.log10(shortest/10.0),
+                np.log10(10.0*max(np.max(t), 1.0)), 60)
+    log_taus = np.log(np.asarray(taus, dtype=float))
+    errors = [_linearFit(t, values, log_tau)[0] for log_tau in log_taus]
+    i = int(np.argmin(errors))
+    log_tau = log_taus[i]
+    if len(log_taus) > 1:
+        bounds = (log_taus[max(i - 1, 0)], log_taus[min(i + 1,
+            len(log_taus) - 1)])
+        result = minimize_scalar(lambda log_tau: _linearFit(t, values,
+            log_tau)[0], bounds=bounds, method="bounded")
+        if result.fun < errors[i]:
+            log_tau = float(result.x)
+    sse, final, amplitude = _linearFit(t, values, log_tau)
+    return (float(final), float(amplitude), float(np.exp(log_tau)))
+
+
+def _linearFit(t, values, log_tau):
+    # sum of squared errors, final, and amplitude for one time constant
+    design = np.column_stack((np.ones(len(t)), np.exp(-t/np.exp(log_tau))))
+    coefficients = np.linalg.lstsq(design, values, rcond=-1)[0]
+    sse = np.sum((np.dot(design, coefficients) - values)**2)
+    return (sse, coefficients[0], coefficients[1])
+
+
+def linearTrend(t, values):
+    """
+    Fits a straight line to *values* at times *t* and returns its slope
+    and the standard error of the slope. Failed measurements (nan) are
+    left out.
+
+    """
+    t = np.asarray(t, dtype=float)
+    values = np.asarray(values, dtype=float)
+    valid = np.isfinite(t) & np.isfinite(values)
+    t = t[valid] - np.mean(t[valid])
+    values = values[valid]
+    sxx = np.sum(t**2)
+    if len(t) < 3 or sxx == 0:
+        return (float("nan"), float("inf"))
+    slope = np.sum(t*values)/sxx
+    residuals = values - np.mean(values) - slope*t
+    se = np.sqrt(np.sum(residuals**2)/(len(t) - 2)/sxx)
+    return (float(slope), float(se))
+
+
+class WarmUpMonitor(object):
+    """
+    Collects measurements (xyY) of a fixed reference voltage over time and
+    predicts the drift of the tubes, which is left after the last
+    measurement (see fitDrift).
+
+    Attributes:
+        times: list of floats
+            time of the measurements in seconds
+
+        xyY: list of triples
+            measured colors
+
+        drift: None or array of 3 floats
+            predicted remaining drift of x, y, and Y (relative to the
+            final luminance) after the last update; the larger one of the
+            fitted decay and of the linear trend of the last *window*
+            seconds (plus two standard errors) over *horizon* seconds
+
+        is_warm: bool
+            True, if the tubes were warm at the last update
+
+        warm_time: None or float
+            time of the first update, at which the tubes were warm
+
+    """
+    def __init__(self, tolerance=0.005, xy_tolerance=0.001, min_samples=6,
+            window=3600.0, horizon=1800.0, callback=None):
+        """
+        Parameters:
+            tolerance: *0.005* or positive float
+                remaining drift of the luminance relative to its final
+                value, below which the tubes are warm
+
+            xy_tolerance: *0.001* or positive float
+                remaining drift of the chromaticities x and y, below
+                which the tubes are warm
+
+            min_samples: *6* or int greater 3
+                number of measurements in the last *window* seconds before
+                the tubes can be warm
+
+            window: *3600.0* or positive float
+                seconds of the measurements, which give the linear trend
+
+            horizon: *1800.0* or positive float
+                seconds the linear trend is extrapolated
+
+            callback: *None* or callable
+                called with the monitor as argument, when the tubes are
+                warm for the first time
+
+        """
+        self.tolerance = tolerance
+        self.xy_tolerance = xy_tolerance
+        self.min_samples = min_samples
+        self.window = window
+        self.horizon = horizon
+        self.callback = callback
+        self.times = list()
+        self.xyY = list()
+        self.drift = None
+        self.is_warm = False
+        self.warm_time = None
+
+    def update(self, t, xyY):
+        """
+        Adds the measurement *xyY* at time *t* (in seconds) and returns
+        True, if the tubes are warm.
+
+        """
+        self.times.append(float(t))
+        self.xyY.append(tuple(float(v) for v in xyY))
+        data = np.array(self.xyY)
+        times = np.array(self.times)
+        valid = np.all(np.isfinite(data), axis=1)
+        recent = valid & (times >= times[-1] - self.window)
+        if np.sum(recent) < max(self.min_samples, 3):
+            return False
+        self.drift = np.zeros(3)
+        for i in range(3):
+            final, amplitude, tau = fitDrift(times[valid], data[valid, i])
+            decay = abs(amplitude)*np.exp(-(times[-1] -
+                times[valid][0])/tau)
+            slope, se = linearTrend(times[recent], data[recent, i])
+            self.drift[i] = max(decay, (abs(slope) + 2*se)*self.horizon)
+            if i == 2:
+                self.drift[i] /= max(abs(final), 1e-9)
+        warm = (self.drift[0] < self.xy_tolerance and self.drift[1] <
+                self.xy_tolerance and self.drift[2] < self.tolerance)
+        self.is_warm = warm
+        if warm and self.warm_time is None:
+            self.warm_time = times[-1]
+            if self.callback is not None:
+                self.callback(self)
+        return warm
+